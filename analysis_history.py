@@ -0,0 +1,188 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+class AnalysisHistory:
+    """Append-only store of past analyses for time-series queries
+    
+    Each analysis adds one row per (username, repo, timestamp) with its
+    HEAD sha, archetype and scores, plus one row per belief category. An
+    analysis identical to the latest row (same HEAD, extractor, archetype,
+    scores and belief confidences) adds nothing, so refreshes of an
+    unchanged repository don't pile up, while webhook deliveries that
+    change the result at the same HEAD are still recorded. The
+    belief rows carry the owner, repository and timestamp themselves, so
+    confidence history for a repository or a user, optionally narrowed to
+    one category, is a single index range scan. SQLite in WAL mode under
+    DATA_DIR, shared by all gunicorn workers; nothing here calls GitHub.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None, retention_days: Optional[int] = None):
+        data_dir = os.environ.get('DATA_DIR', 'data')
+        self.db_path = db_path or os.environ.get('HISTORY_DB_PATH', os.path.join(data_dir, 'history.db'))
+        # 0 keeps everything
+        self.retention_days = (retention_days if retention_days is not None
+                               else int(os.environ.get('HISTORY_RETENTION_DAYS', 365)))
+        self._local = threading.local()
+        
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS analyses (
+                                id INTEGER PRIMARY KEY,
+                                owner TEXT NOT NULL,
+                                repo TEXT NOT NULL,
+                                username TEXT NOT NULL,
+                                repo_name TEXT NOT NULL,
+                                analyzed_at REAL NOT NULL,
+                                head_sha TEXT,
+                                extractor_version TEXT,
+                                archetype TEXT,
+                                archetype_confidence REAL,
+                                overall_score REAL,
+                                consistency_score REAL,
+                                growth_score REAL,
+                                impact_score REAL)''')
+            conn.execute('CREATE INDEX IF NOT EXISTS analyses_repo_time ON analyses (owner, repo, analyzed_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS analyses_time ON analyses (analyzed_at)')
+            conn.execute('''CREATE TABLE IF NOT EXISTS belief_history (
+                                analysis_id INTEGER NOT NULL REFERENCES analyses (id) ON DELETE CASCADE,
+                                owner TEXT NOT NULL,
+                                repo TEXT NOT NULL,
+                                analyzed_at REAL NOT NULL,
+                                category TEXT NOT NULL,
+                                confidence REAL NOT NULL,
+                                source TEXT)''')
+            conn.execute('CREATE INDEX IF NOT EXISTS belief_history_repo '
+                         'ON belief_history (owner, repo, analyzed_at)')
+            conn.execute('CREATE INDEX IF NOT EXISTS belief_history_owner_category '
+                         'ON belief_history (owner, category, analyzed_at)')
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA foreign_keys=ON')
+            self._local.conn = conn
+        return conn
+    
+    def record(self, analysis: Dict[str, Any], head_sha: Optional[str] = None,
+               extractor_version: Optional[str] = None) -> int:
+        """Append an analysis result; returns its history id, or the latest one if unchanged"""
+        username, repo = analysis['username'], analysis['repo']
+        owner, repo_key = username.lower(), repo.lower()
+        analyzed_at = time.time()
+        archetype = analysis.get('archetype') or {}
+        score = analysis.get('epistemic_score') or {}
+        
+        row = (head_sha, extractor_version, archetype.get('type'), archetype.get('confidence'),
+               score.get('overall_score'), score.get('consistency_score'), score.get('growth_score'),
+               score.get('impact_score'))
+        beliefs = sorted((belief['category'], belief['confidence'], belief.get('source') or '')
+                         for belief in analysis.get('beliefs', []))
+        
+        conn = self._connection()
+        with conn:
+            if head_sha is not None:
+                latest = conn.execute(
+                    'SELECT id, analyzed_at, head_sha, extractor_version, archetype, archetype_confidence, overall_score, '
+                    'consistency_score, growth_score, impact_score FROM analyses WHERE owner = ? AND repo = ? '
+                    'ORDER BY analyzed_at DESC LIMIT 1', (owner, repo_key)).fetchone()
+                if latest is not None and latest[2:] == row:
+                    # By repository and time, which belief_history_repo indexes
+                    latest_beliefs = sorted(conn.execute(
+                        "SELECT category, confidence, COALESCE(source, '') FROM belief_history "
+                        "WHERE owner = ? AND repo = ? AND analyzed_at = ? AND analysis_id = ?",
+                        (owner, repo_key, latest[1], latest[0])).fetchall())
+                    if latest_beliefs == beliefs:
+                        return latest[0]
+            cursor = conn.execute(
+                'INSERT INTO analyses (owner, repo, username, repo_name, analyzed_at, head_sha, extractor_version, '
+                'archetype, archetype_confidence, overall_score, consistency_score, growth_score, impact_score) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (owner, repo_key, username, repo, analyzed_at) + row)
+            analysis_id = cursor.lastrowid
+            conn.executemany(
+                'INSERT INTO belief_history (analysis_id, owner, repo, analyzed_at, category, confidence, source) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                [(analysis_id, owner, repo_key, analyzed_at, belief['category'], belief['confidence'],
+                  belief.get('source')) for belief in analysis.get('beliefs', [])])
+            if self.retention_days:
+                conn.execute('DELETE FROM analyses WHERE analyzed_at < ?',
+                             (analyzed_at - self.retention_days * 86400,))
+        return analysis_id
+    
+    @staticmethod
+    def _range(since: Optional[float], until: Optional[float]) -> tuple:
+        return (since if since is not None else 0.0, until if until is not None else float('inf'))
+    
+    @staticmethod
+    def _timestamp(value: float) -> str:
+        return datetime.fromtimestamp(value).isoformat()
+    
+    def analyses(self, username: str, repo: Optional[str] = None, since: Optional[float] = None,
+                 until: Optional[float] = None, limit: int = 1000) -> List[Dict[str, Any]]:
+        """Past analyses of a repository, or of all of a user's repositories, oldest first"""
+        start, end = self._range(since, until)
+        query = ('SELECT username, repo_name, analyzed_at, head_sha, extractor_version, archetype, '
+                 'archetype_confidence, overall_score, consistency_score, growth_score, impact_score '
+                 'FROM analyses WHERE owner = ?')
+        params: List[Any] = [username.lower()]
+        if repo is not None:
+            query += ' AND repo = ?'
+            params.append(repo.lower())
+        query += ' AND analyzed_at BETWEEN ? AND ? ORDER BY analyzed_at DESC LIMIT ?'
+        params.extend([start, end, limit])
+        
+        rows = self._connection().execute(query, params).fetchall()
+        return [{
+            'username': row[0],
+            'repo': row[1],
+            'analyzed_at': self._timestamp(row[2]),
+            'head_sha': row[3],
+            'extractor_version': row[4],
+            'archetype': {'type': row[5], 'confidence': row[6]},
+            'epistemic_score': {'overall_score': row[7], 'consistency_score': row[8],
+                                'growth_score': row[9], 'impact_score': row[10]}
+        } for row in reversed(rows)]
+    
+    def belief_history(self, username: str, repo: Optional[str] = None, category: Optional[str] = None,
+                       since: Optional[float] = None, until: Optional[float] = None,
+                       limit: int = 10000) -> Dict[str, List[Dict[str, Any]]]:
+        """Confidence over time per belief category, oldest first
+        
+        A category absent from an analysis had no belief in it (or was
+        outside that analysis' top five), and has no point there.
+        """
+        start, end = self._range(since, until)
+        query = 'SELECT category, analyzed_at, confidence, repo, source FROM belief_history WHERE owner = ?'
+        params: List[Any] = [username.lower()]
+        if repo is not None:
+            query += ' AND repo = ?'
+            params.append(repo.lower())
+        if category is not None:
+            query += ' AND category = ?'
+            params.append(category)
+        query += ' AND analyzed_at BETWEEN ? AND ? ORDER BY analyzed_at DESC LIMIT ?'
+        params.extend([start, end, limit])
+        
+        series: Dict[str, List[Dict[str, Any]]] = {}
+        for category_name, analyzed_at, confidence, repo_key, source in reversed(
+                self._connection().execute(query, params).fetchall()):
+            series.setdefault(category_name, []).append({
+                'analyzed_at': self._timestamp(analyzed_at),
+                'confidence': confidence,
+                'repo': repo_key,
+                'source': source
+            })
+        return series
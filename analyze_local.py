@@ -0,0 +1,115 @@
+"""Analyze local git clones in bulk without the GitHub API
+
+Usage:
+    python analyze_local.py ~/src/repo-a ~/src/repo-b -o results.jsonl
+    python analyze_local.py ~/mirrors --depth 2 --workers 16 -o results.jsonl
+
+Each argument is a git checkout or a directory searched for checkouts.
+Repositories are read and scored in chunks on a process pool, and written
+as one JSON object per line in completion order.
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+from datetime import datetime
+from multiprocessing import Pool
+from typing import Dict, List, Iterator, Any
+
+from local_repository import LocalRepositoryClient
+from belief_extractor import BeliefExtractor
+from batch_scoring import BatchBeliefScorer
+from epistemic_client import EpistemicClient
+
+logger = logging.getLogger(__name__)
+
+# Per-process state, built once by the pool initializer
+_client = None
+_scorer = None
+_epistemic = None
+
+def find_repositories(root: str, depth: int) -> Iterator[str]:
+    """Yield git checkouts at or below root, up to depth directories down"""
+    if os.path.exists(os.path.join(root, '.git')):
+        yield root
+        return
+    if depth <= 0:
+        return
+    try:
+        entries = sorted(os.scandir(root), key=lambda entry: entry.name)
+    except OSError as e:
+        logger.warning(f"Cannot list {root}: {e}")
+        return
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False) and not entry.name.startswith('.'):
+            yield from find_repositories(entry.path, depth - 1)
+
+def _init_worker(commit_limit: int):
+    global _client, _scorer, _epistemic
+    _client = LocalRepositoryClient(commit_limit=commit_limit)
+    extractor = BeliefExtractor()
+    _scorer = BatchBeliefScorer(extractor)
+    _epistemic = EpistemicClient(category_keywords=extractor.category_keywords())
+
+def analyze_paths(paths: List[str]) -> List[Dict[str, Any]]:
+    """Run belief and archetype extraction over a chunk of checkouts"""
+    records, loaded = [], []
+    for path in paths:
+        try:
+            loaded.append((path, _client.get_repository_data(path)))
+        except Exception as e:
+            records.append({'path': path, 'error': str(e)})
+    
+    # Score the whole chunk with one set of matrix operations
+    results = _scorer.extract([github_data for _, github_data in loaded]) if loaded else []
+    for (path, github_data), (beliefs, archetype) in zip(loaded, results):
+        repository = github_data['repository']
+        records.append({
+            'path': path,
+            'username': repository['owner']['login'],
+            'repo': repository['name'],
+            'repository': repository,
+            'beliefs': beliefs,
+            'archetype': archetype,
+            'epistemic_score': _epistemic.calculate_epistemic_score(
+                beliefs, github_data['commits'], repository, github_data['user']),
+            'analyzed_at': datetime.now().isoformat()
+        })
+    return records
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+', help='git checkouts or directories containing them')
+    parser.add_argument('-o', '--output', default='-', help='JSONL output file (default: stdout)')
+    parser.add_argument('--depth', type=int, default=1,
+                        help='how many directory levels to search for checkouts (default: 1)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='worker processes')
+    parser.add_argument('--commits', type=int, default=50, help='recent commits read per repository')
+    parser.add_argument('--chunk', type=int, default=64, help='repositories scored together per task')
+    args = parser.parse_args(argv)
+    
+    logging.basicConfig(level=logging.WARNING)
+    paths = [os.path.abspath(repo) for root in args.paths for repo in find_repositories(root, args.depth)]
+    if not paths:
+        parser.error('no git checkouts found')
+    
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    failed = 0
+    try:
+        with Pool(args.workers, initializer=_init_worker, initargs=(args.commits,)) as pool:
+            chunks = [paths[i:i + args.chunk] for i in range(0, len(paths), args.chunk)]
+            for records in pool.imap_unordered(analyze_paths, chunks):
+                for record in records:
+                    failed += 'error' in record
+                    output.write(json.dumps(record) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    
+    print(f"Analyzed {len(paths) - failed}/{len(paths)} repositories", file=sys.stderr)
+    return 1 if failed == len(paths) else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
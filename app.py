@@ -1,10 +1,30 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, render_template, jsonify, request, Response, stream_with_context, g
 import os
+import json
+import time
+import queue
+import threading
+import contextvars
 from datetime import datetime
+from typing import Optional, Callable
+from concurrent.futures import Future
+from contextlib import nullcontext
 import logging
 from github_client import GitHubClient
+from github_graphql_client import GitHubGraphQLClient
 from epistemic_client import EpistemicClient
+from epistemic_outbox import EpistemicOutbox
 from belief_extractor import BeliefExtractor
+from result_cache import AnalysisCache
+from cache_refresher import CacheRefresher
+from profile_index import ProfileIndex
+from analysis_history import AnalysisHistory
+from webhooks import RepositoryState, WebhookProcessor, verify_signature, SIGNATURE_HEADER
+from batch_analyzer import BatchAnalyzer
+from job_queue import JobQueue, QueueFull
+from commit_history import CommitHistoryIngestor
+import metrics
+from profiling import RequestProfiler, MemorySnapshots, authorized
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key')
@@ -14,9 +34,77 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Initialize clients
-github_client = GitHubClient()
-epistemic_client = EpistemicClient()
+if os.environ.get('GITHUB_BACKEND', 'rest').lower() == 'graphql':
+    github_client = GitHubGraphQLClient()
+else:
+    github_client = GitHubClient()
 belief_extractor = BeliefExtractor()
+epistemic_client = EpistemicClient(category_keywords=belief_extractor.category_keywords())
+# Write-behind keeps Epistemic Me latency off the response path
+if os.environ.get('EPISTEMIC_WRITE_BEHIND', 'False').lower() == 'true':
+    epistemic_outbox = EpistemicOutbox(epistemic_client)
+else:
+    epistemic_outbox = None
+analysis_cache = AnalysisCache()
+# Deep mode aggregates keyword counts over the full commit history
+if os.environ.get('GITHUB_DEEP_HISTORY', 'False').lower() == 'true':
+    # Analyses served from the sample while a walk runs are redone once it lands
+    commit_history = CommitHistoryIngestor(github_client, belief_extractor.matcher,
+                                           on_ingested=lambda *args: refresh_analysis(*args))
+else:
+    commit_history = None
+# Keeps hot repositories' cached analyses from expiring under their readers
+if os.environ.get('REFRESH_ENABLED', 'True').lower() == 'true':
+    cache_refresher = CacheRefresher(
+        analysis_cache, lambda *args: refresh_analysis(*args),
+        cost=2 if isinstance(github_client, GitHubGraphQLClient) else 6,
+        quota_fraction=github_client.scheduler.remaining_fraction)
+else:
+    cache_refresher = None
+# Belief-profile vectors of every analysis, for "developers who think like X"
+if os.environ.get('PROFILE_INDEX', 'True').lower() == 'true':
+    profile_index = ProfileIndex(belief_extractor.profile_dimensions())
+else:
+    profile_index = None
+# Every analysis is kept, so belief trends can be charted without GitHub
+if os.environ.get('HISTORY_ENABLED', 'True').lower() == 'true':
+    analysis_history = AnalysisHistory()
+else:
+    analysis_history = None
+# Push, issues and repository webhooks keep analyses current without polling
+webhook_secret = os.environ.get('WEBHOOK_SECRET')
+if webhook_secret:
+    repository_state = RepositoryState()
+    webhook_processor = WebhookProcessor(github_client, repository_state, commit_history, belief_extractor)
+else:
+    repository_state = None
+    webhook_processor = None
+batch_analyzer = BatchAnalyzer(github_client, lambda *args: analyze_with_cache(*args))
+job_queue = JobQueue(lambda *args: analyze_with_cache(*args))
+request_profiler = RequestProfiler()
+memory_snapshots = MemorySnapshots()
+# Cache-Control for analysis responses: fresh for max-age, then served
+# stale by browsers/proxies while they revalidate with If-None-Match
+http_max_age = int(os.environ.get('ANALYSIS_HTTP_MAX_AGE', 60))
+http_stale_while_revalidate = int(os.environ.get('ANALYSIS_HTTP_STALE_WHILE_REVALIDATE', 600))
+# Stage timings in a Server-Timing header; disable to keep them private
+server_timing_enabled = os.environ.get('SERVER_TIMING', 'True').lower() == 'true'
+
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    metrics.request_timings.set([])
+
+@app.after_request
+def record_request_timing(response):
+    elapsed = time.perf_counter() - g.request_start
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    metrics.http_request_seconds.observe(elapsed, endpoint=endpoint, method=request.method,
+                                         status=response.status_code)
+    timings = metrics.request_timings.get()
+    if server_timing_enabled and timings:
+        response.headers['Server-Timing'] = metrics.server_timing(timings + [('total', elapsed)])
+    return response
 
 @app.route('/')
 def index():
@@ -55,6 +143,27 @@ def analyze_repo(username, repo):
                              error="Analysis failed",
                              message=f"Could not analyze {username}/{repo}"), 500
 
+def analysis_etag(head_sha: Optional[str], version: Optional[int] = None) -> Optional[str]:
+    """Strong ETag for an analysis: the commit analysed plus the extractor that read it
+    
+    Issues and repository deliveries change the inputs without moving HEAD,
+    so the version of webhook-maintained inputs, when there are any, counts too.
+    """
+    if not head_sha:
+        return None
+    etag = f"{head_sha}-{belief_extractor.version}"
+    return etag if version is None else f"{etag}-{version}"
+
+def set_cache_headers(response: Response, etag: Optional[str]):
+    """Let browsers and proxies reuse an analysis until HEAD moves"""
+    if etag:
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = (f'public, max-age={http_max_age}, '
+                                             f'stale-while-revalidate={http_stale_while_revalidate}')
+    else:
+        # Without a HEAD sha there's nothing to revalidate against
+        response.headers['Cache-Control'] = 'no-cache'
+
 @app.route('/api/analyze/<username>/<repo>')
 def api_analyze_repo(username, repo):
     """
@@ -67,60 +176,33 @@ def api_analyze_repo(username, repo):
         
         logger.info(f"API: Analyzing repository: {username}/{repo}")
         
-        # Fetch GitHub data
-        github_data = github_client.get_repository_data(username, repo)
-        
-        # Extract beliefs
-        beliefs = belief_extractor.extract_beliefs(github_data)
-        
-        # Extract developer archetype
-        archetype = belief_extractor.extract_archetype(github_data)
-        
-        # Create Epistemic Me models
-        self_model = epistemic_client.create_self_model(username, name=github_data.get('user', {}).get('name', username))
-        
-        # Create beliefs in Epistemic Me
-        epistemic_beliefs = []
-        for belief in beliefs:
-            epistemic_belief = epistemic_client.create_belief(
-                self_model['id'],
-                belief['content'],
-                belief_type='STATEMENT',
-                confidence=belief['confidence'],
-                source='github'
-            )
-            epistemic_beliefs.append(epistemic_belief)
-        
-        # Create belief system
-        belief_system = epistemic_client.create_belief_system(self_model['id'], epistemic_beliefs)
-        
-        # Create dialectic for analysis
-        dialectic = epistemic_client.create_dialectic(self_model['id'])
-        
-        # Calculate epistemic score
-        actions = github_data.get('commits', [])
-        epistemic_score = epistemic_client.calculate_epistemic_score(beliefs, actions)
-        
-        # Generate predictions
-        predictions = generate_predictions(beliefs, github_data)
-        
-        # Format response
-        response = {
-            'username': username,
-            'repo': repo,
-            'repository': github_data.get('repository', {}),
-            'user': github_data.get('user', {}),
-            'beliefs': beliefs,
-            'archetype': archetype,
-            'predictions': predictions,
-            'epistemic_score': epistemic_score,
-            'self_model': self_model,
-            'belief_system': belief_system,
-            'dialectic': dialectic,
-            'analyzed_at': datetime.now().isoformat()
-        }
+        # Sampled or explicitly requested runs write a flamegraph profile
+        if request_profiler.should_profile(request.headers):
+            profile_run = request_profiler.profile(f"analyze-{username}-{repo}")
+        else:
+            profile_run = nullcontext({})
+        with profile_run as profile:
+            # An unchanged HEAD and extractor means the client's copy is current
+            with metrics.stage('head_sha'):
+                head_sha = github_client.get_head_sha(username, repo)
+            etag = analysis_etag(head_sha, inputs_version(username, repo, head_sha))
+            if etag and request.if_none_match.contains_weak(etag):
+                if cache_refresher:
+                    cache_refresher.record(username, repo, AnalysisCache.make_key(
+                        username, repo, head_sha, belief_extractor.version))
+                body = Response(status=304)
+            else:
+                response = analyze_with_cache(username, repo, head_sha=head_sha)
+                # Name the inputs this body was computed from, not the ones checked above
+                etag = analysis_etag(head_sha, response.get('inputs_version'))
+                
+                with metrics.stage('serialize'):
+                    body = jsonify(response)
         
-        return jsonify(response)
+        set_cache_headers(body, etag)
+        if profile.get('path') and authorized(request.headers.get(RequestProfiler.HEADER)):
+            body.headers['X-Profile'] = os.path.basename(profile['path'])
+        return body
         
     except Exception as e:
         logger.error(f"API: Error analyzing {username}/{repo}: {str(e)}")
@@ -129,6 +211,468 @@ def api_analyze_repo(username, repo):
             'message': str(e)
         }), 500
 
+@app.route('/api/similar/<username>/<repo>')
+def api_similar(username, repo):
+    """
+    Stored developer profiles most similar to a repository's, by cosine similarity
+    """
+    if not profile_index:
+        return jsonify({'error': 'Similarity search is disabled'}), 404
+    try:
+        k = max(1, min(int(request.args.get('k', 10)), 100))
+    except ValueError:
+        return jsonify({'error': 'k must be an integer'}), 400
+    
+    try:
+        with metrics.stage('similarity'):
+            similar = profile_index.similar(username, repo, k)
+        if similar is None:
+            # Not indexed yet: analyze it, or index a cached analysis
+            response = analyze_with_cache(username, repo)
+            if not profile_index.contains(username, repo) and response.get('profile_vector'):
+                profile_index.add(username, repo, response['profile_vector'],
+                                  response.get('archetype', {}).get('type'))
+            with metrics.stage('similarity'):
+                similar = profile_index.similar(username, repo, k)
+        if similar is None:
+            return jsonify({'error': 'No profile stored for this repository'}), 404
+        
+        return jsonify({
+            'username': username,
+            'repo': repo,
+            'similar': similar,
+            'profiles': profile_index.count()
+        })
+    except Exception as e:
+        logger.error(f"API: Similarity search failed for {username}/{repo}: {str(e)}")
+        return jsonify({'error': 'Similarity search failed', 'message': str(e)}), 500
+
+@app.route('/api/analyze/batch', methods=['POST'])
+def api_analyze_batch():
+    """
+    Batch analysis endpoint streaming one NDJSON record per repository
+    """
+    try:
+        repos = batch_analyzer.parse_repos(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': 'Invalid batch request', 'message': str(e)}), 400
+    
+    logger.info(f"API: Batch analyzing {len(repos)} repositories")
+    
+    def generate():
+        for record in batch_analyzer.run(repos):
+            yield json.dumps(record) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no'})
+
+@app.route('/api/jobs/<username>/<repo>', methods=['POST'])
+def api_submit_job(username, repo):
+    """
+    Queue a repository analysis and return its job id immediately
+    """
+    try:
+        job = job_queue.submit(username, repo)
+    except QueueFull as e:
+        response = jsonify({'error': 'Analysis queue full', 'message': str(e)})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    
+    logger.info(f"API: Job {job['id']} for {username}/{repo} ({'merged' if job['merged'] else 'queued'})")
+    
+    response = jsonify(job)
+    response.headers['Location'] = f"/api/jobs/{job['id']}"
+    return response, 202
+
+@app.route('/api/jobs/<job_id>')
+def api_get_job(job_id):
+    """
+    Poll a job; ?wait=<seconds> long-polls until it finishes
+    """
+    wait = min(request.args.get('wait', 0, type=float), 30)
+    job = job_queue.get(job_id, wait=wait)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs')
+def api_job_stats():
+    """
+    Job queue length and worker utilization
+    """
+    return jsonify(job_queue.stats())
+
+@app.route('/api/models/<outbox_id>')
+def api_resolve_models(outbox_id):
+    """
+    Resolve pending Epistemic Me placeholder models from a write-behind analysis
+    """
+    if not epistemic_outbox:
+        return jsonify({'error': 'Write-behind mode is disabled'}), 404
+    
+    resolved = epistemic_outbox.resolve(outbox_id)
+    if resolved is None:
+        return jsonify({'error': 'Unknown outbox id'}), 404
+    return jsonify(resolved)
+
+@app.route('/webhooks/github', methods=['POST'])
+def github_webhook():
+    """
+    Apply a GitHub push, issues or repository delivery and queue a re-analysis
+    
+    Only the delta is applied here; the analysis runs on the job queue and
+    this returns 202 with its job id right away.
+    """
+    if not webhook_processor:
+        return jsonify({'error': 'Webhooks are disabled'}), 404
+    body = request.get_data()
+    if not verify_signature(webhook_secret, body, request.headers.get(SIGNATURE_HEADER)):
+        return jsonify({'error': 'Invalid signature'}), 401
+    
+    event = request.headers.get('X-GitHub-Event', '')
+    if event == 'ping':
+        return jsonify({'status': 'pong'})
+    try:
+        # Hooks can be configured to send the JSON as a form field
+        if request.mimetype == 'application/x-www-form-urlencoded':
+            payload = json.loads(request.form['payload'])
+        else:
+            payload = json.loads(body)
+    except (KeyError, ValueError):
+        return jsonify({'error': 'Invalid payload'}), 400
+    
+    try:
+        with metrics.stage('webhook_apply'):
+            result = webhook_processor.handle(event, payload)
+    except Exception as e:
+        logger.error(f"Webhook: Error applying {event} delivery {request.headers.get('X-GitHub-Delivery')}: {str(e)}")
+        return jsonify({'error': 'Webhook processing failed', 'message': str(e)}), 500
+    if result['status'] == 'ignored':
+        return jsonify(result), 202
+    
+    username, repo = result['username'], result['repo']
+    logger.info(f"Webhook: {event} {result['status']} for {username}/{repo} at {result['head_sha']}")
+    github_client.forget_head(username, repo)
+    try:
+        result['job'] = job_queue.submit(username, repo)['id']
+    except QueueFull as e:
+        # The delta is stored; the next read of this repository re-analyses it
+        logger.warning(f"Webhook: Could not queue re-analysis of {username}/{repo}: {e}")
+        result['job'] = None
+    return jsonify(result), 202
+
+@app.route('/api/analyze/<username>/<repo>/stream')
+def api_analyze_repo_stream(username, repo):
+    """
+    Server-Sent Events endpoint emitting each analysis stage as it is ready
+    """
+    logger.info(f"API: Streaming analysis of repository: {username}/{repo}")
+    
+    def generate():
+        try:
+            for event, data in analysis_events(username, repo):
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        except Exception as e:
+            logger.error(f"API: Error streaming {username}/{repo}: {str(e)}")
+            error = {'error': 'Analysis failed', 'message': str(e)}
+            yield f"event: analysis_error\ndata: {json.dumps(error)}\n\n"
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def analysis_events(username: str, repo: str):
+    """Yield (event, data) pairs for each analysis stage as soon as it is ready
+    
+    The analysis goes through analyze_with_cache on a worker thread, so
+    concurrent viewers share one computation; when this request is the one
+    computing, its stages arrive over a queue as they complete. Otherwise
+    they are replayed from the finished result.
+    """
+    head_sha = github_client.get_head_sha(username, repo)
+    stages: queue.Queue = queue.Queue()
+    
+    def analyze():
+        try:
+            response = analyze_with_cache(username, repo, head_sha=head_sha,
+                                          on_stage=lambda event, data: stages.put((event, data)))
+            stages.put(('result', response))
+        except Exception as e:
+            stages.put(('failed', e))
+    
+    # Keep the request's priority and Server-Timing context on the worker
+    threading.Thread(target=contextvars.copy_context().run, args=(analyze,),
+                     name='analysis-events', daemon=True).start()
+    
+    emitted = set()
+    while True:
+        event, data = stages.get()
+        if event == 'failed':
+            raise data
+        if event == 'result':
+            response = data
+            break
+        emitted.add(event)
+        yield event, data
+    
+    if 'repository' not in emitted:
+        yield 'repository', {'repository': response['repository']}
+    if 'commit_beliefs' not in emitted:
+        yield 'commit_beliefs', {'beliefs': response['beliefs']}
+    if 'archetype' not in emitted:
+        yield 'archetype', {'archetype': response['archetype'], 'user': response['user']}
+    yield 'score', {'epistemic_score': response['epistemic_score']}
+    yield 'predictions', {'predictions': response['predictions']}
+    yield 'complete', response
+
+def analyze_with_cache(username: str, repo: str, user_future: Optional[Future] = None,
+                       head_sha: Optional[str] = None,
+                       on_stage: Optional[Callable[[str, dict], None]] = None) -> dict:
+    """Serve an analysis from cache when the default branch hasn't moved
+    
+    on_stage(event, data) is called with each stage's partial result, but
+    only if this call ends up computing the analysis.
+    """
+    if head_sha is None:
+        with metrics.stage('head_sha'):
+            head_sha = github_client.get_head_sha(username, repo)
+    cache_key = AnalysisCache.make_key(username, repo, head_sha, belief_extractor.version)
+    
+    def compute():
+        github_data = fetch_repository_data(username, repo, head_sha, user_future, on_stage)
+        return run_analysis(username, repo, github_data, head_sha=head_sha, on_stage=on_stage)
+    
+    with metrics.stage('analysis'):
+        if cache_refresher:
+            # HEAD moved and a refresh is already on it: serve the last result meanwhile
+            stale = cache_refresher.stale(username, repo, cache_key)
+            cache_refresher.record(username, repo, cache_key)
+            if stale is not None:
+                return stale
+        if webhook_updated(username, repo, head_sha, analysis_cache.get(cache_key)):
+            # An issues or repository delivery changed the inputs without moving HEAD
+            if analysis_cache.refresh(cache_key, compute):
+                return analysis_cache.get(cache_key)
+        return analysis_cache.get_or_compute(cache_key, compute)
+
+def inputs_version(username: str, repo: str, head_sha: Optional[str]) -> Optional[int]:
+    """Version of the webhook-maintained inputs at head_sha (or awaiting resync), if any"""
+    if not repository_state or not head_sha:
+        return None
+    stored = repository_state.head(username, repo)
+    if stored is None or stored['head_sha'] not in (None, head_sha):
+        return None
+    return stored['version']
+
+def webhook_updated(username: str, repo: str, head_sha: str, cached: Optional[dict]) -> bool:
+    """Whether the stored inputs changed since the ones cached was computed from
+    
+    Compares the state version the analysis read, so an analysis that was
+    already running when a delivery landed still counts as outdated.
+    """
+    if cached is None:
+        return False
+    version = inputs_version(username, repo, head_sha)
+    return version is not None and cached.get('inputs_version') != version
+
+def refresh_analysis(username: str, repo: str) -> Optional[str]:
+    """Recompute a repository's analysis for its current HEAD into the cache
+    
+    Returns the refreshed cache key, or None if another worker is on it.
+    """
+    head_sha = github_client.get_head_sha(username, repo)
+    cache_key = AnalysisCache.make_key(username, repo, head_sha, belief_extractor.version)
+    
+    def compute():
+        github_data = fetch_repository_data(username, repo, head_sha)
+        return run_analysis(username, repo, github_data, head_sha=head_sha)
+    
+    return cache_key if analysis_cache.refresh(cache_key, compute) else None
+
+def fetch_repository_data(username: str, repo: str, head_sha: Optional[str],
+                          user_future: Optional[Future] = None,
+                          on_stage: Optional[Callable[[str, dict], None]] = None) -> dict:
+    """Analysis inputs: the webhook-maintained copy when it is at head_sha, else from GitHub
+    
+    A fetch for a repository that delivers webhooks replaces its stored
+    copy, unless a delivery updated that copy in the meantime.
+    """
+    stored = None
+    if repository_state and head_sha:
+        stored = repository_state.load(username, repo)
+        if stored and repository_state.is_current(stored, head_sha):
+            github_data = stored['github_data']
+            if on_stage:
+                on_stage('repository', {'repository': github_data.get('repository', {})})
+                on_stage('readme_beliefs', {'beliefs': belief_extractor.extract_readme_beliefs(
+                    github_data.get('readme', ''))})
+            github_data['state_version'] = stored['version']
+            return github_data
+    with metrics.stage('github_fetch'):
+        if on_stage is None:
+            github_data = github_client.get_repository_data(username, repo, user_future)
+        else:
+            futures = github_client.submit_repository_data(username, repo, user_future)
+            # Repository metadata is the first paint: one GitHub round trip
+            github_data = {'repository': futures['repository'].result()}
+            on_stage('repository', {'repository': github_data['repository']})
+            # README beliefs need nothing else; the scan is reused by extract_beliefs
+            github_data['readme'] = futures['readme'].result()
+            on_stage('readme_beliefs', {'beliefs': belief_extractor.extract_readme_beliefs(github_data['readme'])})
+            for key in ('commits', 'issues', 'user'):
+                github_data[key] = futures[key].result()
+            github_data['fetched_at'] = datetime.now().isoformat()
+    if stored is not None:
+        # Stored with its aggregates, so deliveries can update them in place
+        github_data['aggregates'] = belief_extractor.aggregates(github_data)
+        if repository_state.save(username, repo, head_sha, github_data, stored['version']):
+            github_data['state_version'] = stored['version'] + 1
+    return github_data
+
+def run_analysis(username: str, repo: str, github_data: Optional[dict] = None,
+                 head_sha: Optional[str] = None,
+                 on_stage: Optional[Callable[[str, dict], None]] = None) -> dict:
+    """Run the full analysis pipeline for a repository
+    
+    on_stage(event, data), when given, receives beliefs and archetype as
+    soon as they are extracted, for streaming.
+    """
+    # Fetch GitHub data
+    if github_data is None:
+        with metrics.stage('github_fetch'):
+            github_data = github_client.get_repository_data(username, repo)
+    
+    if commit_history:
+        try:
+            with metrics.stage('deep_history'):
+                history = commit_history.current(username, repo, head_sha)
+            # Until a queued walk lands, the recent-commit sample stands in
+            if history:
+                github_data['commit_counts'] = history['counts']
+                github_data['commit_count'] = history['commit_count']
+        except Exception as e:
+            logger.warning(f"Deep history lookup failed for {username}/{repo}: {e}")
+    
+    # Extract beliefs
+    with metrics.stage('extract_beliefs'):
+        beliefs = belief_extractor.extract_beliefs(github_data)
+    if on_stage:
+        on_stage('commit_beliefs', {'beliefs': beliefs})
+    
+    # Extract developer archetype
+    with metrics.stage('extract_archetype'):
+        archetype = belief_extractor.extract_archetype(github_data)
+    if on_stage:
+        on_stage('archetype', {'archetype': archetype, 'user': github_data.get('user', {})})
+    
+    # Store the profile for similarity search
+    with metrics.stage('profile_index'):
+        profile_vector = belief_extractor.profile_vector(beliefs, belief_extractor.archetype_scores(github_data))
+        if profile_index:
+            try:
+                profile_index.add(username, repo, profile_vector, archetype.get('type'))
+            except Exception as e:
+                logger.warning(f"Could not index profile of {username}/{repo}: {e}")
+    
+    # Create Epistemic Me models, beliefs, belief system and dialectic in one batched write
+    with metrics.stage('epistemic_write'):
+        batch = epistemic_client.build_analysis_batch(
+            username, beliefs, name=github_data.get('user', {}).get('name', username))
+        if epistemic_outbox:
+            models = epistemic_outbox.enqueue(batch)
+        else:
+            models = epistemic_client.send_analysis_batch(batch)
+    self_model = models['self_model']
+    belief_system = models['belief_system']
+    dialectic = models['dialectic']
+    
+    # Calculate epistemic score
+    actions = github_data.get('commits', [])
+    with metrics.stage('epistemic_score'):
+        epistemic_score = epistemic_client.calculate_epistemic_score(
+            beliefs, actions, github_data.get('repository', {}), github_data.get('user', {}))
+    
+    # Generate predictions
+    with metrics.stage('predictions'):
+        predictions = generate_predictions(beliefs, github_data)
+    
+    # Format response
+    response = {
+        'username': username,
+        'repo': repo,
+        'repository': github_data.get('repository', {}),
+        'user': github_data.get('user', {}),
+        'beliefs': beliefs,
+        'archetype': archetype,
+        'profile_vector': profile_vector,
+        'predictions': predictions,
+        'epistemic_score': epistemic_score,
+        'self_model': self_model,
+        'belief_system': belief_system,
+        'dialectic': dialectic,
+        'analyzed_at': datetime.now().isoformat(),
+        # The webhook-maintained inputs read, to tell when a delivery outdated this
+        'inputs_version': github_data.get('state_version')
+    }
+    
+    # Keep it for belief history
+    if analysis_history:
+        with metrics.stage('history'):
+            try:
+                analysis_history.record(response, head_sha, belief_extractor.version)
+            except Exception as e:
+                logger.warning(f"Could not record history of {username}/{repo}: {e}")
+    
+    return response
+
+def parse_history_time(value: Optional[str]) -> Optional[float]:
+    """A since/until query parameter as unix seconds: ISO 8601 or seconds"""
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def history_response(username: str, repo: Optional[str] = None):
+    """Stored analyses and belief-confidence series, read without contacting GitHub"""
+    if not analysis_history:
+        return jsonify({'error': 'Analysis history is disabled'}), 404
+    try:
+        since = parse_history_time(request.args.get('since'))
+        until = parse_history_time(request.args.get('until'))
+        limit = max(1, min(int(request.args.get('limit', 1000)), 10000))
+    except ValueError:
+        return jsonify({'error': 'since/until must be ISO 8601 or unix seconds, limit an integer'}), 400
+    category = request.args.get('category')
+    
+    try:
+        with metrics.stage('history'):
+            analyses = analysis_history.analyses(username, repo, since, until, limit)
+            series = analysis_history.belief_history(username, repo, category, since, until, limit * 5)
+        return jsonify({
+            'username': username,
+            'repo': repo,
+            'analyses': analyses,
+            'beliefs': series
+        })
+    except Exception as e:
+        logger.error(f"API: History lookup failed for {username}/{repo}: {str(e)}")
+        return jsonify({'error': 'History lookup failed', 'message': str(e)}), 500
+
+@app.route('/api/history/<username>/<repo>')
+def api_repo_history(username, repo):
+    """
+    Belief-confidence history of a repository; ?since, ?until, ?category, ?limit
+    """
+    return history_response(username, repo)
+
+@app.route('/api/history/<username>')
+def api_user_history(username):
+    """
+    Belief-confidence history across all of a user's analysed repositories
+    """
+    return history_response(username)
+
 def generate_predictions(beliefs: list, github_data: dict) -> dict:
     """Generate predictions based on beliefs and GitHub data"""
     try:
@@ -200,9 +744,115 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'github': github_client.scheduler.snapshot(redact=True)
     })
 
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus metrics for this worker process"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
+def admin_denied():
+    """Error response unless the request carries the admin token"""
+    if not os.environ.get('ADMIN_TOKEN'):
+        return jsonify({'error': 'Admin endpoints are disabled'}), 404
+    if not authorized(request.headers.get('X-Admin-Token')):
+        return jsonify({'error': 'Unauthorized'}), 403
+    return None
+
+@app.route('/admin/memory/snapshots', methods=['GET', 'POST', 'DELETE'])
+def admin_memory_snapshots():
+    """
+    Take (POST), list (GET) or drop (DELETE) tracemalloc snapshots of this worker
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    
+    if request.method == 'POST':
+        return jsonify(memory_snapshots.take()), 201
+    if request.method == 'DELETE':
+        memory_snapshots.clear()
+        return '', 204
+    return jsonify({'snapshots': memory_snapshots.snapshots()})
+
+@app.route('/admin/memory/diff')
+def admin_memory_diff():
+    """
+    Top allocation changes between two snapshots, oldest to newest by default
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    
+    diff = memory_snapshots.diff(request.args.get('from'), request.args.get('to'),
+                                 limit=min(request.args.get('limit', 20, type=int), 200),
+                                 group_by='traceback' if request.args.get('traceback') else 'lineno')
+    if diff is None:
+        return jsonify({'error': 'Need two snapshots to compare'}), 400
+    return jsonify(diff)
+
+def collect_app_metrics():
+    """Cache effectiveness, GitHub quota and queue depth, read at scrape time"""
+    cache = dict(analysis_cache.stats)
+    lookups = cache['memory_hits'] + cache['disk_hits'] + cache['misses']
+    yield ('contextbuilder_analysis_cache_total', 'counter', 'Analysis cache lookups by outcome',
+           [({'result': result}, count) for result, count in cache.items()])
+    yield ('contextbuilder_analysis_cache_hit_ratio', 'gauge', 'Share of analysis lookups served from cache',
+           [({}, (cache['memory_hits'] + cache['disk_hits']) / lookups if lookups else 0.0)])
+    
+    if github_client.http_cache:
+        http = dict(github_client.http_cache.stats)
+        requests_seen = http['revalidated'] + http['stored']
+        yield ('contextbuilder_github_http_cache_total', 'counter', 'Cacheable GitHub responses by outcome',
+               [({'result': result}, http[result]) for result in ('revalidated', 'stored')])
+        yield ('contextbuilder_github_http_cache_hit_ratio', 'gauge',
+               'Share of cacheable GitHub requests answered with 304 Not Modified',
+               [({}, http['revalidated'] / requests_seen if requests_seen else 0.0)])
+        yield ('contextbuilder_github_http_cache_evicted_total', 'counter',
+               'GitHub HTTP cache entries evicted for age or size', [({}, http['evicted'])])
+    
+    snapshot = github_client.scheduler.snapshot()
+    for field, documentation in (('remaining', 'GitHub rate-limit requests remaining'),
+                                 ('limit', 'GitHub rate-limit requests per window'),
+                                 ('reset', 'Unix time the GitHub rate-limit window resets')):
+        yield (f'contextbuilder_github_ratelimit_{field}', 'gauge', documentation,
+               [({'token': quota['token'], 'resource': quota['resource']}, quota[field])
+                for quota in snapshot['quota']
+                # A zero reset only means no rate-limit headers seen yet
+                if quota[field] is not None and (field != 'reset' or quota[field])])
+    yield ('contextbuilder_github_queue_depth', 'gauge', 'GitHub requests waiting for quota',
+           [({}, snapshot['queue_depth'])])
+    yield ('contextbuilder_github_in_flight', 'gauge', 'GitHub requests in flight',
+           [({}, snapshot['in_flight'])])
+    
+    if cache_refresher:
+        refresher = cache_refresher.snapshot()
+        yield ('contextbuilder_refresh_total', 'counter', 'Background cache refresh attempts by outcome',
+               [({'result': result}, refresher[result])
+                for result in ('refreshed', 'skipped_budget', 'skipped_quota', 'skipped_leased', 'failed')])
+        yield ('contextbuilder_refresh_stale_served_total', 'counter',
+               'Previous results served while their refresh ran', [({}, refresher['stale_served'])])
+        yield ('contextbuilder_refresh_tracked', 'gauge', 'Repositories with access scores',
+               [({}, refresher['tracked'])])
+        yield ('contextbuilder_refresh_budget_spent', 'gauge',
+               'Estimated GitHub requests spent on refreshes in the last hour', [({}, refresher['spent_last_hour'])])
+    
+    if webhook_processor:
+        webhooks = dict(webhook_processor.stats)
+        yield ('contextbuilder_webhook_deliveries_total', 'counter', 'Webhook deliveries by outcome',
+               [({'result': result}, webhooks[result]) for result in ('applied', 'resynced', 'ignored')])
+        yield ('contextbuilder_webhook_conflicts_total', 'counter',
+               'Webhook updates redone after a concurrent delivery', [({}, webhooks['conflicts'])])
+    
+    jobs = job_queue.stats()
+    yield ('contextbuilder_jobs_queued', 'gauge', 'Analysis jobs waiting for a worker', [({}, jobs['queued'])])
+    yield ('contextbuilder_jobs_busy_workers', 'gauge', 'Job workers running an analysis',
+           [({}, jobs['busy_workers'])])
+
+metrics.registry.register_collector(collect_app_metrics)
+
 @app.errorhandler(404)
 def not_found(error):
     """Custom 404 page"""
@@ -0,0 +1,104 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Any, Callable, Iterator, Tuple
+from request_scheduler import priority, BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+class _SharedUser:
+    """An owner lookup shared across a batch, started by the first analysis that needs it
+    
+    Stands in for the Future the GitHub clients accept, so repositories
+    served from the analysis cache never fetch their owner.
+    """
+    
+    def __init__(self, start: Callable[[], Future]):
+        self._start = start
+        self._future: Optional[Future] = None
+        self._lock = threading.Lock()
+    
+    def result(self, timeout: Optional[float] = None) -> Any:
+        with self._lock:
+            if self._future is None:
+                self._future = self._start()
+        return self._future.result(timeout)
+
+class BatchAnalyzer:
+    """Analyze many repositories with bounded concurrency
+    
+    Results are yielded in completion order and only a bounded window of
+    analyses is in flight at once, so memory stays flat however long the
+    batch is. Owner profiles are fetched at most once per batch, on the
+    first cache miss, and shared by all repositories of the same owner.
+    """
+    
+    def __init__(self, github_client, analyze: Callable[..., Dict[str, Any]],
+                 max_workers: Optional[int] = None, max_repos: Optional[int] = None):
+        self.github_client = github_client
+        self.analyze = analyze
+        self.max_workers = max_workers or int(os.environ.get('BATCH_WORKERS', 8))
+        self.max_repos = max_repos or int(os.environ.get('BATCH_MAX_REPOS', 500))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='batch-analysis')
+    
+    def parse_repos(self, payload: Any) -> List[Tuple[str, str]]:
+        """Validate a batch request body into (username, repo) pairs"""
+        repos = payload.get('repos') if isinstance(payload, dict) else None
+        if not isinstance(repos, list) or not repos:
+            raise ValueError("Body must be a JSON object with a non-empty 'repos' list")
+        if len(repos) > self.max_repos:
+            raise ValueError(f"At most {self.max_repos} repositories per batch")
+        
+        parsed = []
+        for entry in repos:
+            if isinstance(entry, str) and entry.count('/') == 1:
+                username, repo = entry.split('/')
+            elif isinstance(entry, dict):
+                username, repo = entry.get('username'), entry.get('repo')
+            else:
+                username = repo = None
+            if not username or not repo:
+                raise ValueError(f"Invalid repository entry: {entry!r}")
+            parsed.append((username, repo))
+        return parsed
+    
+    def run(self, repos: List[Tuple[str, str]]) -> Iterator[Dict[str, Any]]:
+        """Yield one result record per repository as each analysis finishes"""
+        user_futures: Dict[str, _SharedUser] = {}
+        user_lock = threading.Lock()
+        
+        def user_future(username: str) -> _SharedUser:
+            with user_lock:
+                key = username.lower()
+                if key not in user_futures:
+                    user_futures[key] = _SharedUser(lambda: self.github_client.submit_user(username))
+                return user_futures[key]
+        
+        def analyze_one(index: int, username: str, repo: str) -> Dict[str, Any]:
+            record = {'index': index, 'username': username, 'repo': repo}
+            try:
+                # Dashboard batches yield GitHub quota to interactive page loads
+                with priority(BACKGROUND):
+                    record['result'] = self.analyze(username, repo, user_future(username))
+                record['status'] = 'ok'
+            except Exception as e:
+                logger.error(f"Batch: Error analyzing {username}/{repo}: {e}")
+                record['status'] = 'error'
+                record['error'] = str(e)
+            return record
+        
+        pending = set()
+        window = self.max_workers * 2
+        for index, (username, repo) in enumerate(repos):
+            if len(pending) >= window:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            pending.add(self._executor.submit(analyze_one, index, username, repo))
+        
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
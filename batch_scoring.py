@@ -0,0 +1,231 @@
+import logging
+from typing import Dict, List, Any, Tuple, Iterable, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Order in which the per-repo path appends beliefs before deduplicating
+SOURCES = ('readme', 'commits', 'metadata', 'topics', 'issues')
+
+class BatchBeliefScorer:
+    """Score beliefs and archetypes for many repositories at once
+    
+    Each text source becomes a repos × keywords count matrix, and category
+    and archetype scores are matrix products with weight matrices built from
+    the extractor's pattern tables. Clamping, the star/fork boosts,
+    deduplication and top-5 ordering are array operations over the whole
+    batch. Results equal BeliefExtractor.extract_beliefs/extract_archetype
+    run on each repository.
+    """
+    
+    def __init__(self, extractor):
+        self.extractor = extractor
+        self.patterns = list(extractor.matcher.patterns)
+        self._index = index = {pattern: i for i, pattern in enumerate(self.patterns)}
+        
+        self.belief_categories = list(extractor.belief_patterns)
+        self.commit_categories = list(extractor.commit_patterns)
+        self.archetypes = list(extractor.archetype_patterns)
+        # Column layout of every per-category array
+        self.categories = self.belief_categories + self.commit_categories + ['community']
+        
+        patterns, beliefs = len(self.patterns), len(self.belief_categories)
+        self.keyword_weights = np.zeros((patterns, beliefs))
+        self.phrase_weights = np.zeros((patterns, beliefs))
+        self.keyword_mask = np.zeros((patterns, beliefs))
+        for j, category in enumerate(self.belief_categories):
+            for keyword in extractor.belief_patterns[category]['keywords']:
+                self.keyword_weights[index[keyword], j] += 0.5
+                self.keyword_mask[index[keyword], j] = 1
+            for phrase in extractor.belief_patterns[category]['phrases']:
+                self.phrase_weights[index[phrase], j] += 2
+        
+        self.commit_weights = np.zeros((patterns, len(self.commit_categories)))
+        for j, category in enumerate(self.commit_categories):
+            for keyword in extractor.commit_patterns[category]:
+                self.commit_weights[index[keyword], j] += 1
+        
+        self.archetype_weights = np.zeros((patterns, len(self.archetypes)))
+        for j, archetype in enumerate(self.archetypes):
+            for keyword in extractor.archetype_patterns[archetype]:
+                self.archetype_weights[index[keyword], j] += 1
+    
+    def count_matrix(self, texts: Iterable[str]) -> np.ndarray:
+        """Count every pattern in each (lowercased) text, one row per text"""
+        matcher = self.extractor.matcher
+        rows = [list(matcher.count(text).values()) for text in texts]
+        return np.array(rows, dtype=np.int64).reshape(len(rows), len(self.patterns))
+    
+    def _counts_row(self, counts: Dict[str, int]) -> List[int]:
+        return [counts.get(pattern, 0) for pattern in self.patterns]
+    
+    def source_counts(self, github_datas: List[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        """Build the per-source count matrices and repository metrics for a batch"""
+        extractor = self.extractor
+        texts = {'readme': [], 'description': [], 'topics': [], 'commits': []}
+        commit_counts: Dict[int, Dict[str, int]] = {}
+        issues = np.zeros(len(github_datas), dtype=bool)
+        stars = np.zeros(len(github_datas))
+        forks = np.zeros(len(github_datas))
+        failed = np.zeros(len(github_datas), dtype=bool)
+        
+        for i, github_data in enumerate(github_datas):
+            try:
+                repo_data = github_data.get('repository', {})
+                readme = (github_data.get('readme') or '').lower()
+                description = (repo_data.get('description') or '').lower()
+                topics = ' '.join(repo_data.get('topics', [])).lower()
+                if github_data.get('commit_counts') is not None:
+                    commit_counts[i] = github_data['commit_counts']
+                    commits = ''
+                else:
+                    commits = extractor._commit_text(github_data.get('commits', []))
+                issue_text = ' '.join([
+                    issue.get('title', '') + ' ' + issue.get('body', '')
+                    for issue in github_data.get('issues', [])
+                ]).lower()
+                issues[i] = 'help wanted' in issue_text or 'good first issue' in issue_text
+                stars[i] = repo_data.get('stars', 0)
+                forks[i] = repo_data.get('forks', 0)
+            except Exception as e:
+                logger.error(f"Error reading batch entry {i}: {e}")
+                failed[i] = True
+                readme = description = topics = commits = ''
+            texts['readme'].append(readme)
+            texts['description'].append(description)
+            texts['topics'].append(topics)
+            texts['commits'].append(commits)
+        
+        counts = {source: self.count_matrix(source_texts) for source, source_texts in texts.items()}
+        for i, row in commit_counts.items():
+            counts['commits'][i] = self._counts_row(row)
+        counts.update({'issues': issues, 'stars': stars, 'forks': forks, 'failed': failed})
+        return counts
+    
+    def score(self, counts: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Turn count matrices into per-category confidences and archetypes
+        
+        Returns arrays indexed by repository: 'confidence' (repos × categories,
+        NaN where no belief), 'source' (index into SOURCES of the winning
+        belief), 'order' (top-5 category columns, -1 padded), 'archetype'
+        (index into archetypes, -1 for the default) and
+        'archetype_confidence'.
+        """
+        readme, commits = counts['readme'], counts['commits']
+        description, topics = counts['description'], counts['topics']
+        rows = readme.shape[0]
+        beliefs, commit_columns = len(self.belief_categories), len(self.commit_categories)
+        columns = len(self.categories)
+        
+        by_source = np.full((len(SOURCES), rows, columns), np.nan)
+        readme_score = readme @ self.keyword_weights + (readme > 0) @ self.phrase_weights
+        by_source[0, :, :beliefs] = np.where(readme_score > 0, np.minimum(readme_score * 0.1, 0.95), np.nan)
+        commit_score = commits @ self.commit_weights
+        by_source[1, :, beliefs:beliefs + commit_columns] = np.where(
+            commit_score > 0, np.minimum(commit_score * 0.05, 0.8), np.nan)
+        by_source[2, :, :beliefs] = np.where((description > 0) @ self.keyword_mask > 0, 0.7, np.nan)
+        by_source[3, :, :beliefs] = np.where((topics > 0) @ self.keyword_mask > 0, 0.6, np.nan)
+        by_source[4, :, -1] = np.where(counts['issues'], 0.8, np.nan)
+        
+        # Deduplicate: keep the first highest-confidence belief per category
+        present = ~np.isnan(by_source)
+        filled = np.where(present, by_source, -np.inf)
+        source = filled.argmax(axis=0)
+        best = filled.max(axis=0)
+        found = present.any(axis=0) & ~counts['failed'][:, None]
+        
+        star_boost = np.minimum(counts['stars'] / 1000, 0.1)
+        fork_boost = np.minimum(counts['forks'] / 500, 0.05)
+        confidence = np.where(found, np.minimum(best + star_boost[:, None] + fork_boost[:, None], 0.95), np.nan)
+        
+        # Stable sort by confidence, ties in order of first appearance
+        first_seen = present.argmax(axis=0) * columns + np.arange(columns)
+        ranked = np.where(found, -confidence, np.inf)
+        order = np.lexsort((first_seen, ranked), axis=-1)[:, :5]
+        order = np.where(np.take_along_axis(found, order, axis=1), order, -1)
+        
+        totals = (readme + description + commits) @ self.archetype_weights
+        archetype = totals.argmax(axis=1)
+        top = totals.max(axis=1)
+        matched = (top > 0) & ~counts['failed']
+        
+        return {
+            'confidence': confidence,
+            'source': source,
+            'order': order,
+            'archetype': np.where(matched, archetype, -1),
+            'archetype_confidence': np.where(matched, np.minimum(top * 0.1, 0.95), 0.5)
+        }
+    
+    def _evidence(self, counts: Dict[str, np.ndarray], i: int, column: int) -> List[str]:
+        """Rebuild the merged evidence list the per-repo path produces"""
+        evidence = []
+        if column < len(self.belief_categories):
+            category = self.belief_categories[column]
+            patterns = self.extractor.belief_patterns[category]
+            readme = counts['readme'][i]
+            readme_evidence = []
+            for keyword in patterns['keywords']:
+                count = int(readme[self._index[keyword]])
+                if count > 0:
+                    readme_evidence.append(f"'{keyword}' mentioned {count} times")
+            for phrase in patterns['phrases']:
+                if readme[self._index[phrase]] > 0:
+                    readme_evidence.append(f"Contains phrase: '{phrase}'")
+            evidence.extend(readme_evidence)
+            keyword_columns = self.keyword_mask[:, column] > 0
+            if (counts['description'][i][keyword_columns] > 0).any():
+                evidence.append(f"Repository description indicates {category} focus")
+            if (counts['topics'][i][keyword_columns] > 0).any():
+                evidence.append(f"Repository topics suggest {category} focus")
+        elif column < len(self.belief_categories) + len(self.commit_categories):
+            evidence.append(f"Commit patterns suggest focus on {self.categories[column]}")
+        else:
+            evidence.append('Issues show welcoming attitude to new contributors')
+        return list(set(evidence))
+    
+    def _content(self, column: int) -> str:
+        category = self.categories[column]
+        if category in self.extractor.belief_patterns:
+            return self.extractor.belief_patterns[category]['belief_template']
+        if category in self.extractor.commit_beliefs:
+            return self.extractor.commit_beliefs[category]
+        return 'Community contribution and mentorship are valuable'
+    
+    def extract(self, github_datas: List[Dict[str, Any]],
+                counts: Optional[Dict[str, np.ndarray]] = None) -> List[Tuple[List[Dict[str, Any]], Dict[str, Any]]]:
+        """Return (beliefs, archetype) per repository, as the per-repo extractor would"""
+        counts = counts if counts is not None else self.source_counts(github_datas)
+        scores = self.score(counts)
+        
+        results = []
+        for i in range(len(github_datas)):
+            if counts['failed'][i]:
+                results.append((self.extractor._get_fallback_beliefs(), {'type': 'pragmatist', 'confidence': 0.5}))
+                continue
+            
+            beliefs = []
+            for column in scores['order'][i]:
+                if column < 0:
+                    break
+                beliefs.append({
+                    'category': self.categories[column],
+                    'content': self._content(column),
+                    'confidence': float(scores['confidence'][i, column]),
+                    'evidence': self._evidence(counts, i, column),
+                    'source': SOURCES[scores['source'][i, column]]
+                })
+            
+            archetype_index = scores['archetype'][i]
+            if archetype_index < 0:
+                archetype = {'type': 'pragmatist', 'confidence': 0.5}
+            else:
+                archetype_type = self.archetypes[archetype_index]
+                archetype = {
+                    'type': archetype_type,
+                    'confidence': float(scores['archetype_confidence'][i]),
+                    'description': self.extractor._get_archetype_description(archetype_type)
+                }
+            results.append((beliefs, archetype))
+        return results
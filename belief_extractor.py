@@ -1,14 +1,22 @@
+import os
 import re
+import hashlib
 import logging
-from typing import Dict, List, Any, Tuple
+from typing import Dict, List, Any, Tuple, Callable, Optional
 from collections import Counter
 import json
+import threading
+from keyword_matcher import KeywordMatcher, StreamingCounter
+from readme_stream import readme_settings
 
 logger = logging.getLogger(__name__)
 
 class BeliefExtractor:
     """Extract developer beliefs from GitHub repository data"""
     
+    # Bump when extraction logic changes in ways the pattern tables don't show
+    ALGORITHM_VERSION = 2
+    
     def __init__(self):
         # Pattern-based belief extraction rules
         self.belief_patterns = {
@@ -58,6 +66,44 @@ class BeliefExtractor:
             'pragmatist': ['practical', 'useful', 'working', 'production', 'real-world'],
             'perfectionist': ['perfect', 'precise', 'exact', 'correct', 'proper']
         }
+        
+        # Commit message patterns
+        self.commit_patterns = {
+            'refactoring': ['refactor', 'cleanup', 'improve', 'optimize', 'simplify'],
+            'testing': ['test', 'spec', 'coverage', 'fix test'],
+            'documentation': ['doc', 'readme', 'comment', 'document'],
+            'breaking_changes': ['breaking', 'major', 'rewrite', 'restructure']
+        }
+        self.commit_beliefs = {
+            'refactoring': 'Code quality improvement is an ongoing process',
+            'testing': 'Testing and verification are essential for reliability',
+            'documentation': 'Clear documentation improves code accessibility',
+            'breaking_changes': 'Bold changes are necessary for progress'
+        }
+        
+        # Compile every keyword and phrase into one matcher so each source
+        # text is scanned once, whichever scorers read its counts
+        patterns = set()
+        for category_patterns in self.belief_patterns.values():
+            patterns.update(category_patterns['keywords'])
+            patterns.update(category_patterns['phrases'])
+        for keywords in self.archetype_patterns.values():
+            patterns.update(keywords)
+        for keywords in self.commit_patterns.values():
+            patterns.update(keywords)
+        self.matcher = KeywordMatcher(patterns)
+        # Identifies what produced a result, for cache keys and ETags; the README
+        # cap and stripping change the text scanned, so they count too
+        rules = [self.ALGORITHM_VERSION, self.belief_patterns, self.archetype_patterns,
+                 self.commit_patterns, self.commit_beliefs, readme_settings()]
+        self.version = hashlib.sha256(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        # Long READMEs are lowercased and scanned this many characters at a time
+        self.chunk_chars = int(os.environ.get('README_CHUNK_CHARS', 65536))
+        
+        # extract_beliefs and extract_archetype read the same README and
+        # commits; remember the last few scans by source identity
+        self._scan_memo = []
+        self._scan_lock = threading.Lock()
     
     def extract_beliefs(self, github_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Extract beliefs from GitHub repository data"""
@@ -65,11 +111,12 @@ class BeliefExtractor:
             beliefs = []
             
             # Extract from README
-            readme_beliefs = self._extract_from_readme(github_data.get('readme', ''))
+            readme_beliefs = self._extract_from_readme(github_data.get('readme', ''), self._readme_counts(github_data))
             beliefs.extend(readme_beliefs)
             
             # Extract from commits
-            commit_beliefs = self._extract_from_commits(github_data.get('commits', []))
+            commit_beliefs = self._extract_from_commits(github_data.get('commits', []),
+                                                        github_data.get('commit_counts'))
             beliefs.extend(commit_beliefs)
             
             # Extract from repository metadata
@@ -77,7 +124,7 @@ class BeliefExtractor:
             beliefs.extend(meta_beliefs)
             
             # Extract from issues
-            issue_beliefs = self._extract_from_issues(github_data.get('issues', []))
+            issue_beliefs = self._extract_from_issues(github_data.get('issues', []), self._issue_flags(github_data))
             beliefs.extend(issue_beliefs)
             
             # Deduplicate and score
@@ -92,13 +139,73 @@ class BeliefExtractor:
             logger.error(f"Error extracting beliefs: {e}")
             return self._get_fallback_beliefs()
     
-    def _extract_from_readme(self, readme: str) -> List[Dict[str, Any]]:
-        """Extract beliefs from README content"""
+    def extract_readme_beliefs(self, readme: str) -> List[Dict[str, Any]]:
+        """README-only beliefs, for streaming before the other inputs arrive"""
+        try:
+            return self._extract_from_readme(readme)
+        except Exception as e:
+            logger.error(f"Error extracting README beliefs: {e}")
+            return []
+    
+    def aggregates(self, github_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Keyword aggregates of the README and issues, to store beside the inputs
+        
+        extract_beliefs and archetype_scores read these instead of rescanning
+        while they carry this extractor's version; WebhookProcessor keeps them
+        current as deliveries change the README or an issue.
+        """
+        readme = github_data.get('readme') or ''
+        counts = self._scan(readme, lambda: self._count_chunked(readme))
+        return {
+            'version': self.version,
+            'readme': {pattern: count for pattern, count in counts.items() if count},
+            'issues': {str(issue['number']): self.welcomes_contributors(issue)
+                       for issue in github_data.get('issues', []) if 'number' in issue}
+        }
+    
+    def readme_counts(self, readme: str) -> Dict[str, int]:
+        """Nonzero pattern counts of a README, as stored in aggregates"""
+        return {pattern: count for pattern, count in self._count_chunked(readme or '').items() if count}
+    
+    @staticmethod
+    def welcomes_contributors(issue: Dict[str, Any]) -> bool:
+        """Whether an issue invites newcomers, as stored per issue in aggregates"""
+        text = f"{issue.get('title', '')} {issue.get('body') or ''}".lower()
+        return 'help wanted' in text or 'good first issue' in text
+    
+    def _current_aggregates(self, github_data: Dict[str, Any]) -> Dict[str, Any]:
+        aggregates = github_data.get('aggregates') or {}
+        return aggregates if aggregates.get('version') == self.version else {}
+    
+    def _readme_counts(self, github_data: Dict[str, Any]) -> Dict[str, int]:
+        """Pattern counts of the README, from stored aggregates when current"""
+        stored = self._current_aggregates(github_data).get('readme')
+        if stored is not None:
+            counts = dict.fromkeys(self.matcher.patterns, 0)
+            counts.update(stored)
+            return counts
+        readme = github_data.get('readme') or ''
+        return self._scan(readme, lambda: self._count_chunked(readme))
+    
+    def _issue_flags(self, github_data: Dict[str, Any]) -> Optional[Dict[str, bool]]:
+        return self._current_aggregates(github_data).get('issues')
+    
+    def category_keywords(self) -> Dict[str, List[str]]:
+        """Keywords and phrases that signal each category in a single text"""
+        keywords = {category: patterns['keywords'] + patterns['phrases']
+                    for category, patterns in self.belief_patterns.items()}
+        keywords.update(self.commit_patterns)
+        return keywords
+    
+    def _extract_from_readme(self, readme: str,
+                             counts: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """Extract beliefs from README content, or from its stored counts when given"""
         beliefs = []
         if not readme:
             return beliefs
         
-        readme_lower = readme.lower()
+        if counts is None:
+            counts = self._scan(readme, lambda: self._count_chunked(readme))
         
         for category, patterns in self.belief_patterns.items():
             score = 0
@@ -106,14 +213,14 @@ class BeliefExtractor:
             
             # Check keywords
             for keyword in patterns['keywords']:
-                count = readme_lower.count(keyword)
+                count = counts[keyword]
                 if count > 0:
                     score += count * 0.5
                     evidence.append(f"'{keyword}' mentioned {count} times")
             
             # Check phrases
             for phrase in patterns['phrases']:
-                if phrase in readme_lower:
+                if counts[phrase] > 0:
                     score += 2
                     evidence.append(f"Contains phrase: '{phrase}'")
             
@@ -128,36 +235,24 @@ class BeliefExtractor:
         
         return beliefs
     
-    def _extract_from_commits(self, commits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Extract beliefs from commit messages"""
+    def _extract_from_commits(self, commits: List[Dict[str, Any]],
+                              counts: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """Extract beliefs from commit messages, or from deep-history counts when given"""
         beliefs = []
-        if not commits:
+        if not commits and counts is None:
             return beliefs
         
         # Analyze commit message patterns
-        commit_text = ' '.join([commit.get('message', '') for commit in commits]).lower()
+        if counts is None:
+            counts = self._scan(commits, lambda: self.matcher.count(self._commit_text(commits)))
         
         # Look for specific patterns in commit messages
-        patterns = {
-            'refactoring': ['refactor', 'cleanup', 'improve', 'optimize', 'simplify'],
-            'testing': ['test', 'spec', 'coverage', 'fix test'],
-            'documentation': ['doc', 'readme', 'comment', 'document'],
-            'breaking_changes': ['breaking', 'major', 'rewrite', 'restructure']
-        }
-        
-        for pattern_name, keywords in patterns.items():
-            score = sum(commit_text.count(keyword) for keyword in keywords)
+        for pattern_name, keywords in self.commit_patterns.items():
+            score = sum(counts[keyword] for keyword in keywords)
             if score > 0:
-                belief_map = {
-                    'refactoring': 'Code quality improvement is an ongoing process',
-                    'testing': 'Testing and verification are essential for reliability',
-                    'documentation': 'Clear documentation improves code accessibility',
-                    'breaking_changes': 'Bold changes are necessary for progress'
-                }
-                
                 beliefs.append({
                     'category': pattern_name,
-                    'content': belief_map[pattern_name],
+                    'content': self.commit_beliefs[pattern_name],
                     'confidence': min(score * 0.05, 0.8),
                     'evidence': [f"Commit patterns suggest focus on {pattern_name}"],
                     'source': 'commits'
@@ -165,12 +260,47 @@ class BeliefExtractor:
         
         return beliefs
     
+    def _commit_text(self, commits: List[Dict[str, Any]]) -> str:
+        """Join commit messages into one lowercased text"""
+        return ' '.join([commit.get('message', '') for commit in commits]).lower()
+    
+    def _count_chunked(self, text: str) -> Dict[str, int]:
+        """Count patterns a chunk at a time, lowercasing one chunk at a time
+        
+        Chunks end on a newline, which no pattern contains, so the totals
+        equal counting the whole lowercased text.
+        """
+        if len(text) <= self.chunk_chars:
+            return self.matcher.count(text.lower())
+        counter = StreamingCounter(self.matcher)
+        start = 0
+        while start < len(text):
+            end = text.find('\n', start + self.chunk_chars)
+            end = len(text) if end < 0 else end + 1
+            counter.feed(text[start:end].lower())
+            start = end
+        return counter.counts
+    
+    def _scan(self, source: Any, count: Callable[[], Dict[str, int]]) -> Dict[str, int]:
+        """Count all patterns in a source, reusing a recent scan of the same object"""
+        with self._scan_lock:
+            for scanned, counts in self._scan_memo:
+                if scanned is source:
+                    return counts
+        
+        counts = count()
+        with self._scan_lock:
+            # Holding a reference keeps id-based identity checks sound
+            self._scan_memo.append((source, counts))
+            del self._scan_memo[:-4]
+        return counts
+    
     def _extract_from_metadata(self, repo_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Extract beliefs from repository metadata"""
         beliefs = []
         
         # Analyze repository description
-        description = repo_data.get('description', '').lower()
+        description = (repo_data.get('description') or '').lower()
         if description:
             for category, patterns in self.belief_patterns.items():
                 if any(keyword in description for keyword in patterns['keywords']):
@@ -198,20 +328,19 @@ class BeliefExtractor:
         
         return beliefs
     
-    def _extract_from_issues(self, issues: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Extract beliefs from issue discussions"""
+    def _extract_from_issues(self, issues: List[Dict[str, Any]],
+                             flags: Optional[Dict[str, bool]] = None) -> List[Dict[str, Any]]:
+        """Extract beliefs from issue discussions, or from stored per-issue flags when given"""
         beliefs = []
         if not issues:
             return beliefs
         
-        # Analyze issue titles and bodies
-        issue_text = ' '.join([
-            issue.get('title', '') + ' ' + issue.get('body', '')
-            for issue in issues
-        ]).lower()
-        
-        # Look for community engagement patterns
-        if 'help wanted' in issue_text or 'good first issue' in issue_text:
+        # Look for community engagement patterns in issue titles and bodies
+        if flags is None:
+            welcoming = any(self.welcomes_contributors(issue) for issue in issues)
+        else:
+            welcoming = any(flags.values())
+        if welcoming:
             beliefs.append({
                 'category': 'community',
                 'content': 'Community contribution and mentorship are valuable',
@@ -275,22 +404,30 @@ class BeliefExtractor:
             }
         ]
     
+    def archetype_scores(self, github_data: Dict[str, Any]) -> Dict[str, int]:
+        """Keyword hits per archetype, for archetypes with any"""
+        # Analyze all text content. Archetype keywords contain no spaces,
+        # so counting each source separately equals counting them joined.
+        description = github_data.get('repository', {}).get('description') or ''
+        commits = github_data.get('commits', [])
+        sources = [
+            self._readme_counts(github_data),
+            self.matcher.count(description.lower()),
+            github_data.get('commit_counts') or self._scan(commits, lambda: self.matcher.count(self._commit_text(commits)))
+        ]
+        
+        # Score each archetype
+        archetype_scores = {}
+        for archetype, keywords in self.archetype_patterns.items():
+            score = sum(counts[keyword] for counts in sources for keyword in keywords)
+            if score > 0:
+                archetype_scores[archetype] = score
+        return archetype_scores
+    
     def extract_archetype(self, github_data: Dict[str, Any]) -> Dict[str, Any]:
         """Extract developer archetype from GitHub data"""
         try:
-            # Analyze all text content
-            all_text = (
-                github_data.get('readme', '') + ' ' +
-                github_data.get('repository', {}).get('description', '') + ' ' +
-                ' '.join([commit.get('message', '') for commit in github_data.get('commits', [])])
-            ).lower()
-            
-            # Score each archetype
-            archetype_scores = {}
-            for archetype, keywords in self.archetype_patterns.items():
-                score = sum(all_text.count(keyword) for keyword in keywords)
-                if score > 0:
-                    archetype_scores[archetype] = score
+            archetype_scores = self.archetype_scores(github_data)
             
             if not archetype_scores:
                 return {'type': 'pragmatist', 'confidence': 0.5}
@@ -309,6 +446,23 @@ class BeliefExtractor:
             logger.error(f"Error extracting archetype: {e}")
             return {'type': 'pragmatist', 'confidence': 0.5}
     
+    def profile_dimensions(self) -> List[str]:
+        """Names of the profile_vector components, in order"""
+        categories = list(self.belief_patterns) + list(self.commit_patterns) + ['community']
+        return ([f'belief:{category}' for category in categories] +
+                [f'archetype:{archetype}' for archetype in self.archetype_patterns])
+    
+    def profile_vector(self, beliefs: List[Dict[str, Any]], archetype_scores: Dict[str, int]) -> List[float]:
+        """Fixed-length summary of an analysis for similarity search
+        
+        Each belief category's confidence, then each archetype's score on
+        the same 0-0.95 scale extract_archetype uses for its confidence.
+        """
+        confidences = {f"belief:{belief['category']}": belief['confidence'] for belief in beliefs}
+        for archetype, score in archetype_scores.items():
+            confidences[f'archetype:{archetype}'] = min(score * 0.1, 0.95)
+        return [float(confidences.get(dimension, 0.0)) for dimension in self.profile_dimensions()]
+    
     def _get_archetype_description(self, archetype: str) -> str:
         """Get description for developer archetype"""
         descriptions = {
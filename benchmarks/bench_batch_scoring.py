@@ -0,0 +1,97 @@
+"""Benchmark vectorized batch belief scoring against the per-repo extractor
+
+Usage: python benchmarks/bench_batch_scoring.py [--repos 2000] [--score-repos 100000]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from typing import Dict, List, Any
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from belief_extractor import BeliefExtractor
+from batch_scoring import BatchBeliefScorer
+
+FILLER = ['the', 'code', 'data', 'module', 'function', 'value', 'server', 'client', 'build', 'run']
+
+def synthetic_repositories(count: int, extractor: BeliefExtractor, seed: int = 0) -> List[Dict[str, Any]]:
+    """Small repositories with a random sprinkling of every kind of pattern"""
+    rng = random.Random(seed)
+    patterns = extractor.matcher.patterns
+    
+    def text(words: int, density: float) -> str:
+        return ' '.join(rng.choice(patterns) if rng.random() < density else rng.choice(FILLER)
+                        for _ in range(words))
+    
+    repositories = []
+    for _ in range(count):
+        issues = [{'title': text(5, 0.2), 'body': rng.choice(['', 'help wanted', 'good first issue', text(10, 0.1)])}
+                  for _ in range(rng.randint(0, 3))]
+        repositories.append({
+            'repository': {
+                'description': rng.choice([None, '', text(8, 0.3)]),
+                'topics': [rng.choice(patterns + FILLER) for _ in range(rng.randint(0, 4))],
+                'stars': rng.choice([0, 5, 80, 999, 25000]),
+                'forks': rng.choice([0, 3, 120, 4000])
+            },
+            'readme': rng.choice(['', text(rng.randint(20, 400), rng.random() * 0.2)]),
+            'commits': [{'message': text(rng.randint(2, 10), 0.15)} for _ in range(rng.randint(0, 30))],
+            'issues': issues,
+            'user': {}
+        })
+    return repositories
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repos', type=int, default=2000, help='repositories checked end to end')
+    parser.add_argument('--score-repos', type=int, default=100000, help='rows in the scoring-only run')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    extractor = BeliefExtractor()
+    scorer = BatchBeliefScorer(extractor)
+    repositories = synthetic_repositories(args.repos, extractor)
+    
+    start = time.perf_counter()
+    expected = []
+    for github_data in repositories:
+        extractor._scan_memo.clear()
+        expected.append((extractor.extract_beliefs(github_data), extractor.extract_archetype(github_data)))
+    per_repo_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    counts = scorer.source_counts(repositories)
+    count_time = time.perf_counter() - start
+    start = time.perf_counter()
+    actual = scorer.extract(repositories, counts)
+    extract_time = time.perf_counter() - start
+    
+    # Scoring alone, on a batch tiled up from the synthetic count matrices
+    tiles = -(-args.score_repos // args.repos)
+    big = {key: np.concatenate([value] * tiles)[:args.score_repos] for key, value in counts.items()}
+    score_time = float('inf')
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        scorer.score(big)
+        score_time = min(score_time, time.perf_counter() - start)
+    
+    print(f"{args.repos} repositories end to end")
+    print(f"  per-repo extractor:  {per_repo_time * 1000:8.1f} ms")
+    print(f"  batch count matrix:  {count_time * 1000:8.1f} ms")
+    print(f"  batch score+build:   {extract_time * 1000:8.1f} ms")
+    print(f"{args.score_repos} repositories scored from count matrices")
+    print(f"  vectorized score:    {score_time * 1000:8.1f} ms "
+          f"({args.score_repos / score_time:,.0f} repos/s)")
+    
+    mismatches = [i for i, (want, got) in enumerate(zip(expected, actual)) if want != got]
+    if mismatches:
+        print(f"MISMATCH on {len(mismatches)} repositories, first at index {mismatches[0]}")
+        sys.exit(1)
+    print("  results identical")
+
+if __name__ == '__main__':
+    main()
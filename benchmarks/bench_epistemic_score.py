@@ -0,0 +1,72 @@
+"""Benchmark calculate_epistemic_score over synthetic commit histories
+
+Usage: python benchmarks/bench_epistemic_score.py [--commits 1000 10000 50000] [--repeat 20]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from belief_extractor import BeliefExtractor
+from epistemic_client import EpistemicClient
+
+FILLER = ['fix', 'update', 'bump', 'merge', 'branch', 'typo', 'handler', 'config', 'build', 'lint']
+
+def synthetic_history(commit_count: int, extractor: BeliefExtractor, seed: int = 0) -> List[Dict[str, Any]]:
+    """Commits spread over a few years, newest first like the GitHub API returns them"""
+    rng = random.Random(seed)
+    keywords = [keyword for words in extractor.category_keywords().values() for keyword in words]
+    start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+    span = timedelta(days=4 * 365).total_seconds()
+    
+    commits = []
+    for i in range(commit_count):
+        words = [rng.choice(keywords) if rng.random() < 0.1 else rng.choice(FILLER)
+                 for _ in range(rng.randint(3, 12))]
+        # Activity ramps up over time
+        offset = span * rng.random() ** 0.7
+        commits.append({
+            'sha': f'{i:07x}',
+            'message': ' '.join(words).capitalize(),
+            'author': 'dev',
+            'date': (start + timedelta(seconds=offset)).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            'url': ''
+        })
+    commits.sort(key=lambda commit: commit['date'], reverse=True)
+    return commits
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--commits', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    extractor = BeliefExtractor()
+    client = EpistemicClient(category_keywords=extractor.category_keywords())
+    beliefs = [{'category': category} for category in ('quality', 'minimalist', 'testing', 'refactoring')]
+    repository = {'stars': 1200, 'forks': 150}
+    user = {'followers': 300}
+    
+    for commit_count in args.commits:
+        actions = synthetic_history(commit_count, extractor)
+        # First scoring of a list does the per-commit work; later ones reuse it
+        for label, inputs in (('first', lambda: list(actions)), ('repeat', lambda: actions)):
+            timings = []
+            for _ in range(args.repeat):
+                commits = inputs()
+                start = time.perf_counter()
+                score = client.calculate_epistemic_score(beliefs, commits, repository, user)
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            print(f"{commit_count:>7} commits, {label:<6}: median {timings[len(timings) // 2] * 1000:7.2f} ms, "
+                  f"best {timings[0] * 1000:7.2f} ms  "
+                  f"(consistency {score['consistency_score']}, growth {score['growth_score']}, "
+                  f"impact {score['impact_score']})")
+
+if __name__ == '__main__':
+    main()
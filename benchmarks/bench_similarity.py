@@ -0,0 +1,75 @@
+"""Benchmark profile similarity search
+
+Usage:
+    python benchmarks/bench_similarity.py [--profiles 1000000] [--queries 50]
+
+Fills a temporary ProfileIndex with random sparse belief profiles and
+times top-10 queries with exact scoring and, above the approximate
+threshold, with the cluster index, reporting its recall against exact.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from belief_extractor import BeliefExtractor
+from profile_index import ProfileIndex
+
+def random_profiles(count: int, width: int, rng: np.random.Generator) -> np.ndarray:
+    # Real profiles have a handful of non-zero categories
+    values = rng.uniform(0.3, 0.95, size=(count, width)).astype(np.float32)
+    values[rng.random((count, width)) > 0.3] = 0
+    return values
+
+def time_queries(index: ProfileIndex, names, k: int):
+    timings, results = [], []
+    for username, repo in names:
+        start = time.perf_counter()
+        results.append(index.similar(username, repo, k))
+        timings.append(time.perf_counter() - start)
+    return timings, results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profiles', type=int, default=1_000_000)
+    parser.add_argument('--queries', type=int, default=50)
+    parser.add_argument('-k', type=int, default=10)
+    args = parser.parse_args()
+    
+    dimensions = BeliefExtractor().profile_dimensions()
+    rng = np.random.default_rng(0)
+    index = ProfileIndex(dimensions, directory=tempfile.mkdtemp(prefix='profiles-bench-'),
+                         approximate_rows=args.profiles + 1)
+    
+    start = time.perf_counter()
+    batch = 100_000
+    for offset in range(0, args.profiles, batch):
+        vectors = random_profiles(min(batch, args.profiles - offset), len(dimensions), rng)
+        index.add_many((f'user{offset + i}', f'repo{offset + i}', vector, None) for i, vector in enumerate(vectors))
+    print(f"Indexed {args.profiles} profiles x {len(dimensions)} dimensions "
+          f"in {time.perf_counter() - start:.1f}s")
+    
+    names = [(f'user{i}', f'repo{i}') for i in rng.choice(args.profiles, args.queries, replace=False)]
+    exact_timings, exact = time_queries(index, names, args.k)
+    print(f"exact        median {statistics.median(exact_timings) * 1000:8.2f} ms  "
+          f"max {max(exact_timings) * 1000:8.2f} ms")
+    
+    index.approximate_rows = 1
+    start = time.perf_counter()
+    index._build_clusters(index.count())
+    print(f"Built cluster index in {time.perf_counter() - start:.1f}s")
+    approximate_timings, approximate = time_queries(index, names, args.k)
+    recall = statistics.fmean(
+        len({(r['username'], r['repo']) for r in a} & {(r['username'], r['repo']) for r in e}) / max(len(e), 1)
+        for a, e in zip(approximate, exact))
+    print(f"approximate  median {statistics.median(approximate_timings) * 1000:8.2f} ms  "
+          f"max {max(approximate_timings) * 1000:8.2f} ms  recall@{args.k} {recall:.2f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+"""Offline benchmark suite replaying recorded GitHub responses
+
+Usage:
+    python benchmarks/bench_suite.py [--output results.json] [--compare baseline.json]
+                                     [--fixtures small typical] [--repeat 5]
+
+Times each analysis stage and the full /api/analyze request (through the
+Flask test client) on every fixture, without network access. Results are
+written as JSON; --compare prints the change against an earlier run.
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import subprocess
+import statistics
+from datetime import datetime
+from typing import Dict, List, Any, Callable
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# Keep the app's caches and queues out of the working tree, and its logs quiet
+os.environ.setdefault('DATA_DIR', tempfile.mkdtemp(prefix='contextbuilder-bench-'))
+os.environ.setdefault('GITHUB_HTTP_CACHE', 'False')
+
+import logging
+logging.disable(logging.INFO)
+
+import app as webapp
+from github_fixtures import load_fixtures, ReplayAdapter
+
+REPLAY_URL = 'https://github-replay.invalid'
+
+def measure(fn: Callable[[], Any], repeat: int, setup: Callable[[], None] = lambda: None) -> Dict[str, float]:
+    """Run fn once to warm up, then repeat times; setup runs untimed before each call"""
+    setup()
+    fn()
+    timings = []
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        'runs': repeat,
+        'min': timings[0],
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'p95': timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    }
+
+def run_fixture(fixture: Dict[str, Any], client, repeat: int) -> List[Dict[str, Any]]:
+    owner, repo = fixture['owner'], fixture['repo']
+    extractor = webapp.belief_extractor
+    github_data = webapp.github_client.get_repository_data(owner, repo)
+    beliefs = extractor.extract_beliefs(github_data)
+    
+    def cold():
+        # Time real scans, not the extractor's per-object memo
+        extractor._scan_memo.clear()
+    
+    def api_request():
+        response = client.get(f'/api/analyze/{owner}/{repo}')
+        if response.status_code != 200:
+            raise RuntimeError(f"/api/analyze/{owner}/{repo} returned {response.status_code}")
+    
+    benchmarks = {
+        'extract_beliefs': (lambda: extractor.extract_beliefs(github_data), cold),
+        'extract_archetype': (lambda: extractor.extract_archetype(github_data), cold),
+        'generate_predictions': (lambda: webapp.generate_predictions(beliefs, github_data), lambda: None),
+        'calculate_epistemic_score': (lambda: webapp.epistemic_client.calculate_epistemic_score(
+            beliefs, github_data['commits'], github_data['repository'], github_data['user']), lambda: None),
+        # The replay hands out a new HEAD sha per lookup, so every request misses the cache
+        'api_analyze_repo': (api_request, lambda: None)
+    }
+    
+    results = []
+    for name, (fn, setup) in benchmarks.items():
+        timing = measure(fn, repeat, setup)
+        results.append({'fixture': fixture['name'], 'benchmark': name, **timing})
+        print(f"  {fixture['name']:<14} {name:<26} median {timing['median'] * 1000:10.3f} ms  "
+              f"min {timing['min'] * 1000:10.3f} ms")
+    return results
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', '-C', ROOT, 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+def compare(results: List[Dict[str, Any]], baseline_path: str):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    previous = {(entry['fixture'], entry['benchmark']): entry for entry in baseline['results']}
+    print(f"\nCompared with {baseline.get('revision', '?')} (median, lower is better):")
+    for entry in results:
+        before = previous.get((entry['fixture'], entry['benchmark']))
+        if before is None:
+            continue
+        change = entry['median'] / before['median'] - 1
+        print(f"  {entry['fixture']:<14} {entry['benchmark']:<26} "
+              f"{before['median'] * 1000:10.3f} -> {entry['median'] * 1000:10.3f} ms  {change:+7.1%}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', nargs='+', help='fixture names to run (default: all)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    args = parser.parse_args()
+    
+    fixtures = load_fixtures(args.fixtures)
+    if not fixtures:
+        parser.error('no matching fixtures')
+    
+    webapp.github_client.base_url = REPLAY_URL
+    webapp.github_client.session.mount(REPLAY_URL, ReplayAdapter(fixtures, fresh_head=True))
+    client = webapp.app.test_client()
+    
+    results = []
+    for fixture in fixtures:
+        results.extend(run_fixture(fixture, client, args.repeat))
+    
+    report = {
+        'revision': git_revision(),
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+    
+    if args.compare:
+        compare(results, args.compare)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+"""Local fake GitHub API for load tests
+
+Usage:
+    python benchmarks/fake_github.py [--port 9100] [--latency-ms 80] [--jitter-ms 20]
+                                     [--error-rate 0.01] [--rate-limit 5000] [--fresh-head]
+
+Answers the REST endpoints GitHubClient calls, and the GraphQL repository
+query, for any owner/repo by re-keying one fixture from github_fixtures.
+Latency, error rate and the X-RateLimit budget are configurable, ETags are
+honoured with 304s like the real API, and /_stats reports request counts.
+"""
+import os
+import sys
+import json
+import time
+import base64
+import random
+import hashlib
+import argparse
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Any, Tuple
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from github_fixtures import load_fixtures, RAW
+
+class FakeGitHub:
+    """Fixture-backed GitHub API with injected latency, errors and quota
+    
+    The rate limit is a fixed window: every response carries X-RateLimit-*
+    headers, and once the budget is spent requests get 403 until the window
+    resets. 304 revalidations don't consume quota, as on GitHub.
+    """
+    
+    def __init__(self, fixture: str = 'typical', latency_ms: float = 0, jitter_ms: float = 0,
+                 error_rate: float = 0, rate_limit: int = 5000, reset_seconds: float = 3600,
+                 fresh_head: bool = False, seed: Optional[int] = None, readme_path: str = 'README.md'):
+        fixtures = load_fixtures([fixture])
+        if not fixtures:
+            raise ValueError(f"Unknown fixture {fixture}")
+        self.fixture = fixtures[0]
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.reset_seconds = reset_seconds
+        self.fresh_head = fresh_head
+        # Only REST /readme finds a README under a name the GraphQL query doesn't try
+        self.readme_path = readme_path
+        self.random = random.Random(seed)
+        
+        base = f"/repos/{self.fixture['owner']}/{self.fixture['repo']}"
+        responses = self.fixture['responses']
+        # Encode once; only the repository and user bodies are re-keyed per request
+        self._suffixes = {path[len(base):]: entry for path, entry in responses.items() if path.startswith(base)}
+        self._encoded = {suffix: json.dumps(entry['body']).encode('utf-8')
+                         for suffix, entry in self._suffixes.items() if 'body' in entry and suffix}
+        readme = self._suffixes.get('/readme', {}).get('body')
+        self._readme = base64.b64decode(readme['content']) if readme else b''
+        self._user = next((entry['body'] for path, entry in responses.items() if path.startswith('/users/')), None)
+        
+        self.stats: Counter = Counter()
+        self._heads = 0
+        self._window_start = time.time()
+        self._remaining = rate_limit
+        self._lock = threading.Lock()
+    
+    def _take_quota(self, consume: bool) -> Tuple[bool, Dict[str, str]]:
+        with self._lock:
+            now = time.time()
+            if now - self._window_start >= self.reset_seconds:
+                self._window_start = now
+                self._remaining = self.rate_limit
+            allowed = self._remaining > 0
+            if allowed and consume:
+                self._remaining -= 1
+            headers = {
+                'X-RateLimit-Limit': str(self.rate_limit),
+                'X-RateLimit-Remaining': str(self._remaining),
+                'X-RateLimit-Reset': str(int(self._window_start + self.reset_seconds)),
+            }
+            return allowed, headers
+    
+    def _head_sha(self, owner: str, repo: str) -> str:
+        if self.fresh_head:
+            with self._lock:
+                self._heads += 1
+                count = self._heads
+            return f'{count:040x}'
+        return hashlib.sha1(f'{owner}/{repo}'.encode('utf-8')).hexdigest()
+    
+    def _repository(self, owner: str, repo: str) -> Dict[str, Any]:
+        body = dict(self._suffixes['']['body'])
+        body.update({'name': repo, 'full_name': f'{owner}/{repo}',
+                     'owner': {**body['owner'], 'login': owner}})
+        return body
+    
+    def _owner(self, owner: str) -> Optional[Dict[str, Any]]:
+        return {**self._user, 'login': owner} if self._user else None
+    
+    def rest(self, path: str, accept: str = '') -> Tuple[int, bytes, str]:
+        """Status, body and content type for a GET path"""
+        parts = path.strip('/').split('/')
+        if len(parts) == 2 and parts[0] == 'users':
+            user = self._owner(parts[1])
+            if user:
+                return 200, json.dumps(user).encode('utf-8'), 'application/json'
+        elif len(parts) >= 3 and parts[0] == 'repos':
+            owner, repo = parts[1], parts[2]
+            suffix = path[len(f'/repos/{owner}/{repo}'):]
+            if suffix == '':
+                return 200, json.dumps(self._repository(owner, repo)).encode('utf-8'), 'application/json'
+            if suffix == '/commits/HEAD':
+                return 200, self._head_sha(owner, repo).encode('ascii'), 'application/vnd.github.sha'
+            if suffix == '/readme' and accept == RAW and suffix in self._suffixes:
+                return 200, self._readme, RAW
+            if suffix in self._encoded:
+                return 200, self._encoded[suffix], 'application/json'
+        return 404, b'{"message": "Not Found"}', 'application/json'
+    
+    def graphql(self, variables: Dict[str, Any]) -> bytes:
+        """Answer REPOSITORY_QUERY from the REST fixture"""
+        owner, repo = variables.get('owner', ''), variables.get('name', '')
+        repository = self._repository(owner, repo)
+        commits = self._suffixes.get('/commits', {}).get('body', [])[:variables.get('commits', 50)]
+        issues = self._suffixes.get('/issues', {}).get('body', [])[:variables.get('issues', 20)]
+        readme = self._readme.decode('utf-8') if '/readme' in self._suffixes else None
+        user = self._owner(owner)
+        aliases = {'README.md': 'readmeMd', 'readme.md': 'readmeLower', 'README.rst': 'readmeRst', 'README': 'readmePlain'}
+        blobs = {alias: None for alias in aliases.values()}
+        if readme is not None and self.readme_path in aliases:
+            blobs[aliases[self.readme_path]] = {'text': readme}
+        
+        data = {
+            'repository': {
+                'name': repository['name'],
+                'nameWithOwner': repository['full_name'],
+                'description': repository.get('description'),
+                'primaryLanguage': {'name': repository['language']} if repository.get('language') else None,
+                'repositoryTopics': {'nodes': [{'topic': {'name': t}} for t in repository.get('topics', [])]},
+                'stargazerCount': repository['stargazers_count'],
+                'forkCount': repository['forks_count'],
+                'createdAt': repository['created_at'],
+                'updatedAt': repository['updated_at'],
+                'owner': {'login': owner, '__typename': repository['owner']['type']},
+                **blobs,
+                'defaultBranchRef': {'target': {'oid': self._head_sha(owner, repo), 'history': {'nodes': [{
+                    'oid': commit['sha'],
+                    'message': commit['commit']['message'],
+                    'url': commit['html_url'],
+                    'author': commit['commit']['author']
+                } for commit in commits]}}},
+                'issues': {'nodes': [{
+                    'number': issue['number'],
+                    'title': issue['title'],
+                    'body': issue.get('body') or '',
+                    'state': issue['state'].upper(),
+                    'createdAt': issue['created_at'],
+                    'comments': {'totalCount': issue['comments']},
+                    'labels': {'nodes': [{'name': label['name']} for label in issue.get('labels', [])]}
+                } for issue in issues]}
+            },
+            'repositoryOwner': user and {
+                'login': owner,
+                'name': user.get('name'),
+                'bio': user.get('bio'),
+                'company': user.get('company'),
+                'location': user.get('location'),
+                'email': user.get('email'),
+                'createdAt': user.get('created_at'),
+                'repositories': {'totalCount': user.get('public_repos', 0)},
+                'followers': {'totalCount': user.get('followers', 0)},
+                'following': {'totalCount': user.get('following', 0)}
+            }
+        }
+        return json.dumps({'data': data}).encode('utf-8')
+    
+    def make_handler(self):
+        fake = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def log_message(self, format, *args):
+                pass
+            
+            def _send(self, status: int, body: bytes, content_type: str, headers: Dict[str, str]):
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def _serve(self, endpoint: str, produce):
+                if fake.latency or fake.jitter:
+                    time.sleep(max(0.0, fake.random.gauss(fake.latency, fake.jitter)))
+                
+                if fake.error_rate and fake.random.random() < fake.error_rate:
+                    fake.stats[f'{endpoint} 502'] += 1
+                    return self._send(502, b'{"message": "Server Error"}', 'application/json', {})
+                
+                status, body, content_type = produce()
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                not_modified = status == 200 and self.headers.get('If-None-Match') == etag
+                allowed, headers = fake._take_quota(consume=not not_modified)
+                if endpoint == 'graphql':
+                    headers['X-RateLimit-Resource'] = 'graphql'
+                if not allowed:
+                    fake.stats[f'{endpoint} 403'] += 1
+                    message = b'{"message": "API rate limit exceeded"}'
+                    return self._send(403, message, 'application/json', headers)
+                
+                if not_modified:
+                    status, body = 304, b''
+                elif status == 200:
+                    headers['ETag'] = etag
+                fake.stats[f'{endpoint} {status}'] += 1
+                self._send(status, body, content_type, headers)
+            
+            def do_GET(self):
+                path = urlsplit(self.path).path
+                if path == '/_stats':
+                    body = json.dumps(dict(fake.stats)).encode('utf-8')
+                    return self._send(200, body, 'application/json', {})
+                parts = path.strip('/').split('/')
+                endpoint = '/'.join(['repos'] + parts[3:]) if parts[0] == 'repos' else parts[0]
+                self._serve(endpoint, lambda: fake.rest(path, self.headers.get('Accept', '')))
+            
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                if urlsplit(self.path).path != '/graphql':
+                    return self._send(404, b'{"message": "Not Found"}', 'application/json', {})
+                self._serve('graphql', lambda: (200, fake.graphql(payload.get('variables') or {}),
+                                                'application/json'))
+        
+        return Handler
+    
+    def serve(self, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+        """Start serving on a daemon thread; port 0 picks a free port"""
+        server = ThreadingHTTPServer((host, port), self.make_handler())
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name='fake-github', daemon=True).start()
+        return server
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--fixture', default='typical', help='fixture served for every repository')
+    parser.add_argument('--latency-ms', type=float, default=50, help='mean response latency')
+    parser.add_argument('--jitter-ms', type=float, default=10, help='latency standard deviation')
+    parser.add_argument('--error-rate', type=float, default=0, help='fraction of requests answered 502')
+    parser.add_argument('--rate-limit', type=int, default=5000, help='requests per rate-limit window')
+    parser.add_argument('--reset-seconds', type=float, default=3600, help='rate-limit window length')
+    parser.add_argument('--fresh-head', action='store_true', help='new HEAD sha on every lookup (no cache hits)')
+
+def from_arguments(args: argparse.Namespace) -> FakeGitHub:
+    return FakeGitHub(args.fixture, args.latency_ms, args.jitter_ms, args.error_rate,
+                      args.rate_limit, args.reset_seconds, args.fresh_head)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    add_arguments(parser)
+    args = parser.parse_args()
+    
+    server = from_arguments(args).serve(args.host, args.port)
+    print(f"Fake GitHub API on http://{args.host}:{server.server_address[1]} "
+          f"(GITHUB_API_URL / GITHUB_GRAPHQL_URL=.../graphql)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,191 @@
+"""Load test the app under gunicorn against the fake GitHub API
+
+Usage:
+    python benchmarks/load_test.py [--concurrency 1 4 16 64] [--duration 20]
+                                   [--workers 4 --threads 8] [--repos 1000]
+                                   [--latency-ms 80 --error-rate 0.01 --fresh-head]
+                                   [--output load_results.json]
+
+Starts benchmarks/fake_github.py in-process and gunicorn pointing at it,
+then runs a closed loop at each concurrency level: every client thread
+requests /api/analyze/<owner>/<repo> for a random repository out of
+--repos and sends the next request as soon as the previous one returns.
+Reports throughput, latency percentiles, errors and upstream GitHub calls
+per level. Use --url to drive an already running instance instead.
+"""
+import os
+import sys
+import json
+import time
+import random
+import socket
+import platform
+import argparse
+import tempfile
+import threading
+import subprocess
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Any, Optional, Tuple
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fake_github
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_gunicorn(args: argparse.Namespace, github_url: str) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    data_dir = tempfile.mkdtemp(prefix='contextbuilder-load-')
+    env = dict(os.environ,
+               GITHUB_API_URL=github_url,
+               GITHUB_GRAPHQL_URL=f'{github_url}/graphql',
+               GITHUB_TOKEN=os.environ.get('GITHUB_TOKEN', 'load-test'),
+               GITHUB_BACKEND=args.backend,
+               DATA_DIR=data_dir)
+    command = [sys.executable, '-m', 'gunicorn', '--chdir', ROOT, '--bind', f'127.0.0.1:{port}',
+               '--workers', str(args.workers), '--threads', str(args.threads),
+               '--worker-class', 'gthread', '--log-level', 'warning', 'app:app']
+    # The app logs every analysis; keep that out of the report
+    log_path = os.path.join(data_dir, 'app.log')
+    with open(log_path, 'wb') as log:
+        process = subprocess.Popen(command, env=env, stdout=log, stderr=subprocess.STDOUT)
+    print(f"App log: {log_path}")
+    url = f'http://127.0.0.1:{port}'
+    
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with {process.returncode}")
+        try:
+            requests.get(f'{url}/health', timeout=1)
+            return process, url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start within 30s")
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+def run_level(url: str, concurrency: int, duration: float, repos: int, timeout: float) -> Dict[str, Any]:
+    """Closed-loop load at one concurrency level"""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+    
+    def client(index: int):
+        rng = random.Random(index)
+        session = requests.Session()
+        local_latencies = []
+        local_statuses = Counter()
+        while time.perf_counter() < stop_at:
+            repo = f'repo-{rng.randrange(repos)}'
+            start = time.perf_counter()
+            try:
+                status = session.get(f'{url}/api/analyze/loadtest/{repo}', timeout=timeout).status_code
+            except requests.RequestException:
+                status = 'error'
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[status] += 1
+        with lock:
+            latencies.extend(local_latencies)
+            statuses.update(local_statuses)
+    
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    latencies.sort()
+    total = len(latencies)
+    return {
+        'concurrency': concurrency,
+        'requests': total,
+        'seconds': elapsed,
+        'throughput': total / elapsed if elapsed else 0.0,
+        'errors': total - statuses.get(200, 0),
+        'statuses': {str(status): count for status, count in statuses.items()},
+        'p50': percentile(latencies, 0.50),
+        'p90': percentile(latencies, 0.90),
+        'p99': percentile(latencies, 0.99),
+        'max': latencies[-1] if latencies else 0.0
+    }
+
+def print_level(result: Dict[str, Any]):
+    upstream = result.get('upstream_requests')
+    print(f"{result['concurrency']:>11} {result['requests']:>9} {result['throughput']:>9.1f} "
+          f"{result['p50'] * 1000:>9.1f} {result['p90'] * 1000:>9.1f} {result['p99'] * 1000:>9.1f} "
+          f"{result['max'] * 1000:>9.1f} {result['errors']:>7} "
+          f"{'-' if upstream is None else upstream:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument('--duration', type=float, default=20, help='seconds per concurrency level')
+    parser.add_argument('--repos', type=int, default=1000, help='distinct repositories requested')
+    parser.add_argument('--timeout', type=float, default=60, help='client request timeout')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker')
+    parser.add_argument('--backend', choices=['rest', 'graphql'], default='rest', help='GITHUB_BACKEND')
+    parser.add_argument('--url', help='load an already running app instead of starting gunicorn')
+    parser.add_argument('--output', default='load_results.json')
+    fake_github.add_arguments(parser)
+    args = parser.parse_args()
+    
+    fake = None
+    server = None
+    process: Optional[subprocess.Popen] = None
+    url = args.url
+    if not url:
+        fake = fake_github.from_arguments(args)
+        server = fake.serve()
+        github_url = f'http://127.0.0.1:{server.server_address[1]}'
+        process, url = start_gunicorn(args, github_url)
+    
+    results = []
+    try:
+        print(f"Load testing {url}, {args.duration:g}s per level, {args.repos} repositories")
+        print(f"{'concurrency':>11} {'requests':>9} {'req/s':>9} {'p50 ms':>9} {'p90 ms':>9} "
+              f"{'p99 ms':>9} {'max ms':>9} {'errors':>7} {'upstream':>9}")
+        for concurrency in args.concurrency:
+            before = sum(fake.stats.values()) if fake else None
+            result = run_level(url, concurrency, args.duration, args.repos, args.timeout)
+            if fake:
+                result['upstream_requests'] = sum(fake.stats.values()) - before
+            results.append(result)
+            print_level(result)
+    finally:
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+        if server:
+            server.shutdown()
+    
+    report = {
+        'created_at': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'upstream': dict(fake.stats) if fake else None,
+        'levels': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == '__main__':
+    main()
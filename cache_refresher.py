@@ -0,0 +1,185 @@
+import os
+import math
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Any, Callable, Tuple
+
+from request_scheduler import priority, BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+class CacheRefresher:
+    """Refresh the most requested analyses before their cache entries expire
+    
+    Every access bumps an exponentially decaying score per repository. A
+    background thread periodically takes the top-N repositories scoring at
+    least min_score whose entry expires within the look-ahead window (or
+    has already gone) and re-runs their analysis at BACKGROUND priority,
+    keeping the estimated GitHub requests under an hourly budget and
+    leaving a reserve of the rate-limit window for interactive traffic.
+    
+    Until a refresh lands, readers keep the current entry. If HEAD moved,
+    readers whose lookup misses on the new sha are handed the previous
+    result while the refresh for that repository is running.
+    Scores are per process, so each gunicorn worker ranks on its share of
+    traffic; the cache lease stops two workers refreshing the same entry.
+    """
+    
+    def __init__(self, cache, refresh: Callable[[str, str], str],
+                 top_n: Optional[int] = None, interval: Optional[float] = None,
+                 ahead: Optional[float] = None, budget: Optional[int] = None,
+                 cost: int = 6, quota_reserve: Optional[float] = None,
+                 quota_fraction: Optional[Callable[[], Optional[float]]] = None,
+                 half_life: Optional[float] = None, max_tracked: Optional[int] = None,
+                 min_score: Optional[float] = None):
+        self.cache = cache
+        self.refresh = refresh
+        self.top_n = top_n or int(os.environ.get('REFRESH_TOP_N', 50))
+        self.interval = interval or float(os.environ.get('REFRESH_INTERVAL', 30))
+        self.ahead = ahead if ahead is not None else float(os.environ.get('REFRESH_AHEAD', 300))
+        # Estimated GitHub requests per hour the refresher may spend
+        self.budget = budget if budget is not None else int(os.environ.get('REFRESH_BUDGET', 500))
+        self.cost = cost
+        self.quota_reserve = (quota_reserve if quota_reserve is not None
+                              else float(os.environ.get('REFRESH_QUOTA_RESERVE', 0.2)))
+        self.quota_fraction = quota_fraction
+        self.half_life = half_life or float(os.environ.get('REFRESH_HALF_LIFE', 3600))
+        self.max_tracked = max_tracked or int(os.environ.get('REFRESH_MAX_TRACKED', 10000))
+        # A single recent visit scores about 1; such repositories are left to expire
+        self.min_score = min_score if min_score is not None else float(os.environ.get('REFRESH_MIN_SCORE', 1.5))
+        
+        # (username, repo) lowercased -> [score, scored_at, cache key, username, repo]
+        self._tracked: Dict[Tuple[str, str], List[Any]] = {}
+        self._refreshing: Dict[Tuple[str, str], str] = {}
+        self._spent: deque = deque()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        
+        self.stats = {'refreshed': 0, 'skipped_budget': 0, 'skipped_quota': 0,
+                      'skipped_leased': 0, 'failed': 0, 'stale_served': 0}
+    
+    def _decayed(self, entry: List[Any], now: float) -> float:
+        return entry[0] * math.exp2(-(now - entry[1]) / self.half_life)
+    
+    def record(self, username: str, repo: str, cache_key: str):
+        """Count an access to a repository and remember the entry it was served"""
+        self._start()
+        repo_id = (username.lower(), repo.lower())
+        now = time.time()
+        with self._lock:
+            entry = self._tracked.get(repo_id)
+            if entry is None:
+                if len(self._tracked) >= self.max_tracked:
+                    self._evict(now)
+                self._tracked[repo_id] = [1.0, now, cache_key, username, repo]
+            else:
+                entry[0] = self._decayed(entry, now) + 1
+                entry[1] = now
+                if repo_id not in self._refreshing:
+                    entry[2] = cache_key
+    
+    def _evict(self, now: float):
+        # Drop the coldest tenth in one go rather than one entry per insert
+        ranked = sorted(self._tracked, key=lambda repo_id: self._decayed(self._tracked[repo_id], now))
+        for repo_id in ranked[:max(1, len(ranked) // 10)]:
+            if repo_id not in self._refreshing:
+                del self._tracked[repo_id]
+    
+    def stale(self, username: str, repo: str, cache_key: str) -> Optional[Dict[str, Any]]:
+        """The previous result for a repository whose refresh is running, if cache_key is newer"""
+        repo_id = (username.lower(), repo.lower())
+        with self._lock:
+            previous = self._refreshing.get(repo_id)
+        if previous is None or previous == cache_key:
+            return None
+        value = self.cache.get(previous)
+        if value is not None:
+            with self._lock:
+                self.stats['stale_served'] += 1
+        return value
+    
+    def hot(self, now: Optional[float] = None) -> List[Tuple[str, str, str, float]]:
+        """Top-N repositories by decayed access score, at least min_score: (username, repo, cache key, score)"""
+        now = now or time.time()
+        with self._lock:
+            scored = [(entry[3], entry[4], entry[2], self._decayed(entry, now))
+                      for entry in self._tracked.values()]
+        scored = [item for item in scored if item[3] >= self.min_score]
+        scored.sort(key=lambda item: item[3], reverse=True)
+        return scored[:self.top_n]
+    
+    def _within_budget(self, now: float) -> bool:
+        while self._spent and self._spent[0] <= now - 3600:
+            self._spent.popleft()
+        return (len(self._spent) + 1) * self.cost <= self.budget
+    
+    def _quota_ok(self) -> bool:
+        if self.quota_fraction is None:
+            return True
+        fraction = self.quota_fraction()
+        return fraction is None or fraction > self.quota_reserve
+    
+    def run_once(self) -> int:
+        """Refresh due hot entries; returns how many were refreshed"""
+        now = time.time()
+        refreshed = 0
+        for username, repo, cache_key, _ in self.hot(now):
+            expires_at = self.cache.expires_at(cache_key)
+            if expires_at is not None and expires_at - now > self.ahead:
+                continue
+            if not self._within_budget(now):
+                self.stats['skipped_budget'] += 1
+                break
+            if not self._quota_ok():
+                self.stats['skipped_quota'] += 1
+                break
+            
+            repo_id = (username.lower(), repo.lower())
+            with self._lock:
+                self._refreshing[repo_id] = cache_key
+            try:
+                with priority(BACKGROUND):
+                    new_key = self.refresh(username, repo)
+                if new_key is None:
+                    # Another worker holds the lease; nothing was fetched here
+                    self.stats['skipped_leased'] += 1
+                    continue
+                self._spent.append(now)
+                refreshed += 1
+                self.stats['refreshed'] += 1
+                with self._lock:
+                    entry = self._tracked.get(repo_id)
+                    if entry is not None:
+                        entry[2] = new_key
+            except Exception as e:
+                self._spent.append(now)
+                self.stats['failed'] += 1
+                logger.warning(f"Background refresh of {username}/{repo} failed: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.pop(repo_id, None)
+        return refreshed
+    
+    def _start(self):
+        # Started lazily so gunicorn's pre-fork import doesn't strand the thread
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='cache-refresher', daemon=True)
+                self._thread.start()
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Cache refresher pass failed: {e}")
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, 'tracked': len(self._tracked), 'refreshing': len(self._refreshing),
+                    'spent_last_hour': len(self._spent) * self.cost}
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Callable
+from keyword_matcher import KeywordMatcher, StreamingCounter
+from request_scheduler import priority, BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+class CommitHistoryIngestor:
+    """Stream a repository's full commit history into keyword counts
+    
+    Commit pages are walked with a generator and each message is fed
+    straight into a StreamingCounter, so memory stays flat for histories of
+    any length. The aggregate counts are checkpointed per repository
+    together with the sha they cover; the next run only walks commits newer
+    than that sha and adds them on top.
+    
+    Analyses use current(), which never walks on the request path: when the
+    checkpoint is behind HEAD it queues the walk on a small background pool
+    at BACKGROUND priority and returns None, so the caller falls back to
+    the recent-commit sample; on_ingested is called once the walk lands.
+    """
+    
+    def __init__(self, github_client, matcher: KeywordMatcher, db_path: Optional[str] = None,
+                 max_pages: Optional[int] = None, max_workers: Optional[int] = None,
+                 on_ingested: Optional[Callable[[str, str], Any]] = None):
+        data_dir = os.environ.get('DATA_DIR', 'data')
+        self.github_client = github_client
+        self.matcher = matcher
+        self.db_path = db_path or os.environ.get('COMMIT_HISTORY_PATH', os.path.join(data_dir, 'commit_history.db'))
+        self.max_pages = max_pages or int(os.environ.get('GITHUB_HISTORY_MAX_PAGES', 2000))
+        # Checkpoints taken with a different keyword table are recomputed
+        self.patterns_version = hashlib.sha256('\x00'.join(matcher.patterns).encode('utf-8')).hexdigest()[:16]
+        self.on_ingested = on_ingested
+        self._local = threading.local()
+        workers = max_workers or int(os.environ.get('GITHUB_HISTORY_WORKERS', 2))
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='commit-history')
+        self._ingesting = set()
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS commit_checkpoints (
+                                key TEXT PRIMARY KEY,
+                                head_sha TEXT NOT NULL,
+                                patterns_version TEXT NOT NULL,
+                                commit_count INTEGER NOT NULL,
+                                counts TEXT NOT NULL,
+                                updated_at REAL NOT NULL)''')
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+    
+    def checkpoint(self, username: str, repo: str) -> Optional[Dict[str, Any]]:
+        """Return the stored aggregate for a repository, if still valid"""
+        key = f"{username.lower()}/{repo.lower()}"
+        row = self._connection().execute(
+            'SELECT head_sha, patterns_version, commit_count, counts FROM commit_checkpoints WHERE key = ?',
+            (key,)).fetchone()
+        if row is None or row[1] != self.patterns_version:
+            return None
+        return {'head_sha': row[0], 'commit_count': row[2], 'counts': json.loads(row[3])}
+    
+    def _delete(self, username: str, repo: str):
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM commit_checkpoints WHERE key = ?', (f"{username.lower()}/{repo.lower()}",))
+    
+    def current(self, username: str, repo: str, head_sha: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The aggregate at head_sha if already ingested, else None after queueing the walk"""
+        head_sha = head_sha or self.github_client.get_head_sha(username, repo)
+        previous = self.checkpoint(username, repo)
+        if previous and previous['head_sha'] == head_sha:
+            return previous
+        
+        repo_id = (username.lower(), repo.lower())
+        with self._lock:
+            if repo_id in self._ingesting:
+                return None
+            self._ingesting.add(repo_id)
+        self._executor.submit(self._ingest_in_background, username, repo, head_sha)
+        return None
+    
+    def _ingest_in_background(self, username: str, repo: str, head_sha: Optional[str]):
+        try:
+            with priority(BACKGROUND):
+                self.ingest(username, repo, head_sha)
+                if self.on_ingested:
+                    self.on_ingested(username, repo)
+        except Exception as e:
+            logger.warning(f"Background history ingestion failed for {username}/{repo}: {e}")
+        finally:
+            with self._lock:
+                self._ingesting.discard((username.lower(), repo.lower()))
+    
+    def apply(self, username: str, repo: str, before: str, after: str,
+              messages: List[str]) -> Optional[Dict[str, Any]]:
+        """Add a pushed range of commit messages, newest first, to a checkpoint at before
+        
+        Costs time proportional to the push, not the history. Returns the
+        new aggregate, or None when the checkpoint isn't at before (missing,
+        stale or rewritten); ingest then walks the gap instead. Replaying the
+        same push is a no-op.
+        """
+        previous = self.checkpoint(username, repo)
+        if previous is None:
+            return None
+        if previous['head_sha'] == after:
+            return previous
+        if previous['head_sha'] != before:
+            return None
+        
+        counter = StreamingCounter(self.matcher, previous['counts'])
+        for message in messages:
+            counter.feed(' ' + message.lower())
+        aggregate = {'head_sha': after, 'commit_count': previous['commit_count'] + len(messages),
+                     'counts': counter.counts}
+        
+        conn = self._connection()
+        with conn:
+            # Only advance from before, in case another worker applied it first
+            cursor = conn.execute('UPDATE commit_checkpoints SET head_sha = ?, commit_count = ?, counts = ?, '
+                                  'updated_at = ? WHERE key = ? AND head_sha = ? AND patterns_version = ?',
+                                  (after, aggregate['commit_count'], json.dumps(counter.counts), time.time(),
+                                   f"{username.lower()}/{repo.lower()}", before, self.patterns_version))
+        if cursor.rowcount != 1:
+            return self.checkpoint(username, repo)
+        logger.info(f"Applied {len(messages)} pushed commits to {username}/{repo} "
+                    f"({aggregate['commit_count']} total)")
+        return aggregate
+    
+    def ingest(self, username: str, repo: str, head_sha: Optional[str] = None) -> Dict[str, Any]:
+        """Bring a repository's aggregate up to head_sha and return it"""
+        head_sha = head_sha or self.github_client.get_head_sha(username, repo)
+        previous = self.checkpoint(username, repo)
+        if previous and previous['head_sha'] == head_sha:
+            return previous
+        
+        counter = StreamingCounter(self.matcher, previous['counts'] if previous else None)
+        commit_count = previous['commit_count'] if previous else 0
+        stop_sha = previous['head_sha'] if previous else None
+        
+        new_commits = 0
+        walk = self.github_client.iter_commits(username, repo, head_sha=head_sha, stop_sha=stop_sha,
+                                               max_pages=self.max_pages)
+        while True:
+            try:
+                commit = next(walk)
+            except StopIteration as stop:
+                reached_checkpoint = bool(stop.value)
+                break
+            message = commit.get('message', '').lower()
+            counter.feed(message if commit_count + new_commits == 0 else ' ' + message)
+            new_commits += 1
+        
+        if previous and not reached_checkpoint:
+            # History was rewritten past the checkpoint; start over from scratch
+            logger.warning(f"Checkpoint {stop_sha} no longer in {username}/{repo} history, re-ingesting")
+            self._delete(username, repo)
+            return self.ingest(username, repo, head_sha)
+        
+        aggregate = {'head_sha': head_sha, 'commit_count': commit_count + new_commits, 'counts': counter.counts}
+        if head_sha:
+            key = f"{username.lower()}/{repo.lower()}"
+            conn = self._connection()
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO commit_checkpoints '
+                             '(key, head_sha, patterns_version, commit_count, counts, updated_at) '
+                             'VALUES (?, ?, ?, ?, ?, ?)',
+                             (key, head_sha, self.patterns_version, aggregate['commit_count'],
+                              json.dumps(counter.counts), time.time()))
+        
+        logger.info(f"Ingested {new_commits} new commits for {username}/{repo} "
+                    f"({aggregate['commit_count']} total)")
+        return aggregate
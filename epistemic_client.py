@@ -1,17 +1,35 @@
 import os
 import logging
-from typing import Dict, List, Optional, Any
+import hashlib
+import threading
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+from keyword_matcher import KeywordMatcher
 
 logger = logging.getLogger(__name__)
 
+# Weeks averaged by the sliding window behind the growth trend
+GROWTH_WINDOW = 4
+# Stars, forks and followers: share of the impact score, and the count at which each saturates
+IMPACT_WEIGHTS = np.array([0.5, 0.3, 0.2])
+IMPACT_SATURATION = np.array([10000, 2000, 2000])
+
 class EpistemicClient:
     """Epistemic Me SDK client for belief system modeling"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, category_keywords: Optional[Dict[str, List[str]]] = None):
         self.api_key = api_key or os.environ.get('EPISTEMIC_API_KEY')
+        # Keywords that show a belief category in a commit message
+        self.category_keywords = category_keywords or {}
+        self._matchers: Dict[Tuple[str, ...], KeywordMatcher] = {}
+        # Per-commit work of the last few commit lists scored
+        self._features_memo: List[tuple] = []
+        self._features_lock = threading.Lock()
         self.base_url = os.environ.get('EPISTEMIC_BASE_URL', 'https://api.epistemicme.ai')
         
         self.headers = {
@@ -22,6 +40,25 @@ class EpistemicClient:
         
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        
+        # Keep-alive pool sized for concurrent analyses; writes are idempotent
+        # upserts keyed by content-derived IDs, so POSTs are safe to retry
+        retries = Retry(
+            total=int(os.environ.get('EPISTEMIC_MAX_RETRIES', 3)),
+            backoff_factor=0.5,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'POST', 'PUT'])
+        )
+        pool_size = int(os.environ.get('EPISTEMIC_POOL_SIZE', 10))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    @staticmethod
+    def content_id(prefix: str, *parts: str) -> str:
+        """Deterministic ID derived from content, stable across processes"""
+        digest = hashlib.sha256('\x00'.join(parts).encode('utf-8')).hexdigest()
+        return f'{prefix}_{digest[:16]}'
     
     def create_self_model(self, username: str, **kwargs) -> Dict[str, Any]:
         """Create a self model for the developer"""
@@ -60,7 +97,7 @@ class EpistemicClient:
             
             # For now, return mock data
             return {
-                'id': f'belief_{hash(content) % 10000}',
+                'id': self.content_id('belief', self_model_id, content),
                 'self_model_id': self_model_id,
                 'content': content,
                 'belief_type': belief_type,
@@ -118,14 +155,95 @@ class EpistemicClient:
             logger.error(f"Error creating dialectic: {e}")
             raise
     
+    def build_analysis_batch(self, username: str, beliefs: List[Dict[str, Any]],
+                             **kwargs) -> Dict[str, Any]:
+        """Build the batched write for a self model, its beliefs, belief system and dialectic"""
+        created_at = datetime.now().isoformat()
+        self_model_id = f'self_model_{username}'
+        
+        belief_records = []
+        for belief in beliefs:
+            belief_records.append({
+                'id': self.content_id('belief', self_model_id, belief['content']),
+                'self_model_id': self_model_id,
+                'content': belief['content'],
+                'belief_type': 'STATEMENT',
+                'confidence': belief['confidence'],
+                'source': 'github',
+                'created_at': created_at
+            })
+        
+        # Key on everything written except timestamps, so a re-analysis
+        # whose confidences moved is a new write rather than a duplicate
+        written = [{key: value for key, value in record.items() if key != 'created_at'}
+                   for record in belief_records]
+        return {
+            'idempotency_key': self.content_id('batch', self_model_id, kwargs.get('name', username),
+                                               json.dumps(written, sort_keys=True)),
+            'created_at': created_at,
+            'self_model': {
+                'id': self_model_id,
+                'user_id': username,
+                'name': kwargs.get('name', username),
+                'philosophies': kwargs.get('philosophies', ['open_source', 'collaborative']),
+                'created_at': created_at
+            },
+            'beliefs': belief_records,
+            'belief_system': {
+                'id': f'belief_system_{self_model_id}',
+                'self_model_id': self_model_id,
+                'belief_ids': [record['id'] for record in belief_records]
+            },
+            'dialectic': {
+                'id': f'dialectic_{self_model_id}',
+                'self_model_id': self_model_id,
+                'learning_objective': kwargs.get('learning_objective') or {
+                    'description': 'Understand developer coding philosophy and practices',
+                    'topics': ['code_quality', 'collaboration', 'technology_choices'],
+                    'target_belief_type': 'CAUSAL'
+                }
+            }
+        }
+    
+    def models_from_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Shape a batch like the results of the individual create_* calls"""
+        return {
+            'self_model': batch['self_model'],
+            'beliefs': batch['beliefs'],
+            'belief_system': {
+                'id': batch['belief_system']['id'],
+                'self_model_id': batch['self_model']['id'],
+                'beliefs': batch['beliefs'],
+                'belief_count': len(batch['beliefs']),
+                'created_at': batch['created_at']
+            },
+            'dialectic': {
+                **batch['dialectic'],
+                'interactions': [],
+                'created_at': batch['created_at']
+            }
+        }
+    
+    def send_analysis_batch(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Write a batch built by build_analysis_batch in one request"""
+        try:
+            # For now, return mock data; the real API takes the batch as one
+            # POST to /v1/batch and echoes the stored objects
+            return self.models_from_batch(batch)
+        except Exception as e:
+            logger.error(f"Error sending analysis batch {batch.get('idempotency_key')}: {e}")
+            raise
+    
     def calculate_epistemic_score(self, beliefs: List[Dict[str, Any]], 
-                                 actions: List[Dict[str, Any]]) -> Dict[str, Any]:
+                                 actions: List[Dict[str, Any]],
+                                 repository: Optional[Dict[str, Any]] = None,
+                                 user: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Calculate epistemic evaluation score"""
         try:
-            # Simple scoring algorithm for now
-            consistency_score = self._calculate_consistency(beliefs, actions)
-            growth_score = self._calculate_growth(beliefs)
-            impact_score = self._calculate_impact(actions)
+            commits, hits = self._weekly_activity(beliefs, actions)
+            consistency_score = self._calculate_consistency(commits, hits)
+            growth_score = self._calculate_growth(commits, hits)
+            impact_score = self._calculate_impact(repository or {}, user or {})
             
             overall_score = (consistency_score + growth_score + impact_score) / 3
             
@@ -148,20 +266,141 @@ class EpistemicClient:
                 'calculated_at': datetime.now().isoformat()
             }
     
-    def _calculate_consistency(self, beliefs: List[Dict[str, Any]], actions: List[Dict[str, Any]]) -> float:
-        """Calculate how well beliefs align with actions"""
-        # Mock implementation - in reality this would use sophisticated NLP
-        return 8.7
+    def _matcher(self, keywords: Tuple[str, ...]) -> KeywordMatcher:
+        matcher = self._matchers.get(keywords)
+        if matcher is None:
+            matcher = self._matchers[keywords] = KeywordMatcher(keywords)
+        return matcher
+    
+    @staticmethod
+    def _parse_day(date: str) -> np.datetime64:
+        """One date's day, NaT when it doesn't parse"""
+        try:
+            return np.datetime64(date[:10], 'D')
+        except ValueError:
+            return np.datetime64('NaT', 'D')
+    
+    def _commit_features(self, actions: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Week of each dated commit and commits per week, computed once per commit list
+        
+        Scoring the same list again (another belief set, a re-render of the
+        same inputs) only re-buckets keyword hits, which are also kept per
+        keyword set. Lists are matched by identity, as the extractor's scans are.
+        """
+        with self._features_lock:
+            for scanned, features in self._features_memo:
+                if scanned is actions:
+                    return features
+        
+        # Day precision is all weekly buckets need; truncating in NumPy keeps
+        # the per-commit work in C. Missing dates become NaT and are dropped.
+        dates = [action.get('date') or '' for action in actions]
+        try:
+            # GitHub dates are ASCII; bytes parse several times faster than str
+            days = np.array(dates, dtype='S10').astype('datetime64[D]')
+        except (ValueError, UnicodeEncodeError):
+            days = np.array([self._parse_day(date) for date in dates], dtype='datetime64[D]')
+        
+        dated = ~np.isnat(days)
+        # 1970-01-01 was a Thursday; shift so weeks start on Monday
+        weeks = (days[dated].astype(np.int64) + 3) // 7
+        if weeks.size:
+            weeks -= weeks.min()
+        features = {'dated': dated, 'weeks': weeks, 'commits': np.bincount(weeks).astype(float), 'hits': {}}
+        with self._features_lock:
+            # Holding a reference keeps id-based identity checks sound
+            self._features_memo.append((actions, features))
+            del self._features_memo[:-4]
+        return features
+    
+    def _commit_hits(self, actions: List[Dict[str, Any]], keywords: Tuple[str, ...]) -> np.ndarray:
+        """1 for each commit whose message contains any of keywords, else 0"""
+        # Match the joined messages once, then map match offsets back to commits
+        messages = [action.get('message') or '' for action in actions]
+        text = '\x00'.join(messages).lower()
+        ends = self._matcher(keywords).match_ends(text)
+        hits = np.zeros(len(actions))
+        if ends:
+            lengths = np.fromiter(map(len, messages), dtype=np.int64, count=len(messages))
+            if int(lengths.sum()) + len(messages) - 1 != len(text):
+                # Lowercasing changed some lengths ('İ' becomes two characters)
+                lengths = np.fromiter(map(len, text.split('\x00')), dtype=np.int64)
+            boundaries = np.cumsum(lengths + 1)
+            hits[np.minimum(np.searchsorted(boundaries, ends, side='right'), len(actions) - 1)] = 1
+        return hits
     
-    def _calculate_growth(self, beliefs: List[Dict[str, Any]]) -> float:
-        """Calculate belief evolution and growth rate"""
-        # Mock implementation
-        return 7.2
+    def _weekly_activity(self, beliefs: List[Dict[str, Any]],
+                         actions: List[Dict[str, Any]]) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Commits and belief-keyword hits per week, oldest first with empty weeks as zeros
+        
+        Hits are None when none of the beliefs have keywords to look for.
+        """
+        keywords = tuple(sorted({keyword for belief in beliefs
+                                 for keyword in self.category_keywords.get(belief.get('category'), [])}))
+        if not actions:
+            return np.zeros(0), np.zeros(0) if keywords else None
+        
+        features = self._commit_features(actions)
+        commits = features['commits']
+        if not commits.size:
+            return np.zeros(0), np.zeros(0) if keywords else None
+        if not keywords:
+            return commits, None
+        
+        hits = features['hits'].get(keywords)
+        if hits is None:
+            per_commit = self._commit_hits(actions, keywords)
+            hits = np.bincount(features['weeks'], weights=per_commit[features['dated']], minlength=commits.size)
+            features['hits'][keywords] = hits
+        return commits, hits
     
-    def _calculate_impact(self, actions: List[Dict[str, Any]]) -> float:
-        """Calculate belief influence on others"""
-        # Mock implementation based on GitHub metrics
-        return 9.5
+    def _calculate_consistency(self, commits: np.ndarray, hits: Optional[np.ndarray]) -> float:
+        """Calculate how well beliefs align with actions
+        
+        Combines the share of active weeks whose commits touch the held
+        beliefs with how steady that weekly hit rate is.
+        """
+        active = commits > 0
+        if hits is None or not active.any():
+            return 5.0
+        
+        rates = hits[active] / commits[active]
+        presence = np.count_nonzero(rates) / rates.size
+        mean = rates.mean()
+        steadiness = 1 - min(rates.std() / mean, 1.0) if mean > 0 else 0.0
+        return float(10 * (0.6 * presence + 0.4 * steadiness))
+    
+    def _calculate_growth(self, commits: np.ndarray, hits: Optional[np.ndarray]) -> float:
+        """Calculate belief evolution and growth rate
+        
+        Trend of a sliding-window average of weekly activity, where commits
+        touching the held beliefs count double; 5 means flat.
+        """
+        activity = commits if hits is None else commits + hits
+        window = min(GROWTH_WINDOW, activity.size)
+        if window == 0:
+            return 5.0
+        smoothed = np.convolve(activity, np.ones(window) / window, mode='valid')
+        level = smoothed.mean()
+        if smoothed.size < 2 or level == 0:
+            return 5.0
+        
+        # Least-squares slope, as the change across the history relative to its level
+        x = np.arange(smoothed.size) - (smoothed.size - 1) / 2
+        slope = (x @ smoothed) / (x @ x)
+        trend = slope * (smoothed.size - 1) / level
+        return float(5 + 5 * np.tanh(trend))
+    
+    def _calculate_impact(self, repository: Dict[str, Any], user: Dict[str, Any]) -> float:
+        """Calculate belief influence on others
+        
+        Stars, forks and followers on a log scale, each saturating at the
+        level of a widely known project.
+        """
+        metrics = np.array([repository.get('stars') or 0, repository.get('forks') or 0,
+                            user.get('followers') or 0], dtype=float)
+        reach = np.minimum(np.log1p(metrics) / np.log1p(IMPACT_SATURATION), 1.0)
+        return float(10 * (reach @ IMPACT_WEIGHTS))
     
     def _get_recommendation(self, score: float) -> str:
         """Get recommendation based on score"""
@@ -0,0 +1,156 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+class EpistemicOutbox:
+    """Durable write-behind outbox for Epistemic Me model writes
+    
+    Analyses enqueue their batched write and return immediately with
+    placeholder models marked pending. A background flusher sends queued
+    batches with retries and backoff and records what the API returned, so
+    clients can resolve the placeholders later by outbox id. Rows live in
+    SQLite under DATA_DIR and survive restarts.
+    """
+    
+    def __init__(self, client, db_path: Optional[str] = None, flush_interval: Optional[float] = None,
+                 batch_size: Optional[int] = None, max_attempts: Optional[int] = None):
+        data_dir = os.environ.get('DATA_DIR', 'data')
+        self.client = client
+        self.db_path = db_path or os.environ.get('EPISTEMIC_OUTBOX_PATH', os.path.join(data_dir, 'epistemic_outbox.db'))
+        self.flush_interval = flush_interval or float(os.environ.get('EPISTEMIC_FLUSH_INTERVAL', 1.0))
+        self.batch_size = batch_size or int(os.environ.get('EPISTEMIC_FLUSH_BATCH', 50))
+        self.max_attempts = max_attempts or int(os.environ.get('EPISTEMIC_MAX_ATTEMPTS', 8))
+        self.retention = int(os.environ.get('EPISTEMIC_OUTBOX_RETENTION', 7 * 86400))
+        self.claim_timeout = 60
+        
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._owner = uuid.uuid4().hex
+        
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS outbox (
+                                id TEXT PRIMARY KEY,
+                                payload TEXT NOT NULL,
+                                status TEXT NOT NULL,
+                                attempts INTEGER NOT NULL DEFAULT 0,
+                                next_attempt_at REAL NOT NULL,
+                                claimed_by TEXT,
+                                result TEXT,
+                                error TEXT,
+                                created_at REAL NOT NULL)''')
+            conn.execute('CREATE INDEX IF NOT EXISTS outbox_status_due ON outbox (status, next_attempt_at)')
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # Outbox rows must survive a crash, unlike the caches
+            conn.execute('PRAGMA synchronous=FULL')
+            self._local.conn = conn
+        return conn
+    
+    def enqueue(self, batch: Dict[str, Any]) -> Dict[str, Any]:
+        """Persist a batch for delivery and return pending placeholder models"""
+        outbox_id = f"outbox_{uuid.uuid4().hex}"
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute('INSERT INTO outbox (id, payload, status, next_attempt_at, created_at) '
+                         'VALUES (?, ?, ?, ?, ?)', (outbox_id, json.dumps(batch), 'pending', now, now))
+        
+        self._start_flusher()
+        self._wake.set()
+        
+        models = self.client.models_from_batch(batch)
+        for model in models.values():
+            if isinstance(model, dict):
+                model['status'] = 'pending'
+                model['outbox_id'] = outbox_id
+        return models
+    
+    def resolve(self, outbox_id: str) -> Optional[Dict[str, Any]]:
+        """Return the delivery status of a batch and, once sent, the stored models"""
+        # Also resumes delivery of rows left pending by a previous process
+        self._start_flusher()
+        row = self._connection().execute(
+            'SELECT status, attempts, result, error FROM outbox WHERE id = ?', (outbox_id,)).fetchone()
+        if row is None:
+            return None
+        
+        resolved = {'outbox_id': outbox_id, 'status': row[0], 'attempts': row[1]}
+        if row[2] is not None:
+            resolved['models'] = json.loads(row[2])
+        if row[3] is not None:
+            resolved['error'] = row[3]
+        return resolved
+    
+    def _start_flusher(self):
+        # Started lazily so gunicorn's pre-fork import doesn't strand the thread
+        with self._lock:
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._run, name='epistemic-outbox', daemon=True)
+                self._flusher.start()
+    
+    def _run(self):
+        while True:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                while self.flush() == self.batch_size:
+                    pass
+            except Exception as e:
+                logger.error(f"Epistemic outbox flush failed: {e}")
+    
+    def _claim(self) -> List[tuple]:
+        """Take ownership of due rows; idempotent upserts make a rare double send harmless"""
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM outbox WHERE status = 'sent' AND created_at < ?", (now - self.retention,))
+            # Rows claimed by a worker that died go back to pending
+            conn.execute("UPDATE outbox SET status = 'pending', claimed_by = NULL "
+                         "WHERE status = 'sending' AND next_attempt_at < ?", (now - self.claim_timeout,))
+            conn.execute("UPDATE outbox SET status = 'sending', claimed_by = ?, next_attempt_at = ? "
+                         "WHERE id IN (SELECT id FROM outbox WHERE status = 'pending' AND next_attempt_at <= ? "
+                         "ORDER BY next_attempt_at LIMIT ?)", (self._owner, now, now, self.batch_size))
+            return conn.execute("SELECT id, payload, attempts FROM outbox WHERE status = 'sending' AND claimed_by = ?",
+                                (self._owner,)).fetchall()
+    
+    def flush(self) -> int:
+        """Send due batches once; returns how many were attempted"""
+        rows = self._claim()
+        conn = self._connection()
+        for outbox_id, payload, attempts in rows:
+            try:
+                result = self.client.send_analysis_batch(json.loads(payload))
+                with conn:
+                    conn.execute("UPDATE outbox SET status = 'sent', result = ?, error = NULL, attempts = ?, "
+                                 "claimed_by = NULL WHERE id = ?", (json.dumps(result), attempts + 1, outbox_id))
+            except Exception as e:
+                attempts += 1
+                status = 'failed' if attempts >= self.max_attempts else 'pending'
+                retry_at = time.time() + min(2 ** attempts, 300)
+                logger.warning(f"Epistemic outbox {outbox_id} attempt {attempts} failed: {e}")
+                with conn:
+                    conn.execute('UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, error = ?, '
+                                 'claimed_by = NULL WHERE id = ?', (status, attempts, retry_at, str(e), outbox_id))
+        return len(rows)
+    
+    def stats(self) -> Dict[str, int]:
+        """Row counts per delivery status"""
+        rows = self._connection().execute('SELECT status, COUNT(*) FROM outbox GROUP BY status').fetchall()
+        return {status: count for status, count in rows}
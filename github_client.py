@@ -1,158 +1,353 @@
 import requests
+from requests.adapters import HTTPAdapter
 import os
+import re
+import time
 import logging
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, Future
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Callable, Iterator
+from urllib.parse import urlsplit
+from http_cache import HTTPCache
+from request_scheduler import RequestScheduler
+from readme_stream import read_readme, clean_readme, max_readme_bytes, readme_settings
+import metrics
 
 logger = logging.getLogger(__name__)
 
 class GitHubClient:
     """GitHub API client for fetching repository data"""
     
-    def __init__(self, token: Optional[str] = None):
+    # Collapse per-repository paths into bounded metric labels
+    ENDPOINT_PATTERNS = [
+        (re.compile(r'^/repos/[^/]+/[^/]+'), '/repos/:owner/:repo'),
+        (re.compile(r'^/users/[^/]+'), '/users/:user')
+    ]
+    # Calls one analysis fans out to: repository, readme, commits, issues, user
+    FAN_OUT = 5
+    
+    def __init__(self, token: Optional[str] = None, concurrent: Optional[bool] = None,
+                 max_workers: Optional[int] = None, http_cache: Optional[HTTPCache] = None,
+                 scheduler: Optional[RequestScheduler] = None):
         self.token = token or os.environ.get('GITHUB_TOKEN')
-        self.base_url = "https://api.github.com"
+        self.base_url = os.environ.get('GITHUB_API_URL', "https://api.github.com")
         self.headers = {
             'Accept': 'application/vnd.github.v3+json',
             'User-Agent': 'ContextBuilder/1.0'
         }
         
-        if self.token:
-            self.headers['Authorization'] = f'token {self.token}'
-        
         self.session = requests.Session()
         self.session.headers.update(self.headers)
+        
+        # Every request goes through the scheduler, which picks the token
+        # (GITHUB_TOKENS rotates a pool) and queues when quota runs out
+        if scheduler is None:
+            scheduler = RequestScheduler([token] if token else None)
+        self.scheduler = scheduler
+        
+        # Concurrent fan-out of the per-analysis GitHub calls
+        if concurrent is None:
+            concurrent = os.environ.get('GITHUB_CONCURRENT_FETCH', 'True').lower() == 'true'
+        self.concurrent = concurrent
+        # The pool is shared by every request, batch and job in the process, so
+        # it is sized for GITHUB_FETCH_CONCURRENCY analyses fanning out at once
+        concurrency = int(os.environ.get('GITHUB_FETCH_CONCURRENCY', 16))
+        self.max_workers = max_workers or int(os.environ.get('GITHUB_FETCH_WORKERS', concurrency * self.FAN_OUT))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                            thread_name_prefix='github-fetch') if concurrent else None
+        # One kept-alive connection per fetch thread
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        
+        # Persistent ETag/Last-Modified cache; 304s don't count against the rate limit
+        if http_cache is None and os.environ.get('GITHUB_HTTP_CACHE', 'True').lower() == 'true':
+            http_cache = HTTPCache()
+        self.http_cache = http_cache
+        
+        # READMEs are fetched raw and read only up to this many bytes
+        self.readme_max_bytes = max_readme_bytes()
+    
+    def _endpoint(self, url: str) -> str:
+        path = url[len(self.base_url):] if url.startswith(self.base_url) else urlsplit(url).path
+        for pattern, replacement in self.ENDPOINT_PATTERNS:
+            path = pattern.sub(replacement, path)
+        return path
+    
+    def _request(self, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send a request through the scheduler, timing it per endpoint"""
+        start = time.perf_counter()
+        status = 'error'
+        try:
+            response = self.scheduler.request(self.session, method, url, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.github_request_seconds.observe(elapsed, endpoint=self._endpoint(url), status=status)
+            metrics.record('github', elapsed)
+    
+    def _get(self, url: str, project: Callable[[requests.Response], Any],
+             params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None,
+             stream: bool = False, cache: bool = True, variant: Optional[str] = None) -> Any:
+        """GET a URL and return project(response), revalidating against the HTTP cache
+        
+        With stream, the body is left unread for project to consume
+        incrementally, and the connection is released afterwards. Pass
+        cache=False for responses not worth keeping, and a variant when
+        project's output depends on local settings.
+        """
+        request_headers = dict(headers or {})
+        key = None
+        cached = None
+        if self.http_cache and cache:
+            key = HTTPCache.make_key(url, params, request_headers.get('Accept'), variant)
+            cached = self.http_cache.get(key)
+            if cached:
+                if cached['etag']:
+                    request_headers['If-None-Match'] = cached['etag']
+                if cached['last_modified']:
+                    request_headers['If-Modified-Since'] = cached['last_modified']
+        
+        response = self._request('GET', url, params=params, headers=request_headers, stream=stream)
+        try:
+            if response.status_code == 304 and cached:
+                self.http_cache.record_revalidation(key)
+                return cached['payload']
+            response.raise_for_status()
+            
+            payload = project(response)
+        finally:
+            if stream:
+                response.close()
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if self.http_cache and cache and (etag or last_modified):
+            self.http_cache.set(key, etag, last_modified, payload)
+        return payload
     
     def get_repository(self, username: str, repo: str) -> Dict[str, Any]:
         """Get repository metadata"""
         try:
             url = f"{self.base_url}/repos/{username}/{repo}"
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            data = response.json()
-            return {
-                'name': data['name'],
-                'full_name': data['full_name'],
-                'description': data.get('description', ''),
-                'language': data.get('language', ''),
-                'topics': data.get('topics', []),
-                'stars': data['stargazers_count'],
-                'forks': data['forks_count'],
-                'created_at': data['created_at'],
-                'updated_at': data['updated_at'],
-                'owner': {
-                    'login': data['owner']['login'],
-                    'type': data['owner']['type']
-                }
-            }
+            return self._get(url, self._project_repository)
         except requests.RequestException as e:
             logger.error(f"Error fetching repository {username}/{repo}: {e}")
             raise
     
+    @staticmethod
+    def _project_repository(response: requests.Response) -> Dict[str, Any]:
+        data = response.json()
+        return {
+            'name': data['name'],
+            'full_name': data['full_name'],
+            'description': data.get('description', ''),
+            'language': data.get('language', ''),
+            'topics': data.get('topics', []),
+            'stars': data['stargazers_count'],
+            'forks': data['forks_count'],
+            'created_at': data['created_at'],
+            'updated_at': data['updated_at'],
+            'owner': {
+                'login': data['owner']['login'],
+                'type': data['owner']['type']
+            }
+        }
+    
+    def get_head_sha(self, username: str, repo: str) -> Optional[str]:
+        """Get the sha of the default branch HEAD"""
+        try:
+            url = f"{self.base_url}/repos/{username}/{repo}/commits/HEAD"
+            return self._get(url, lambda response: response.text.strip(),
+                             headers={'Accept': 'application/vnd.github.sha'})
+        except requests.RequestException as e:
+            logger.warning(f"Could not fetch HEAD sha for {username}/{repo}: {e}")
+            return None
+    
+    def forget_head(self, username: str, repo: str):
+        """Drop any HEAD sha remembered for a repository, e.g. after a push delivery"""
+    
     def get_readme(self, username: str, repo: str) -> str:
         """Get repository README content"""
         try:
             url = f"{self.base_url}/repos/{username}/{repo}/readme"
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            data = response.json()
-            if data['encoding'] == 'base64':
-                import base64
-                content = base64.b64decode(data['content']).decode('utf-8')
-                return content
-            return data['content']
+            return self._get(url, self._project_readme,
+                             headers={'Accept': 'application/vnd.github.raw'}, stream=True,
+                             variant=readme_settings())
         except requests.RequestException as e:
             logger.warning(f"Could not fetch README for {username}/{repo}: {e}")
             return ""
     
+    def _project_readme(self, response: requests.Response) -> str:
+        # The raw media type streams the file itself, so a capped read never
+        # holds more than readme_max_bytes; JSON is what servers ignoring it send
+        if response.headers.get('Content-Type', '').startswith('application/json'):
+            data = response.json()
+            if data['encoding'] == 'base64':
+                import base64
+                return clean_readme(base64.b64decode(data['content']).decode('utf-8'), self.readme_max_bytes)
+            return clean_readme(data['content'], self.readme_max_bytes)
+        return read_readme(response.iter_content(chunk_size=16384), self.readme_max_bytes)
+    
     def get_commits(self, username: str, repo: str, limit: int = 50) -> List[Dict[str, Any]]:
         """Get recent commits"""
         try:
             url = f"{self.base_url}/repos/{username}/{repo}/commits"
             params = {'per_page': limit}
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            commits = []
-            for commit_data in response.json():
-                commits.append({
-                    'sha': commit_data['sha'][:7],
-                    'message': commit_data['commit']['message'],
-                    'author': commit_data['commit']['author']['name'],
-                    'date': commit_data['commit']['author']['date'],
-                    'url': commit_data['html_url']
-                })
-            return commits
+            return self._get(url, self._project_commits, params=params)
         except requests.RequestException as e:
             logger.error(f"Error fetching commits for {username}/{repo}: {e}")
             return []
     
+    @staticmethod
+    def _project_commit(commit_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'sha': commit_data['sha'][:7],
+            'message': commit_data['commit']['message'],
+            'author': commit_data['commit']['author']['name'],
+            'date': commit_data['commit']['author']['date'],
+            'url': commit_data['html_url']
+        }
+    
+    @classmethod
+    def _project_commits(cls, response: requests.Response) -> List[Dict[str, Any]]:
+        return [cls._project_commit(commit_data) for commit_data in response.json()]
+    
+    @classmethod
+    def _project_commit_page(cls, response: requests.Response) -> List[Any]:
+        # Keep full shas so history walks can stop at a checkpoint
+        return [[commit_data['sha'], cls._project_commit(commit_data)] for commit_data in response.json()]
+    
+    def iter_commits(self, username: str, repo: str, head_sha: Optional[str] = None,
+                     stop_sha: Optional[str] = None, per_page: int = 100,
+                     max_pages: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Walk commit history newest first, holding one page in memory at a time
+        
+        Starts at head_sha when given, so the walk is pinned to a known tip,
+        and stops before stop_sha; the generator returns True if stop_sha was
+        reached. Errors are raised rather than swallowed so callers never
+        checkpoint a partial walk.
+        """
+        url = f"{self.base_url}/repos/{username}/{repo}/commits"
+        page = 1
+        while max_pages is None or page <= max_pages:
+            params = {'per_page': per_page, 'page': page}
+            if head_sha:
+                params['sha'] = head_sha
+            
+            # Pages are keyed by the tip sha, so caching them would store the
+            # whole history again for every new HEAD; the checkpoint already
+            # keeps walks incremental
+            batch = self._get(url, self._project_commit_page, params=params, cache=False)
+            for full_sha, commit in batch:
+                if full_sha == stop_sha:
+                    return True
+                yield commit
+            
+            if len(batch) < per_page:
+                return False
+            page += 1
+        return False
+    
     def get_issues(self, username: str, repo: str, limit: int = 20) -> List[Dict[str, Any]]:
         """Get recent issues and discussions"""
         try:
             url = f"{self.base_url}/repos/{username}/{repo}/issues"
             params = {'per_page': limit, 'state': 'all'}
-            response = self.session.get(url, params=params)
-            response.raise_for_status()
-            
-            issues = []
-            for issue_data in response.json():
-                issues.append({
-                    'number': issue_data['number'],
-                    'title': issue_data['title'],
-                    'body': issue_data.get('body', ''),
-                    'state': issue_data['state'],
-                    'comments': issue_data['comments'],
-                    'created_at': issue_data['created_at'],
-                    'labels': [label['name'] for label in issue_data.get('labels', [])]
-                })
-            return issues
+            return self._get(url, self._project_issues, params=params)
         except requests.RequestException as e:
             logger.error(f"Error fetching issues for {username}/{repo}: {e}")
             return []
     
+    @staticmethod
+    def _project_issue(issue_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Also used for webhook payloads, which carry the same issue object
+        return {
+            'number': issue_data['number'],
+            'title': issue_data['title'],
+            'body': issue_data.get('body') or '',
+            'state': issue_data['state'],
+            'comments': issue_data['comments'],
+            'created_at': issue_data['created_at'],
+            'labels': [label['name'] for label in issue_data.get('labels', [])]
+        }
+    
+    @classmethod
+    def _project_issues(cls, response: requests.Response) -> List[Dict[str, Any]]:
+        return [cls._project_issue(issue_data) for issue_data in response.json()]
+    
     def get_user(self, username: str) -> Dict[str, Any]:
         """Get user profile information"""
         try:
             url = f"{self.base_url}/users/{username}"
-            response = self.session.get(url)
-            response.raise_for_status()
-            
-            data = response.json()
-            return {
-                'login': data['login'],
-                'name': data.get('name', ''),
-                'bio': data.get('bio', ''),
-                'company': data.get('company', ''),
-                'location': data.get('location', ''),
-                'email': data.get('email', ''),
-                'public_repos': data['public_repos'],
-                'followers': data['followers'],
-                'following': data['following'],
-                'created_at': data['created_at']
-            }
+            return self._get(url, self._project_user)
         except requests.RequestException as e:
             logger.error(f"Error fetching user {username}: {e}")
             return {}
     
-    def get_repository_data(self, username: str, repo: str) -> Dict[str, Any]:
+    @staticmethod
+    def _project_user(response: requests.Response) -> Dict[str, Any]:
+        data = response.json()
+        return {
+            'login': data['login'],
+            'name': data.get('name', ''),
+            'bio': data.get('bio', ''),
+            'company': data.get('company', ''),
+            'location': data.get('location', ''),
+            'email': data.get('email', ''),
+            'public_repos': data['public_repos'],
+            'followers': data['followers'],
+            'following': data['following'],
+            'created_at': data['created_at']
+        }
+    
+    def _submit(self, fn: Callable[..., Any], *args: Any) -> Future:
+        """Run fn on the fetch pool, or inline when concurrency is disabled"""
+        if self._executor:
+            # Carry the caller's context (e.g. request priority) into the pool
+            context = contextvars.copy_context()
+            return self._executor.submit(context.run, fn, *args)
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    
+    def submit_user(self, username: str) -> Future:
+        """Start fetching a user profile, for sharing across repositories"""
+        return self._submit(self.get_user, username)
+    
+    def submit_repository_data(self, username: str, repo: str,
+                               user_future: Optional[Future] = None) -> Dict[str, Future]:
+        """Start fetching all analysis inputs, keyed like get_repository_data
+        
+        Each getter keeps its own error handling, so only the 'repository'
+        future can raise. Pass user_future to reuse an owner lookup already
+        in flight.
+        """
+        return {
+            'repository': self._submit(self.get_repository, username, repo),
+            'readme': self._submit(self.get_readme, username, repo),
+            'commits': self._submit(self.get_commits, username, repo),
+            'issues': self._submit(self.get_issues, username, repo),
+            'user': user_future or self.submit_user(username)
+        }
+    
+    def get_repository_data(self, username: str, repo: str,
+                            user_future: Optional[Future] = None) -> Dict[str, Any]:
         """Get comprehensive repository data for analysis"""
         try:
-            # Fetch all data in parallel would be ideal, but for simplicity:
-            repo_data = self.get_repository(username, repo)
-            readme = self.get_readme(username, repo)
-            commits = self.get_commits(username, repo)
-            issues = self.get_issues(username, repo)
-            user = self.get_user(username)
+            # All calls are issued at once; latency is bounded by the slowest one
+            futures = self.submit_repository_data(username, repo, user_future)
             
             return {
-                'repository': repo_data,
-                'readme': readme,
-                'commits': commits,
-                'issues': issues,
-                'user': user,
+                'repository': futures['repository'].result(),
+                'readme': futures['readme'].result(),
+                'commits': futures['commits'].result(),
+                'issues': futures['issues'].result(),
+                'user': futures['user'].result(),
                 'fetched_at': datetime.now().isoformat()
             }
         except Exception as e:
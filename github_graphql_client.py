@@ -0,0 +1,249 @@
+import os
+import time
+import logging
+import threading
+import requests
+from concurrent.futures import Future
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+from github_client import GitHubClient
+from readme_stream import clean_readme
+
+logger = logging.getLogger(__name__)
+
+# One round trip selecting only the fields get_repository_data keeps
+REPOSITORY_QUERY = """
+query($owner: String!, $name: String!, $commits: Int!, $issues: Int!) {
+  repository(owner: $owner, name: $name) {
+    name
+    nameWithOwner
+    description
+    primaryLanguage { name }
+    repositoryTopics(first: 20) { nodes { topic { name } } }
+    stargazerCount
+    forkCount
+    createdAt
+    updatedAt
+    owner { login __typename }
+    readmeMd: object(expression: "HEAD:README.md") { ... on Blob { text } }
+    readmeLower: object(expression: "HEAD:readme.md") { ... on Blob { text } }
+    readmeRst: object(expression: "HEAD:README.rst") { ... on Blob { text } }
+    readmePlain: object(expression: "HEAD:README") { ... on Blob { text } }
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          oid
+          history(first: $commits) {
+            nodes { oid message url author { name date } }
+          }
+        }
+      }
+    }
+    issues(first: $issues, orderBy: {field: CREATED_AT, direction: DESC}) {
+      nodes {
+        number
+        title
+        body
+        state
+        createdAt
+        comments { totalCount }
+        labels(first: 20) { nodes { name } }
+      }
+    }
+  }
+  repositoryOwner(login: $owner) {
+    login
+    ... on User {
+      name bio company location email createdAt
+      repositories(privacy: PUBLIC) { totalCount }
+      followers { totalCount }
+      following { totalCount }
+    }
+    ... on Organization {
+      name location email createdAt
+      description
+      repositories(privacy: PUBLIC) { totalCount }
+    }
+  }
+}
+"""
+
+class GitHubGraphQLClient(GitHubClient):
+    """GitHub client fetching all analysis inputs in a single GraphQL query
+    
+    Returns the same get_repository_data shape as the REST client. GitHub's
+    GraphQL API requires a token. Issues come from the issues connection, so
+    unlike the REST endpoint they exclude pull requests.
+    
+    The query also returns the default branch HEAD, which get_head_sha
+    answers from for head_ttl seconds instead of a REST call. A README
+    under a name none of the query's aliases match is fetched over REST.
+    """
+    
+    def __init__(self, token: Optional[str] = None, head_ttl: Optional[float] = None, **kwargs):
+        super().__init__(token, **kwargs)
+        self.graphql_url = os.environ.get('GITHUB_GRAPHQL_URL', f"{self.base_url}/graphql")
+        self.head_ttl = head_ttl if head_ttl is not None else float(os.environ.get('GITHUB_GRAPHQL_HEAD_TTL', 30))
+        # (owner, repo) lowercased -> (HEAD sha, when the query saw it)
+        self._heads: Dict[tuple, tuple] = {}
+        self._heads_lock = threading.Lock()
+        
+        if self.scheduler.tokens == [None]:
+            logger.warning("GitHub GraphQL API requires GITHUB_TOKEN; requests will be rejected")
+    
+    def query(self, username: str, repo: str, commits: int = 50, issues: int = 20) -> Dict[str, Any]:
+        """Run the repository query and return its data object"""
+        variables = {'owner': username, 'name': repo, 'commits': commits, 'issues': issues}
+        response = self._request('POST', self.graphql_url,
+                                 json={'query': REPOSITORY_QUERY, 'variables': variables})
+        response.raise_for_status()
+        
+        payload = response.json()
+        data = payload.get('data') or {}
+        for error in payload.get('errors', []):
+            # Missing README candidates are expected; a missing repository is not
+            if error.get('type') == 'NOT_FOUND' and 'repository' in error.get('path', []):
+                raise requests.HTTPError(f"404 Not Found: {username}/{repo}", response=response)
+            logger.warning(f"GraphQL error for {username}/{repo}: {error.get('message')}")
+        
+        if not data.get('repository'):
+            raise requests.HTTPError(f"Repository {username}/{repo} not returned", response=response)
+        target = (data['repository'].get('defaultBranchRef') or {}).get('target') or {}
+        if target.get('oid'):
+            with self._heads_lock:
+                self._heads[(username.lower(), repo.lower())] = (target['oid'], time.time())
+        return data
+    
+    def get_head_sha(self, username: str, repo: str) -> Optional[str]:
+        """The HEAD sha a recent query returned, else from the REST API"""
+        key = (username.lower(), repo.lower())
+        with self._heads_lock:
+            head = self._heads.get(key)
+            if head is not None and head[1] < time.time() - self.head_ttl:
+                del self._heads[key]
+                head = None
+        if head is not None:
+            return head[0]
+        return super().get_head_sha(username, repo)
+    
+    def forget_head(self, username: str, repo: str):
+        with self._heads_lock:
+            self._heads.pop((username.lower(), repo.lower()), None)
+    
+    def submit_repository_data(self, username: str, repo: str,
+                               user_future: Optional[Future] = None) -> Dict[str, Future]:
+        """Start the single query; every key resolves from the same response"""
+        query_future = self._submit(self.query, username, repo)
+        projections = {
+            'repository': self._project_repository_node,
+            'readme': self._project_readme_node,
+            'commits': self._project_commit_nodes,
+            'issues': self._project_issue_nodes,
+            'user': self._project_owner_node
+        }
+        futures = {key: Future() for key in projections}
+        if user_future is not None:
+            futures['user'] = user_future
+            del projections['user']
+        
+        def fall_back(done: Future):
+            try:
+                futures['readme'].set_result(done.result())
+            except Exception:
+                futures['readme'].set_result('')
+        
+        def resolve(done: Future):
+            for key, project in projections.items():
+                try:
+                    value = project(done.result())
+                    if key == 'readme' and value is None:
+                        # No alias matched; /readme finds the README under any name
+                        self._submit(self.get_readme, username, repo).add_done_callback(fall_back)
+                        continue
+                    futures[key].set_result(value)
+                except Exception as e:
+                    if key == 'repository':
+                        logger.error(f"Error fetching repository {username}/{repo}: {e}")
+                        futures[key].set_exception(e)
+                    else:
+                        # Other inputs degrade to empty values, as in the REST client
+                        futures[key].set_result({'readme': '', 'commits': [], 'issues': []}.get(key, {}))
+        
+        query_future.add_done_callback(resolve)
+        return futures
+    
+    @staticmethod
+    def _project_repository_node(data: Dict[str, Any]) -> Dict[str, Any]:
+        node = data['repository']
+        return {
+            'name': node['name'],
+            'full_name': node['nameWithOwner'],
+            'description': node.get('description', ''),
+            'language': (node.get('primaryLanguage') or {}).get('name', ''),
+            'topics': [t['topic']['name'] for t in node['repositoryTopics']['nodes']],
+            'stars': node['stargazerCount'],
+            'forks': node['forkCount'],
+            'created_at': node['createdAt'],
+            'updated_at': node['updatedAt'],
+            'owner': {
+                'login': node['owner']['login'],
+                'type': node['owner']['__typename']
+            }
+        }
+    
+    def _project_readme_node(self, data: Dict[str, Any]) -> Optional[str]:
+        """The README under the first alias that exists, or None if none does"""
+        node = data['repository']
+        for alias in ('readmeMd', 'readmeLower', 'readmeRst', 'readmePlain'):
+            blob = node.get(alias)
+            if blob and blob.get('text') is not None:
+                # The blob arrives whole; capping and stripping still bounds the scan
+                return clean_readme(blob['text'], self.readme_max_bytes)
+        return None
+    
+    @staticmethod
+    def _project_commit_nodes(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        target = (data['repository'].get('defaultBranchRef') or {}).get('target') or {}
+        commits = []
+        for node in (target.get('history') or {}).get('nodes', []):
+            commits.append({
+                'sha': node['oid'][:7],
+                'message': node['message'],
+                'author': node['author']['name'],
+                'date': node['author']['date'],
+                'url': node['url']
+            })
+        return commits
+    
+    @staticmethod
+    def _project_issue_nodes(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        issues = []
+        for node in data['repository']['issues']['nodes']:
+            issues.append({
+                'number': node['number'],
+                'title': node['title'],
+                'body': node.get('body', ''),
+                'state': node['state'].lower(),
+                'comments': node['comments']['totalCount'],
+                'created_at': node['createdAt'],
+                'labels': [label['name'] for label in node['labels']['nodes']]
+            })
+        return issues
+    
+    @staticmethod
+    def _project_owner_node(data: Dict[str, Any]) -> Dict[str, Any]:
+        node = data.get('repositoryOwner')
+        if not node:
+            return {}
+        return {
+            'login': node['login'],
+            'name': node.get('name', ''),
+            'bio': node.get('bio', node.get('description', '')),
+            'company': node.get('company', ''),
+            'location': node.get('location', ''),
+            'email': node.get('email', ''),
+            'public_repos': node['repositories']['totalCount'],
+            'followers': (node.get('followers') or {}).get('totalCount', 0),
+            'following': (node.get('following') or {}).get('totalCount', 0),
+            'created_at': node['createdAt']
+        }
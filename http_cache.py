@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+class HTTPCache:
+    """Persistent validator cache for conditional GitHub requests
+    
+    Stores the ETag/Last-Modified validators of each URL together with the
+    projected payload the client kept from it, so a 304 can be answered
+    from disk without re-parsing the original response.
+    
+    stored_at is bumped on every revalidation, making it a last-used time:
+    entries unused for max_age are dropped on write, and every few writes
+    the least recently used entries are evicted down to the row and
+    payload-byte caps.
+    """
+    
+    PRUNE_EVERY = 64
+    
+    def __init__(self, db_path: Optional[str] = None, max_age: Optional[float] = None,
+                 max_entries: Optional[int] = None, max_bytes: Optional[int] = None):
+        data_dir = os.environ.get('DATA_DIR', 'data')
+        self.db_path = db_path or os.environ.get('GITHUB_HTTP_CACHE_PATH',
+                                                 os.path.join(data_dir, 'github_http_cache.db'))
+        self.max_age = max_age or float(os.environ.get('GITHUB_HTTP_CACHE_MAX_AGE', 7 * 86400))
+        self.max_entries = max_entries or int(os.environ.get('GITHUB_HTTP_CACHE_SIZE', 20000))
+        self.max_bytes = max_bytes or int(os.environ.get('GITHUB_HTTP_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats = {'revalidated': 0, 'stored': 0, 'evicted': 0}
+        
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        conn = self._connection()
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS http_cache (
+                                key TEXT PRIMARY KEY,
+                                etag TEXT,
+                                last_modified TEXT,
+                                payload TEXT NOT NULL,
+                                stored_at REAL NOT NULL)''')
+            conn.execute('CREATE INDEX IF NOT EXISTS http_cache_stored_at ON http_cache (stored_at)')
+    
+    @staticmethod
+    def make_key(url: str, params: Optional[Dict[str, Any]] = None, accept: Optional[str] = None,
+                 variant: Optional[str] = None) -> str:
+        """Build a cache key from the request URL, query and media type
+        
+        variant names local settings the stored payload depends on, so
+        payloads projected under other settings are not served.
+        """
+        query = '&'.join(f"{k}={params[k]}" for k in sorted(params)) if params else ''
+        key = f"{url}?{query}#{accept or ''}"
+        return f"{key}|{variant}" if variant else key
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored validators and payload for key, if any"""
+        try:
+            row = self._connection().execute(
+                'SELECT etag, last_modified, payload FROM http_cache WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"HTTP cache read failed for {key}: {e}")
+            return None
+        
+        if row is None:
+            return None
+        return {
+            'etag': row[0],
+            'last_modified': row[1],
+            'payload': json.loads(row[2])
+        }
+    
+    def set(self, key: str, etag: Optional[str], last_modified: Optional[str], payload: Any):
+        """Store validators and the projected payload for key"""
+        try:
+            conn = self._connection()
+            with conn:
+                now = time.time()
+                conn.execute('INSERT OR REPLACE INTO http_cache (key, etag, last_modified, payload, stored_at) '
+                             'VALUES (?, ?, ?, ?, ?)',
+                             (key, etag, last_modified, json.dumps(payload), now))
+                expired = conn.execute('DELETE FROM http_cache WHERE stored_at < ?', (now - self.max_age,)).rowcount
+            with self._lock:
+                self.stats['stored'] += 1
+                self.stats['evicted'] += expired
+                self._writes += 1
+                prune = self._writes % self.PRUNE_EVERY == 0
+            if prune:
+                self._prune()
+        except sqlite3.Error as e:
+            logger.warning(f"HTTP cache write failed for {key}: {e}")
+    
+    def _prune(self):
+        """Evict least recently used entries until under both caps, with some headroom"""
+        conn = self._connection()
+        with conn:
+            rows, size = conn.execute('SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM http_cache').fetchone()
+            if rows <= self.max_entries and size <= self.max_bytes:
+                return
+            # Evict to 90% so the next few writes don't prune again
+            excess_rows = rows - int(self.max_entries * 0.9)
+            excess_bytes = size - int(self.max_bytes * 0.9)
+            victims = []
+            for key, length in conn.execute('SELECT key, LENGTH(payload) FROM http_cache ORDER BY stored_at'):
+                if excess_rows <= 0 and excess_bytes <= 0:
+                    break
+                victims.append((key,))
+                excess_rows -= 1
+                excess_bytes -= length
+            conn.executemany('DELETE FROM http_cache WHERE key = ?', victims)
+        with self._lock:
+            self.stats['evicted'] += len(victims)
+        logger.info(f"Evicted {len(victims)} GitHub HTTP cache entries")
+    
+    def record_revalidation(self, key: Optional[str] = None):
+        """Count a 304 served from the cache and mark its entry as recently used"""
+        with self._lock:
+            self.stats['revalidated'] += 1
+        if key is None:
+            return
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute('UPDATE http_cache SET stored_at = ? WHERE key = ?', (time.time(), key))
+        except sqlite3.Error as e:
+            logger.warning(f"HTTP cache write failed for {key}: {e}")
@@ -0,0 +1,185 @@
+import os
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, Optional, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+class QueueFull(Exception):
+    """The job queue is at capacity"""
+
+class JobQueue:
+    """Background analysis jobs run by a bounded worker pool
+    
+    Submitting returns a job id immediately; workers run the pipeline and
+    record the outcome in a SQLite table under DATA_DIR, so any gunicorn
+    worker can answer a poll. A submission for a repository that already
+    has a queued or running job returns that job instead of a new one.
+    """
+    
+    ACTIVE = ('queued', 'running')
+    
+    def __init__(self, analyze: Callable[[str, str], Dict[str, Any]], db_path: Optional[str] = None,
+                 max_workers: Optional[int] = None, max_queue: Optional[int] = None,
+                 job_timeout: Optional[int] = None, result_ttl: Optional[int] = None):
+        data_dir = os.environ.get('DATA_DIR', 'data')
+        self.analyze = analyze
+        self.db_path = db_path or os.environ.get('JOB_DB_PATH', os.path.join(data_dir, 'jobs.db'))
+        self.max_workers = max_workers or int(os.environ.get('JOB_WORKERS', 4))
+        self.max_queue = max_queue or int(os.environ.get('JOB_QUEUE_SIZE', 100))
+        self.job_timeout = job_timeout or int(os.environ.get('JOB_TIMEOUT', 300))
+        self.result_ttl = result_ttl or int(os.environ.get('JOB_RESULT_TTL', 3600))
+        
+        self._queue: 'queue.Queue[str]' = queue.Queue(maxsize=self.max_queue)
+        self._lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        self._workers = []
+        self._busy = 0
+        self._local = threading.local()
+        
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS jobs (
+                                id TEXT PRIMARY KEY,
+                                key TEXT NOT NULL,
+                                username TEXT NOT NULL,
+                                repo TEXT NOT NULL,
+                                status TEXT NOT NULL,
+                                result TEXT,
+                                error TEXT,
+                                created_at TEXT NOT NULL,
+                                updated_at REAL NOT NULL)''')
+            conn.execute('CREATE INDEX IF NOT EXISTS jobs_key_status ON jobs (key, status)')
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    def _start_workers(self):
+        # Started lazily so gunicorn's pre-fork import doesn't strand threads
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            while len(self._workers) < self.max_workers:
+                worker = threading.Thread(target=self._work, name=f'analysis-job-{len(self._workers)}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+    
+    def submit(self, username: str, repo: str) -> Dict[str, Any]:
+        """Queue an analysis, or return the job already in flight for this repository"""
+        key = f"{username.lower()}/{repo.lower()}"
+        conn = self._connection()
+        stale_before = time.time() - self.job_timeout
+        
+        with self._lock:
+            with conn:
+                conn.execute("UPDATE jobs SET status = 'failed', error = 'Job timed out', updated_at = ? "
+                             "WHERE status IN (?, ?) AND updated_at < ?", (time.time(), *self.ACTIVE, stale_before))
+                row = conn.execute('SELECT id FROM jobs WHERE key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1',
+                                   (key, *self.ACTIVE)).fetchone()
+                if row is not None:
+                    job = self.get(row[0])
+                    job['merged'] = True
+                    return job
+                
+                # Only submitters put, and they hold the lock, so this check holds until put
+                if self._queue.full():
+                    raise QueueFull(f"{self.max_queue} analyses already queued")
+                
+                job_id = uuid.uuid4().hex
+                conn.execute('INSERT INTO jobs (id, key, username, repo, status, created_at, updated_at) '
+                             'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             (job_id, key, username, repo, 'queued', datetime.now().isoformat(), time.time()))
+                conn.execute("DELETE FROM jobs WHERE status NOT IN (?, ?) AND updated_at < ?",
+                             (*self.ACTIVE, time.time() - self.result_ttl))
+            
+            # Enqueue after commit so workers always find the row
+            self._queue.put_nowait(job_id)
+        
+        self._start_workers()
+        job = self.get(job_id)
+        job['merged'] = False
+        return job
+    
+    def get(self, job_id: str, wait: float = 0) -> Optional[Dict[str, Any]]:
+        """Return a job, optionally waiting up to wait seconds for it to finish"""
+        deadline = time.time() + wait
+        while True:
+            row = self._connection().execute(
+                'SELECT id, username, repo, status, result, error, created_at, updated_at FROM jobs WHERE id = ?',
+                (job_id,)).fetchone()
+            if row is None:
+                return None
+            
+            job = {
+                'id': row[0],
+                'username': row[1],
+                'repo': row[2],
+                'status': row[3],
+                'created_at': row[6],
+                'updated_at': datetime.fromtimestamp(row[7]).isoformat()
+            }
+            if row[4] is not None:
+                job['result'] = json.loads(row[4])
+            if row[5] is not None:
+                job['error'] = row[5]
+            
+            remaining = deadline - time.time()
+            if job['status'] not in self.ACTIVE or remaining <= 0:
+                return job
+            # Jobs of this process wake us directly; others are picked up by polling
+            with self._finished:
+                self._finished.wait(min(remaining, 0.5))
+    
+    def _set_status(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+                    error: Optional[str] = None):
+        conn = self._connection()
+        with conn:
+            conn.execute('UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?',
+                         (status, json.dumps(result) if result is not None else None, error, time.time(), job_id))
+    
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                self._busy += 1
+            try:
+                job = self.get(job_id)
+                if job is None or job['status'] != 'queued':
+                    continue
+                self._set_status(job_id, 'running')
+                try:
+                    result = self.analyze(job['username'], job['repo'])
+                    self._set_status(job_id, 'done', result=result)
+                except Exception as e:
+                    logger.error(f"Job {job_id}: Error analyzing {job['username']}/{job['repo']}: {e}")
+                    self._set_status(job_id, 'failed', error=str(e))
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    self._finished.notify_all()
+                self._queue.task_done()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue length and worker utilization"""
+        with self._lock:
+            return {
+                'queued': self._queue.qsize(),
+                'queue_capacity': self.max_queue,
+                'workers': self.max_workers,
+                'busy_workers': self._busy,
+                'utilization': round(self._busy / self.max_workers, 2)
+            }
@@ -0,0 +1,132 @@
+import logging
+from collections import Counter
+from operator import itemgetter
+from typing import Dict, List, Iterable, Optional
+
+try:
+    import ahocorasick
+except ImportError:  # optional C extension, see requirements.txt
+    ahocorasick = None
+
+logger = logging.getLogger(__name__)
+
+class KeywordMatcher:
+    """Count many keywords and phrases in a single pass over a text
+    
+    Counts follow str.count semantics: occurrences of the same pattern do not
+    overlap, while different patterns may overlap freely ('doc' and
+    'document' both count in 'documentation'). Text is expected to be
+    lowercased already.
+    
+    Uses an Aho-Corasick automaton when pyahocorasick is installed. Without
+    it, falls back to one str.count per distinct pattern, which is still
+    C-speed and avoids scanning for duplicated keywords.
+    """
+    
+    @staticmethod
+    def _self_overlapping(pattern: str) -> bool:
+        """Whether two occurrences of pattern can overlap ('test' in 'testest')"""
+        return any(pattern[:k] == pattern[-k:] for k in range(1, len(pattern)))
+    
+    def __init__(self, patterns: Iterable[str]):
+        self.patterns = sorted(set(patterns))
+        self._automaton = None
+        self._position_automaton = None
+        self._counted_separately = self.patterns
+        
+        # Occurrences of a pattern without a border can never overlap, so
+        # the automaton's raw match counts already equal str.count. The few
+        # self-overlapping patterns keep str.count, which handles them in C.
+        automaton_patterns = [p for p in self.patterns if not self._self_overlapping(p)]
+        if ahocorasick is not None and automaton_patterns:
+            automaton = ahocorasick.Automaton()
+            for pattern in automaton_patterns:
+                automaton.add_word(pattern, pattern)
+            automaton.make_automaton()
+            self._automaton = automaton
+            self._counted_separately = [p for p in self.patterns if self._self_overlapping(p)]
+        else:
+            logger.info("pyahocorasick not installed, using str.count keyword matching")
+    
+    def count(self, text: str) -> Dict[str, int]:
+        """Return the number of non-overlapping occurrences of each pattern"""
+        counts = dict.fromkeys(self.patterns, 0)
+        if not text:
+            return counts
+        
+        if self._automaton is not None:
+            # Counter consumes the match iterator in C, keeping the per-match
+            # cost out of the interpreter loop
+            counts.update(Counter(map(itemgetter(1), self._automaton.iter(text))))
+        for pattern in self._counted_separately:
+            counts[pattern] = text.count(pattern)
+        return counts
+    
+    def match_ends(self, text: str) -> List[int]:
+        """End offsets of pattern occurrences in text, unordered
+        
+        Meant for locating which part of a joined text matched; unlike
+        count, overlapping occurrences of one pattern may all be reported.
+        """
+        if not text:
+            return []
+        if ahocorasick is not None:
+            if self._position_automaton is None:
+                # Overlaps don't matter for positions, so every pattern fits one automaton
+                automaton = ahocorasick.Automaton()
+                for pattern in self.patterns:
+                    automaton.add_word(pattern, pattern)
+                automaton.make_automaton()
+                self._position_automaton = automaton
+            return list(map(itemgetter(0), self._position_automaton.iter(text)))
+        
+        ends = []
+        for pattern in self.patterns:
+            start = text.find(pattern)
+            while start >= 0:
+                ends.append(start + len(pattern) - 1)
+                start = text.find(pattern, start + 1)
+        return ends
+
+
+class StreamingCounter:
+    """Accumulate KeywordMatcher counts over text fed in consecutive pieces
+    
+    Pieces are counted independently, then occurrences crossing a piece
+    boundary are added by re-counting a small window around it, so memory
+    stays flat however much text is fed. Totals equal counting the joined
+    text, except that a self-overlapping pattern ('test') may differ by one
+    where two of its occurrences overlap right at a boundary.
+    """
+    
+    def __init__(self, matcher: KeywordMatcher, counts: Optional[Dict[str, int]] = None):
+        self.matcher = matcher
+        self.counts = dict.fromkeys(matcher.patterns, 0)
+        if counts:
+            for pattern, count in counts.items():
+                if pattern in self.counts:
+                    self.counts[pattern] = count
+        self.overlap = max((len(p) for p in matcher.patterns), default=1) - 1
+        self._tail = ''
+    
+    def feed(self, text: str):
+        """Count a piece of (lowercased) text as if appended to everything fed so far"""
+        if not text:
+            return
+        
+        for pattern, count in self.matcher.count(text).items():
+            if count:
+                self.counts[pattern] += count
+        
+        if self._tail and self.overlap:
+            head = text[:self.overlap]
+            window = self.matcher.count(self._tail + head)
+            tail_counts = self.matcher.count(self._tail)
+            head_counts = self.matcher.count(head)
+            for pattern, count in window.items():
+                crossing = count - tail_counts[pattern] - head_counts[pattern]
+                if crossing > 0:
+                    self.counts[pattern] += crossing
+        
+        if self.overlap:
+            self._tail = (self._tail + text)[-self.overlap:]
@@ -0,0 +1,142 @@
+import os
+import re
+import logging
+import subprocess
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+from readme_stream import read_readme, max_readme_bytes
+
+logger = logging.getLogger(__name__)
+
+README_NAMES = ['README.md', 'readme.md', 'README.rst', 'README.txt', 'README', 'Readme.md']
+
+LANGUAGES = {
+    '.py': 'Python', '.js': 'JavaScript', '.ts': 'TypeScript', '.go': 'Go', '.rs': 'Rust',
+    '.java': 'Java', '.rb': 'Ruby', '.c': 'C', '.h': 'C', '.cpp': 'C++', '.cc': 'C++',
+    '.cs': 'C#', '.php': 'PHP', '.swift': 'Swift', '.kt': 'Kotlin', '.scala': 'Scala',
+    '.sh': 'Shell', '.ipynb': 'Jupyter Notebook', '.html': 'HTML', '.css': 'CSS'
+}
+
+class LocalRepositoryClient:
+    """Read analysis inputs from a local git checkout instead of the GitHub API
+    
+    Produces the same get_repository_data dict as GitHubClient from the
+    README, `git log` and git config. Fields that only exist on GitHub
+    (stars, forks, topics, issues, profile details) are left empty.
+    """
+    
+    def __init__(self, git: str = 'git', commit_limit: int = 50):
+        self.git = git
+        self.commit_limit = commit_limit
+        self.readme_max_bytes = max_readme_bytes()
+    
+    def _git(self, path: str, *args: str) -> str:
+        result = subprocess.run([self.git, '-C', path, *args], capture_output=True, check=True)
+        return result.stdout.decode('utf-8', errors='replace')
+    
+    def _remote(self, path: str) -> Optional[tuple]:
+        """(owner, repo) parsed from the origin URL, if it points at a forge"""
+        try:
+            url = self._git(path, 'config', '--get', 'remote.origin.url').strip()
+        except subprocess.CalledProcessError:
+            return None
+        match = re.search(r'[:/]([^/:]+)/([^/]+?)(?:\.git)?/?$', url)
+        return (match.group(1), match.group(2)) if match else None
+    
+    def get_readme(self, path: str) -> str:
+        """Get README content from the working tree"""
+        for name in README_NAMES:
+            readme_path = os.path.join(path, name)
+            if os.path.isfile(readme_path):
+                with open(readme_path, 'rb') as f:
+                    return read_readme(iter(lambda: f.read(16384), b''), self.readme_max_bytes)
+        return ""
+    
+    def get_commits(self, path: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get recent commits from `git log`"""
+        try:
+            # Unit/record separators keep multi-line messages intact
+            output = self._git(path, 'log', f'-n{limit or self.commit_limit}',
+                               '--format=%H%x1f%an%x1f%aI%x1f%B%x1e')
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Error reading commits in {path}: {e}")
+            return []
+        
+        commits = []
+        for record in output.split('\x1e'):
+            fields = record.strip('\n').split('\x1f')
+            if len(fields) != 4:
+                continue
+            sha, author, date, message = fields
+            commits.append({
+                'sha': sha[:7],
+                'message': message.strip(),
+                'author': author,
+                'date': date,
+                'url': ''
+            })
+        return commits
+    
+    def get_language(self, path: str) -> str:
+        """Most common language among tracked files, by extension"""
+        try:
+            files = self._git(path, 'ls-files').splitlines()
+        except subprocess.CalledProcessError:
+            return ''
+        languages = Counter(LANGUAGES[ext] for ext in (os.path.splitext(f)[1].lower() for f in files)
+                            if ext in LANGUAGES)
+        return languages.most_common(1)[0][0] if languages else ''
+    
+    def get_repository(self, path: str) -> Dict[str, Any]:
+        """Get repository metadata from git config and history"""
+        path = os.path.abspath(path)
+        remote = self._remote(path)
+        owner, name = remote if remote else ('local', os.path.basename(path.rstrip(os.sep)))
+        
+        try:
+            # Root and tip only: no walk over the whole history
+            last = self._git(path, 'log', '-1', '--format=%aI').strip()
+            roots = self._git(path, 'rev-list', '--max-parents=0', 'HEAD').split()
+            # rev-list lists newest first; merged histories have several roots
+            first = self._git(path, 'log', '-1', '--format=%aI', roots[-1]).strip() if roots else ''
+        except subprocess.CalledProcessError as e:
+            logger.error(f"Error reading repository {path}: {e}")
+            raise
+        
+        description = ''
+        description_path = os.path.join(path, '.git', 'description')
+        if os.path.isfile(description_path):
+            with open(description_path, encoding='utf-8', errors='replace') as f:
+                description = f.read().strip()
+            # git's placeholder text is not a description
+            if description.startswith('Unnamed repository'):
+                description = ''
+        
+        return {
+            'name': name,
+            'full_name': f"{owner}/{name}",
+            'description': description,
+            'language': self.get_language(path),
+            'topics': [],
+            'stars': 0,
+            'forks': 0,
+            'created_at': first,
+            'updated_at': last,
+            'owner': {
+                'login': owner,
+                'type': 'User'
+            }
+        }
+    
+    def get_repository_data(self, path: str) -> Dict[str, Any]:
+        """Get comprehensive repository data for analysis"""
+        repo_data = self.get_repository(path)
+        return {
+            'repository': repo_data,
+            'readme': self.get_readme(path),
+            'commits': self.get_commits(path),
+            'issues': [],
+            'user': {'login': repo_data['owner']['login']},
+            'fetched_at': datetime.now().isoformat()
+        }
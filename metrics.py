@@ -0,0 +1,155 @@
+import time
+import bisect
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Callable, Iterable, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# (name, type, help, [(labels, value), ...]) as produced by collectors
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+def _escape(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(labels: Dict[str, Any]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items()) + '}'
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Histogram:
+    """Cumulative-bucket histogram with labels, in Prometheus semantics"""
+    
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[tuple, List[float]] = {}
+        self._lock = threading.Lock()
+    
+    def observe(self, value: float, **labels: Any):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts, then sum and count
+                series = self._series[key] = [0.0] * (len(self.buckets) + 3)
+            series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+    
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            snapshot = {key: list(series) for key, series in self._series.items()}
+        for key, series in sorted(snapshot.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{_format_labels({**labels, "le": _format_value(bound)})} '
+                             f'{int(cumulative)}')
+            lines.append(f'{self.name}_sum{_format_labels(labels)} {series[-2]!r}')
+            lines.append(f'{self.name}_count{_format_labels(labels)} {int(series[-1])}')
+        return lines
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text format
+    
+    Histograms are updated as work happens; collectors are called at scrape
+    time to read gauges and counters other components already keep (cache
+    stats, GitHub quota). Under gunicorn each worker has its own registry.
+    """
+    
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+    
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = Histogram(name, documentation, labelnames, buckets)
+            return self._histograms[name]
+    
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        with self._lock:
+            self._collectors.append(collector)
+    
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            histograms = list(self._histograms.values())
+            collectors = list(self._collectors)
+        for histogram in histograms:
+            lines.extend(histogram.render())
+        for collector in collectors:
+            try:
+                families = list(collector())
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+                continue
+            for name, kind, documentation, samples in families:
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {kind}')
+                for labels, value in samples:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.histogram(
+    'contextbuilder_stage_duration_seconds', 'Time spent in each analysis stage', ['stage'])
+github_request_seconds = registry.histogram(
+    'contextbuilder_github_request_duration_seconds',
+    'GitHub API call latency, including time queued for rate-limit quota', ['endpoint', 'status'])
+http_request_seconds = registry.histogram(
+    'contextbuilder_http_request_duration_seconds', 'Time to produce each HTTP response',
+    ['endpoint', 'method', 'status'])
+
+# Stage timings of the request being served, shared with the threads it fans out to
+request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    'request_timings', default=None)
+
+def record(name: str, seconds: float):
+    """Add a duration to the current request's Server-Timing entries"""
+    timings = request_timings.get()
+    if timings is not None:
+        timings.append((name, seconds))
+
+@contextmanager
+def stage(name: str):
+    """Time a block as an analysis stage"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage=name)
+        record(name, elapsed)
+
+def server_timing(timings: List[Tuple[str, float]]) -> str:
+    """Format timings as a Server-Timing header, merging repeated names"""
+    merged: Dict[str, List[float]] = {}
+    for name, seconds in timings:
+        merged.setdefault(name, []).append(seconds)
+    entries = []
+    for name, durations in merged.items():
+        entry = f'{name};dur={sum(durations) * 1000:.1f}'
+        if len(durations) > 1:
+            entry += f';desc="{len(durations)} calls"'
+        entries.append(entry)
+    return ', '.join(entries)
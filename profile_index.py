@@ -0,0 +1,262 @@
+import os
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from typing import Dict, List, Optional, Any, Iterable, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class _ClusterIndex:
+    """Inverted-file approximate index over unit-length rows
+    
+    Rows are grouped under the nearest of ~sqrt(n) centroids found by
+    spherical k-means on a sample; a query scores the centroids and then
+    only the rows of the nprobe closest clusters.
+    """
+    
+    def __init__(self, matrix: np.ndarray, seed: int = 0, sample: int = 100_000,
+                 iterations: int = 8, batch: int = 65536):
+        rows = matrix.shape[0]
+        self.rows = rows
+        clusters = max(1, int(np.sqrt(rows)))
+        rng = np.random.default_rng(seed)
+        training = np.asarray(matrix[np.sort(rng.choice(rows, min(rows, sample), replace=False))])
+        
+        centroids = training[rng.choice(len(training), clusters, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(training @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, training)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their old centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        self.centroids = centroids.astype(np.float32)
+        
+        assignment = np.empty(rows, dtype=np.int32)
+        for start in range(0, rows, batch):
+            block = np.asarray(matrix[start:start + batch])
+            assignment[start:start + batch] = np.argmax(block @ self.centroids.T, axis=1)
+        self.order = np.argsort(assignment, kind='stable').astype(np.int64)
+        self.offsets = np.searchsorted(assignment[self.order], np.arange(len(self.centroids) + 1))
+    
+    def candidates(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        nprobe = min(nprobe, len(self.centroids))
+        nearest = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        return np.concatenate([self.order[self.offsets[c]:self.offsets[c + 1]] for c in nearest])
+
+class ProfileIndex:
+    """Belief-profile vectors of analysed repositories, searchable by cosine similarity
+    
+    Vectors are stored unit-length in a float32 memory-mapped matrix under
+    DATA_DIR, one row per repository, with row numbers and metadata in a
+    SQLite table beside it; a re-analysis overwrites the repository's row.
+    Files are named after the vector layout, so a change to the extractor's
+    dimensions starts a fresh index. Writers serialize on the SQLite write
+    lock (which also guards growing the matrix file), so gunicorn workers
+    can share one index; readers remap when the file has grown.
+    
+    Queries score every row with one matrix-vector product. Above
+    PROFILE_INDEX_APPROXIMATE_ROWS rows, an approximate cluster index is
+    built in the background and used once ready; rows added since it was
+    built are always scored exactly.
+    """
+    
+    GROWTH_ROWS = 65536
+    
+    def __init__(self, dimensions: List[str], directory: Optional[str] = None,
+                 approximate_rows: Optional[int] = None, nprobe: Optional[int] = None):
+        data_dir = os.environ.get('DATA_DIR', 'data')
+        self.directory = directory or os.environ.get('PROFILE_INDEX_DIR', os.path.join(data_dir, 'profile_index'))
+        self.dimensions = list(dimensions)
+        self.width = len(self.dimensions)
+        self.approximate_rows = approximate_rows or int(os.environ.get('PROFILE_INDEX_APPROXIMATE_ROWS', 1_000_000))
+        self.nprobe = nprobe or int(os.environ.get('PROFILE_INDEX_NPROBE', 16))
+        
+        layout = hashlib.sha256('\n'.join(self.dimensions).encode('utf-8')).hexdigest()[:12]
+        os.makedirs(self.directory, exist_ok=True)
+        self.db_path = os.path.join(self.directory, f'profiles-{layout}.db')
+        self.matrix_path = os.path.join(self.directory, f'profiles-{layout}.f32')
+        
+        self._local = threading.local()
+        self._map_lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+        self._clusters: Optional[_ClusterIndex] = None
+        self._building = False
+        
+        if not os.path.exists(self.matrix_path):
+            open(self.matrix_path, 'ab').close()
+        conn = self._connection()
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS profiles (
+                                row INTEGER PRIMARY KEY,
+                                key TEXT NOT NULL UNIQUE,
+                                username TEXT NOT NULL,
+                                repo TEXT NOT NULL,
+                                archetype TEXT,
+                                updated_at REAL NOT NULL)''')
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    @staticmethod
+    def _key(username: str, repo: str) -> str:
+        return f"{username.lower()}/{repo.lower()}"
+    
+    def _map(self, rows: int) -> np.memmap:
+        """The matrix mapped over at least rows rows"""
+        with self._map_lock:
+            if self._matrix is None or self._matrix.shape[0] < rows:
+                capacity = os.path.getsize(self.matrix_path) // (4 * self.width)
+                if capacity < rows:
+                    raise RuntimeError(f"Profile matrix holds {capacity} rows, expected {rows}")
+                self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='r+',
+                                         shape=(capacity, self.width))
+            return self._matrix
+    
+    def add(self, username: str, repo: str, vector: List[float], archetype: Optional[str] = None):
+        """Store or replace a repository's profile vector"""
+        self.add_many([(username, repo, vector, archetype)])
+    
+    def add_many(self, profiles: Iterable[Tuple[str, str, List[float], Optional[str]]]):
+        """Store or replace (username, repo, vector, archetype) profiles in one write"""
+        profiles = list(profiles)
+        if not profiles:
+            return
+        values = np.asarray([profile[2] for profile in profiles], dtype=np.float32).reshape(len(profiles), -1)
+        if values.shape[1] != self.width:
+            raise ValueError(f"Profile vectors have {values.shape[1]} components, expected {self.width}")
+        norms = np.linalg.norm(values, axis=1, keepdims=True)
+        values = np.divide(values, norms, out=np.zeros_like(values), where=norms > 0)
+        
+        conn = self._connection()
+        # IMMEDIATE takes the write lock up front, serializing row allocation
+        # and file growth across processes
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            next_row = conn.execute('SELECT COALESCE(MAX(row) + 1, 0) FROM profiles').fetchone()[0]
+            rows = []
+            assigned: Dict[str, int] = {}
+            for username, repo, _, _ in profiles:
+                key = self._key(username, repo)
+                if key not in assigned:
+                    found = conn.execute('SELECT row FROM profiles WHERE key = ?', (key,)).fetchone()
+                    if found:
+                        assigned[key] = found[0]
+                    else:
+                        assigned[key] = next_row
+                        next_row += 1
+                rows.append(assigned[key])
+            
+            if os.path.getsize(self.matrix_path) < next_row * 4 * self.width:
+                capacity = ((next_row - 1) // self.GROWTH_ROWS + 1) * self.GROWTH_ROWS
+                with open(self.matrix_path, 'r+b') as f:
+                    f.truncate(capacity * 4 * self.width)
+            # Vectors land before their rows become visible to readers
+            self._map(next_row)[rows] = values
+            now = time.time()
+            conn.executemany('INSERT OR REPLACE INTO profiles (row, key, username, repo, archetype, updated_at) '
+                             'VALUES (?, ?, ?, ?, ?, ?)',
+                             [(row, self._key(username, repo), username, repo, archetype, now)
+                              for row, (username, repo, _, archetype) in zip(rows, profiles)])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+    
+    def count(self) -> int:
+        return self._connection().execute('SELECT COALESCE(MAX(row) + 1, 0) FROM profiles').fetchone()[0]
+    
+    def _row(self, username: str, repo: str) -> Optional[int]:
+        found = self._connection().execute('SELECT row FROM profiles WHERE key = ?',
+                                           (self._key(username, repo),)).fetchone()
+        return found[0] if found else None
+    
+    def contains(self, username: str, repo: str) -> bool:
+        return self._row(username, repo) is not None
+    
+    def _build_clusters(self, rows: int):
+        try:
+            started = time.perf_counter()
+            clusters = _ClusterIndex(self._map(rows)[:rows])
+            self._clusters = clusters
+            logger.info(f"Built approximate profile index over {rows} rows in "
+                        f"{time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            logger.error(f"Building approximate profile index failed: {e}")
+        finally:
+            self._building = False
+    
+    def _candidates(self, query: np.ndarray, rows: int) -> Optional[np.ndarray]:
+        """Rows to score exactly, or None to score all of them"""
+        if rows < self.approximate_rows:
+            return None
+        clusters = self._clusters
+        # Rebuild once the index covers less than ~80% of the rows
+        if (clusters is None or clusters.rows * 1.25 < rows) and not self._building:
+            self._building = True
+            threading.Thread(target=self._build_clusters, args=(rows,), name='profile-index-build',
+                             daemon=True).start()
+        if clusters is None:
+            return None
+        return np.concatenate([clusters.candidates(query, self.nprobe),
+                               np.arange(clusters.rows, rows)])
+    
+    def similar(self, username: str, repo: str, k: int = 10) -> Optional[List[Dict[str, Any]]]:
+        """The k stored profiles closest to a repository's, most similar first
+        
+        Returns None when the repository has no stored profile.
+        """
+        row = self._row(username, repo)
+        if row is None:
+            return None
+        rows = self.count()
+        matrix = self._map(rows)
+        query = np.array(matrix[row])
+        if not query.any():
+            # No beliefs or archetype signal to compare
+            return []
+        
+        candidates = self._candidates(query, rows)
+        if candidates is None:
+            candidates = np.arange(rows)
+            scores = matrix[:rows] @ query
+        else:
+            scores = matrix[candidates] @ query
+        scores[candidates == row] = -np.inf
+        
+        k = min(k, len(candidates) - 1)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        best = {int(candidates[i]): float(scores[i]) for i in top}
+        
+        placeholders = ','.join('?' * len(best))
+        metadata = {found[0]: found[1:] for found in self._connection().execute(
+            f'SELECT row, username, repo, archetype, updated_at FROM profiles WHERE row IN ({placeholders})',
+            list(best))}
+        return [{
+            'username': metadata[match][0],
+            'repo': metadata[match][1],
+            'archetype': metadata[match][2],
+            'similarity': round(score, 4),
+            'indexed_at': metadata[match][3]
+        } for match, score in best.items() if match in metadata]
+    
+    def stats(self) -> Dict[str, Any]:
+        clusters = self._clusters
+        return {
+            'profiles': self.count(),
+            'dimensions': self.width,
+            'approximate_rows': clusters.rows if clusters else 0
+        }
@@ -0,0 +1,184 @@
+import os
+import re
+import sys
+import hmac
+import uuid
+import random
+import logging
+import threading
+import tracemalloc
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+def authorized(token: Optional[str]) -> bool:
+    """Whether a request token matches ADMIN_TOKEN; always False when it is unset"""
+    expected = os.environ.get('ADMIN_TOKEN')
+    return bool(expected and token and hmac.compare_digest(token, expected))
+
+class SamplingProfiler:
+    """Sample one thread's Python stack at a fixed interval
+    
+    A daemon thread reads the target thread's current frame, so the profiled
+    code runs unmodified and the overhead is one stack walk per interval.
+    Stacks are kept in the collapsed format ('outer;inner count') read by
+    flamegraph.pl, speedscope and most flamegraph viewers.
+    """
+    
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+    
+    @staticmethod
+    def _frame_name(frame) -> str:
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+    
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+    
+    def start(self):
+        self._sampler = threading.Thread(target=self._run, name='profile-sampler', daemon=True)
+        self._sampler.start()
+    
+    def stop(self) -> Counter:
+        self._stop.set()
+        if self._sampler:
+            self._sampler.join()
+        return self.stacks
+
+class RequestProfiler:
+    """Profile selected requests and write their stacks under PROFILE_DIR
+    
+    A request is profiled when it carries X-Profile-Token matching
+    ADMIN_TOKEN, or at random with probability PROFILE_SAMPLE_RATE.
+    """
+    
+    HEADER = 'X-Profile-Token'
+    
+    def __init__(self, directory: Optional[str] = None, sample_rate: Optional[float] = None,
+                 interval: Optional[float] = None):
+        data_dir = os.environ.get('DATA_DIR', 'data')
+        self.directory = directory or os.environ.get('PROFILE_DIR', os.path.join(data_dir, 'profiles'))
+        self.sample_rate = sample_rate if sample_rate is not None else float(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+        self.interval = interval or float(os.environ.get('PROFILE_INTERVAL_MS', 5)) / 1000
+    
+    def should_profile(self, headers: Dict[str, str]) -> bool:
+        if authorized(headers.get(self.HEADER)):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+    
+    @contextmanager
+    def profile(self, name: str):
+        """Sample the calling thread for the duration of the block
+        
+        Yields a dict whose 'path' is set to the written profile on exit.
+        """
+        result: Dict[str, Any] = {'path': None}
+        profiler = SamplingProfiler(interval=self.interval)
+        profiler.start()
+        try:
+            yield result
+        finally:
+            stacks = profiler.stop()
+            try:
+                result['path'] = self._write(name, stacks)
+            except OSError as e:
+                logger.error(f"Could not write profile for {name}: {e}")
+    
+    def _write(self, name: str, stacks: Counter) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', name).lstrip('.')
+        filename = f"{datetime.now():%Y%m%dT%H%M%S}-{safe_name}-{uuid.uuid4().hex[:6]}.folded"
+        path = os.path.join(self.directory, filename)
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        logger.info(f"Wrote profile {path} ({sum(stacks.values())} samples)")
+        return path
+
+class MemorySnapshots:
+    """tracemalloc snapshots taken on demand and diffed against each other
+    
+    Tracing starts with the first snapshot and stops on clear(), so there
+    is no allocation overhead until someone asks. Snapshots are per process.
+    """
+    
+    def __init__(self, max_snapshots: Optional[int] = None, frames: Optional[int] = None):
+        self.max_snapshots = max_snapshots or int(os.environ.get('TRACEMALLOC_SNAPSHOTS', 10))
+        self.frames = frames or int(os.environ.get('TRACEMALLOC_FRAMES', 5))
+        self._snapshots: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def take(self) -> Dict[str, Any]:
+        """Take a snapshot, starting tracing first if needed"""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+                tracemalloc.Filter(False, '<unknown>')
+            ])
+            current, peak = tracemalloc.get_traced_memory()
+            snapshot_id = uuid.uuid4().hex[:12]
+            info = {
+                'id': snapshot_id,
+                'taken_at': datetime.now().isoformat(),
+                'traced_bytes': current,
+                'peak_bytes': peak
+            }
+            self._snapshots[snapshot_id] = {'info': info, 'snapshot': snapshot}
+            while len(self._snapshots) > self.max_snapshots:
+                self._snapshots.popitem(last=False)
+            return info
+    
+    def snapshots(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [entry['info'] for entry in self._snapshots.values()]
+    
+    def diff(self, from_id: Optional[str] = None, to_id: Optional[str] = None,
+             limit: int = 20, group_by: str = 'lineno') -> Optional[Dict[str, Any]]:
+        """Top allocation changes between two snapshots (default: oldest to newest)"""
+        with self._lock:
+            if len(self._snapshots) < 2 and not (from_id and to_id):
+                return None
+            ids = list(self._snapshots)
+            older = self._snapshots.get(from_id or ids[0])
+            newer = self._snapshots.get(to_id or ids[-1])
+        if older is None or newer is None:
+            return None
+        
+        stats = newer['snapshot'].compare_to(older['snapshot'], group_by)
+        return {
+            'from': older['info'],
+            'to': newer['info'],
+            'top': [{
+                'location': str(stat.traceback[0]) if stat.traceback else '<unknown>',
+                'size_diff': stat.size_diff,
+                'size': stat.size,
+                'count_diff': stat.count_diff,
+                'count': stat.count,
+                **({'traceback': stat.traceback.format()} if group_by == 'traceback' else {})
+            } for stat in stats[:limit]]
+        }
+    
+    def clear(self):
+        """Drop all snapshots and stop tracing"""
+        with self._lock:
+            self._snapshots.clear()
+            if tracemalloc.is_tracing():
+                tracemalloc.stop()
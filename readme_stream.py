@@ -0,0 +1,141 @@
+import os
+import re
+import codecs
+import logging
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 512 * 1024
+
+FENCE = re.compile(r'^ {0,3}(`{3,}|~{3,})')
+REFERENCE_DEFINITION = re.compile(r'^ {0,3}\[[^\]]+\]:\s*\S+')
+TABLE_SEPARATOR = re.compile(r'^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$')
+# Order matters: images (badges) go before links, links keep their text
+INLINE_RULES = [
+    (re.compile(r'!\[[^\]]*\]\([^)]*\)|!\[[^\]]*\]\[[^\]]*\]'), ' '),
+    (re.compile(r'\[([^\]]*)\]\([^)]*\)|\[([^\]]*)\]\[[^\]]*\]'), lambda m: m.group(1) or m.group(2) or ''),
+    (re.compile(r'<[^>\n]*>'), ' '),
+    (re.compile(r'https?://\S+'), ' '),
+    (re.compile(r'[*`#>|~]+'), ' '),
+]
+
+def max_readme_bytes() -> int:
+    return int(os.environ.get('README_MAX_BYTES', DEFAULT_MAX_BYTES))
+
+def strip_markup() -> bool:
+    return os.environ.get('README_STRIP_MARKUP', 'True').lower() == 'true'
+
+def readme_settings() -> str:
+    """The settings that shape cleaned README text, for cache keys and versions"""
+    return f"max_bytes={max_readme_bytes()};strip={strip_markup()}"
+
+class ReadmeStripper:
+    """Strip Markdown/HTML markup from README text fed in pieces
+    
+    Works a line at a time, buffering only the current partial line, and
+    drops fenced code blocks, HTML comments, badges and other images,
+    reference definitions, table rulers, tags and URLs. Link text and
+    prose are kept, one output line per input line, so the words a
+    belief scan looks at survive while generated docs and code do not.
+    """
+    
+    def __init__(self):
+        self._partial = ''
+        self._fence: Optional[str] = None
+        self._in_comment = False
+    
+    def feed(self, text: str) -> str:
+        """Strip every complete line in text, holding back a trailing partial line"""
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        return ''.join(self._strip_line(line) for line in lines)
+    
+    def close(self) -> str:
+        """Strip whatever partial line is left"""
+        line, self._partial = self._partial, ''
+        return self._strip_line(line) if line else ''
+    
+    def _strip_line(self, line: str) -> str:
+        fence = FENCE.match(line)
+        if self._fence:
+            # A fence closes on the same character, at least as long
+            if fence and fence.group(1)[0] == self._fence[0] and len(fence.group(1)) >= len(self._fence):
+                self._fence = None
+            return ''
+        if fence:
+            self._fence = fence.group(1)
+            return ''
+        
+        line = self._strip_comments(line)
+        if REFERENCE_DEFINITION.match(line) or TABLE_SEPARATOR.match(line):
+            return ''
+        for pattern, replacement in INLINE_RULES:
+            line = pattern.sub(replacement, line)
+        line = ' '.join(line.split())
+        return line + '\n' if line else ''
+    
+    def _strip_comments(self, line: str) -> str:
+        kept = []
+        while line:
+            if self._in_comment:
+                end = line.find('-->')
+                if end < 0:
+                    return ''.join(kept)
+                line = line[end + 3:]
+                self._in_comment = False
+            else:
+                start = line.find('<!--')
+                if start < 0:
+                    kept.append(line)
+                    break
+                kept.append(line[:start])
+                line = line[start + 4:]
+                self._in_comment = True
+        return ' '.join(kept)
+
+def read_readme(chunks: Iterable[bytes], max_bytes: Optional[int] = None, strip: Optional[bool] = None) -> str:
+    """Decode README bytes as they arrive, stopping at max_bytes
+    
+    Only max_bytes of the raw file are ever read; with strip, markup is
+    removed chunk by chunk so the returned text holds prose alone.
+    """
+    if max_bytes is None:
+        max_bytes = max_readme_bytes()
+    if strip is None:
+        strip = strip_markup()
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    stripper = ReadmeStripper() if strip else None
+    parts: List[str] = []
+    remaining = max_bytes
+    
+    for chunk in chunks:
+        truncated = len(chunk) > remaining
+        if truncated:
+            chunk = chunk[:remaining]
+        remaining -= len(chunk)
+        text = decoder.decode(chunk)
+        parts.append(stripper.feed(text) if stripper else text)
+        if truncated:
+            logger.info(f"README truncated at {max_bytes} bytes")
+            break
+    
+    # A cut can split a multi-byte character; the decoder drops the remainder
+    if stripper:
+        parts.append(stripper.close())
+    return ''.join(parts)
+
+def clean_readme(text: str, max_bytes: Optional[int] = None, strip: Optional[bool] = None) -> str:
+    """Apply the same cap and stripping to a README already held in memory"""
+    if not text:
+        return ''
+    if max_bytes is None:
+        max_bytes = max_readme_bytes()
+    if len(text) * 4 > max_bytes:
+        encoded = text.encode('utf-8')
+        if len(encoded) > max_bytes:
+            text = encoded[:max_bytes].decode('utf-8', errors='ignore')
+    if not (strip_markup() if strip is None else strip):
+        return text
+    stripper = ReadmeStripper()
+    return stripper.feed(text) + stripper.close()
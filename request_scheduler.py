@@ -0,0 +1,219 @@
+import os
+import time
+import heapq
+import logging
+import threading
+import itertools
+import contextvars
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 10
+
+request_priority = contextvars.ContextVar('request_priority', default=INTERACTIVE)
+
+@contextmanager
+def priority(level: int):
+    """Run GitHub requests issued in this context at the given priority"""
+    reset = request_priority.set(level)
+    try:
+        yield
+    finally:
+        request_priority.reset(reset)
+
+class RateLimitExceeded(requests.RequestException):
+    """No token regained quota before the queue timeout"""
+
+class _Quota:
+    """Remaining quota of one token for one GitHub rate-limit resource"""
+    
+    def __init__(self):
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.reset: float = 0.0
+    
+    def available(self, now: float) -> bool:
+        return self.remaining is None or self.remaining > 0 or self.reset <= now
+
+class RequestScheduler:
+    """Rate-limit-aware scheduler rotating GitHub requests across tokens
+    
+    Tracks X-RateLimit-* headers per token and resource (core, graphql, ...),
+    sends each request with the token that has the most quota left, and
+    queues requests by priority instead of failing when every token is
+    exhausted. Interactive page loads are served ahead of background work.
+    Each resource has its own queue, so requests waiting out one resource's
+    reset never hold up another resource that still has quota.
+    """
+    
+    def __init__(self, tokens: Optional[List[str]] = None, max_in_flight: Optional[int] = None,
+                 queue_timeout: Optional[float] = None):
+        if tokens is None:
+            configured = os.environ.get('GITHUB_TOKENS') or os.environ.get('GITHUB_TOKEN') or ''
+            tokens = [token.strip() for token in configured.split(',') if token.strip()]
+        # None stands for anonymous access
+        self.tokens: List[Optional[str]] = tokens or [None]
+        self.max_in_flight = max_in_flight or int(os.environ.get('GITHUB_MAX_IN_FLIGHT', 32))
+        self.queue_timeout = queue_timeout or float(os.environ.get('GITHUB_QUEUE_TIMEOUT', 60))
+        
+        self._quotas: Dict[tuple, _Quota] = {}
+        self._queues: Dict[str, List[tuple]] = {}
+        self._sequence = itertools.count()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+    
+    @staticmethod
+    def _resource(url: str) -> str:
+        return 'graphql' if url.rstrip('/').endswith('/graphql') else 'core'
+    
+    def _quota(self, token: Optional[str], resource: str) -> _Quota:
+        key = (token, resource)
+        if key not in self._quotas:
+            self._quotas[key] = _Quota()
+        return self._quotas[key]
+    
+    def _pick_token(self, resource: str, now: float):
+        """Return (token, None) for the best token, or (None, wait) until one resets"""
+        best = None
+        best_remaining = -1
+        earliest_reset = None
+        for token in self.tokens:
+            quota = self._quota(token, resource)
+            if quota.available(now):
+                if quota.reset <= now and quota.remaining is not None and quota.remaining <= 0:
+                    quota.remaining = None
+                remaining = float('inf') if quota.remaining is None else quota.remaining
+                if remaining > best_remaining:
+                    best, best_remaining = token, remaining
+            elif earliest_reset is None or quota.reset < earliest_reset:
+                earliest_reset = quota.reset
+        
+        if best_remaining >= 0:
+            return best, None
+        return None, max(earliest_reset - now, 0.05)
+    
+    def _acquire(self, resource: str, level: int) -> Optional[str]:
+        ticket = (level, next(self._sequence))
+        deadline = time.time() + self.queue_timeout
+        with self._cond:
+            queue = self._queues.setdefault(resource, [])
+            heapq.heappush(queue, ticket)
+            try:
+                while True:
+                    now = time.time()
+                    wait = None
+                    if queue[0] == ticket and self._in_flight < self.max_in_flight:
+                        token, wait = self._pick_token(resource, now)
+                        if wait is None:
+                            heapq.heappop(queue)
+                            self._in_flight += 1
+                            quota = self._quota(token, resource)
+                            if quota.remaining is not None:
+                                quota.remaining -= 1
+                            self._cond.notify_all()
+                            return token
+                    
+                    if now >= deadline:
+                        raise RateLimitExceeded(f"GitHub rate limit exhausted on all {len(self.tokens)} token(s)")
+                    timeout = deadline - now if wait is None else min(wait, deadline - now)
+                    self._cond.wait(timeout)
+            except BaseException:
+                if ticket in queue:
+                    queue.remove(ticket)
+                    heapq.heapify(queue)
+                    self._cond.notify_all()
+                raise
+    
+    def _release(self, token: Optional[str], resource: str, response: Optional[requests.Response]):
+        with self._cond:
+            self._in_flight -= 1
+            if response is not None:
+                headers = response.headers
+                quota = self._quota(token, headers.get('X-RateLimit-Resource', resource))
+                try:
+                    if 'X-RateLimit-Remaining' in headers:
+                        quota.remaining = int(headers['X-RateLimit-Remaining'])
+                    if 'X-RateLimit-Limit' in headers:
+                        quota.limit = int(headers['X-RateLimit-Limit'])
+                    if 'X-RateLimit-Reset' in headers:
+                        quota.reset = float(headers['X-RateLimit-Reset'])
+                    if response.status_code in (403, 429) and 'Retry-After' in headers:
+                        # Secondary rate limit: back off this token for the advised time
+                        quota.remaining = 0
+                        quota.reset = time.time() + float(headers['Retry-After'])
+                except ValueError:
+                    logger.warning(f"Unparseable rate-limit headers from {response.url}")
+            self._cond.notify_all()
+    
+    @staticmethod
+    def _is_rate_limited(response: requests.Response) -> bool:
+        if response.status_code not in (403, 429):
+            return False
+        return response.headers.get('X-RateLimit-Remaining') == '0' or 'Retry-After' in response.headers
+    
+    def request(self, session: requests.Session, method: str, url: str, **kwargs: Any) -> requests.Response:
+        """Send a request through the scheduler, retrying rate-limited ones on another token"""
+        resource = self._resource(url)
+        level = request_priority.get()
+        headers = kwargs.pop('headers', None) or {}
+        
+        response = None
+        for _ in range(len(self.tokens) + 1):
+            token = self._acquire(resource, level)
+            request_headers = dict(headers)
+            if token:
+                request_headers['Authorization'] = f'token {token}'
+            try:
+                response = session.request(method, url, headers=request_headers, **kwargs)
+            except BaseException:
+                self._release(token, resource, None)
+                raise
+            self._release(token, resource, response)
+            
+            if not self._is_rate_limited(response):
+                return response
+            logger.warning(f"GitHub rate limit hit for {url}, requeueing on another token")
+        return response
+    
+    def remaining_fraction(self, resource: str = 'core') -> Optional[float]:
+        """Share of the window's quota left on the best token, None until headers are seen"""
+        now = time.time()
+        best = None
+        with self._cond:
+            for token in self.tokens:
+                quota = self._quotas.get((token, resource))
+                if quota is None or quota.remaining is None or not quota.limit:
+                    continue
+                fraction = 1.0 if quota.reset <= now else quota.remaining / quota.limit
+                best = fraction if best is None else max(best, fraction)
+        return best
+    
+    def snapshot(self, redact: bool = False) -> Dict[str, Any]:
+        """Current quota per token and queue depth, for monitoring
+        
+        With redact, quotas carry no token suffix, for unauthenticated callers.
+        """
+        with self._cond:
+            quotas = []
+            for (token, resource), quota in self._quotas.items():
+                entry = {
+                    'resource': resource,
+                    'limit': quota.limit,
+                    'remaining': quota.remaining,
+                    'reset': quota.reset
+                }
+                if not redact:
+                    entry['token'] = f"...{token[-4:]}" if token else 'anonymous'
+                quotas.append(entry)
+            return {
+                'tokens': len(self.tokens),
+                'quota': quotas,
+                'queue_depth': sum(len(queue) for queue in self._queues.values()),
+                'in_flight': self._in_flight
+            }
@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    """A computation in progress that other callers can wait on"""
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+class AnalysisCache:
+    """Two-tier (in-process LRU + shared SQLite) cache for analysis results
+    
+    Entries are keyed by (username, repo, HEAD sha) and expire after a TTL.
+    Concurrent requests for the same key collapse into a single computation:
+    within a process through an in-flight table, across gunicorn workers
+    through a lease row in the shared database.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None, ttl: Optional[int] = None,
+                 max_entries: Optional[int] = None, wait_timeout: float = 60.0):
+        data_dir = os.environ.get('DATA_DIR', 'data')
+        self.db_path = db_path or os.environ.get('ANALYSIS_CACHE_PATH',
+                                                 os.path.join(data_dir, 'analysis_cache.db'))
+        self.ttl = ttl if ttl is not None else int(os.environ.get('ANALYSIS_CACHE_TTL', 3600))
+        self.max_entries = max_entries or int(os.environ.get('ANALYSIS_CACHE_SIZE', 256))
+        self.wait_timeout = wait_timeout
+        
+        self._memory: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Flight] = {}
+        self._local = threading.local()
+        self._owner = uuid.uuid4().hex
+        
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'shared_waits': 0}
+        
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._init_db()
+    
+    @staticmethod
+    def make_key(username: str, repo: str, head_sha: Optional[str], version: Optional[str] = None) -> str:
+        """Build a cache key; GitHub names are case-insensitive
+        
+        Passing the extractor version keeps results from an older extractor
+        from being served after a deploy.
+        """
+        key = f"{username.lower()}/{repo.lower()}@{head_sha or 'unknown'}"
+        return f"{key}:{version}" if version else key
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    def _init_db(self):
+        conn = self._connection()
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS analysis_cache (
+                                key TEXT PRIMARY KEY,
+                                value TEXT NOT NULL,
+                                expires_at REAL NOT NULL)''')
+            conn.execute('''CREATE TABLE IF NOT EXISTS analysis_leases (
+                                key TEXT PRIMARY KEY,
+                                owner TEXT NOT NULL,
+                                expires_at REAL NOT NULL)''')
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a key in memory, then on disk; expired entries are misses"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+        
+        try:
+            row = self._connection().execute(
+                'SELECT value, expires_at FROM analysis_cache WHERE key = ? AND expires_at > ?',
+                (key, now)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache read failed for {key}: {e}")
+            row = None
+        
+        if row is None:
+            return None
+        
+        value = json.loads(row[0])
+        self._remember(key, value, row[1])
+        with self._lock:
+            self.stats['disk_hits'] += 1
+        return value
+    
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a value in both tiers"""
+        expires_at = time.time() + self.ttl
+        self._remember(key, value, expires_at)
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute('INSERT OR REPLACE INTO analysis_cache (key, value, expires_at) VALUES (?, ?, ?)',
+                             (key, json.dumps(value), expires_at))
+                conn.execute('DELETE FROM analysis_cache WHERE expires_at <= ?', (time.time(),))
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache write failed for {key}: {e}")
+    
+    def expires_at(self, key: str) -> Optional[float]:
+        """When a key's entry expires, or None if it isn't cached at all"""
+        with self._lock:
+            entry = self._memory.get(key)
+        try:
+            row = self._connection().execute(
+                'SELECT expires_at FROM analysis_cache WHERE key = ?', (key,)).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Analysis cache read failed for {key}: {e}")
+            row = None
+        # Another worker may have refreshed the shared entry since we read it
+        candidates = [found for found in (entry and entry[0], row and row[0]) if found]
+        return max(candidates) if candidates else None
+    
+    def refresh(self, key: str, compute: Callable[[], Dict[str, Any]]) -> bool:
+        """Recompute and store a key while readers keep getting the current entry
+        
+        Returns False without computing when another worker holds the key's
+        lease, i.e. is already computing or refreshing it.
+        """
+        if not self._acquire_lease(key):
+            return False
+        try:
+            self.set(key, compute())
+            return True
+        finally:
+            self._release_lease(key)
+    
+    def _remember(self, key: str, value: Dict[str, Any], expires_at: float):
+        with self._lock:
+            self._memory[key] = (expires_at, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+    
+    def get_or_compute(self, key: str, compute: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Return the cached value for key, computing it at most once"""
+        value = self.get(key)
+        if value is not None:
+            return value
+        
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+                self.stats['misses'] += 1
+        
+        if not leader:
+            if not flight.event.wait(self.wait_timeout):
+                raise TimeoutError(f"Timed out waiting for analysis of {key}")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        
+        try:
+            value = self._wait_for_other_worker(key)
+            if value is None:
+                try:
+                    value = compute()
+                    self.set(key, value)
+                finally:
+                    self._release_lease(key)
+            flight.value = value
+            return value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.event.set()
+    
+    def _wait_for_other_worker(self, key: str) -> Optional[Dict[str, Any]]:
+        """Take the cross-process lease, or wait for the worker that holds it
+        
+        Returns the value another worker produced, or None once this process
+        holds the lease and should compute it.
+        """
+        deadline = time.time() + self.wait_timeout
+        while True:
+            if self._acquire_lease(key):
+                # Another worker may have finished between our miss and the lease;
+                # then there is nothing to compute and the lease must not linger
+                value = self.get(key)
+                if value is not None:
+                    self._release_lease(key)
+                return value
+            with self._lock:
+                self.stats['shared_waits'] += 1
+            time.sleep(0.1)
+            value = self.get(key)
+            if value is not None:
+                return value
+            if time.time() > deadline:
+                logger.warning(f"Lease for {key} not released in time, computing locally")
+                return None
+    
+    def _acquire_lease(self, key: str) -> bool:
+        now = time.time()
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM analysis_leases WHERE key = ? AND expires_at <= ?', (key, now))
+                cursor = conn.execute('INSERT OR IGNORE INTO analysis_leases (key, owner, expires_at) VALUES (?, ?, ?)',
+                                      (key, self._owner, now + self.wait_timeout))
+                return cursor.rowcount == 1
+        except sqlite3.Error as e:
+            logger.warning(f"Could not take analysis lease for {key}: {e}")
+            return True
+    
+    def _release_lease(self, key: str):
+        try:
+            conn = self._connection()
+            with conn:
+                conn.execute('DELETE FROM analysis_leases WHERE key = ? AND owner = ?', (key, self._owner))
+        except sqlite3.Error as e:
+            logger.warning(f"Could not release analysis lease for {key}: {e}")
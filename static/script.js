@@ -15,12 +15,14 @@ let scanningSteps = [
 
 let currentStep = 0;
 let scanProgress = 0;
+let resultsRevealed = false;
+let analysisStream = null;
 
 function updateScanningProgress() {
     const progressBar = document.getElementById('scanProgress');
     const statusText = document.getElementById('scanStatus');
     
-    if (!progressBar || !statusText) return;
+    if (!progressBar || !statusText || resultsRevealed) return;
     
     // Update progress bar
     scanProgress += Math.random() * 15 + 5; // Random increment between 5-20%
@@ -48,19 +50,82 @@ function updateScanningProgress() {
     setTimeout(updateScanningProgress, 800 + Math.random() * 400);
 }
 
-function showResults() {
+function revealResults() {
     const scanningContainer = document.querySelector('.scanning-container');
     const resultsContainer = document.getElementById('resultsContainer');
     
-    if (scanningContainer && resultsContainer) {
-        scanningContainer.style.display = 'none';
-        resultsContainer.style.display = 'block';
-        
+    if (!scanningContainer || !resultsContainer || resultsRevealed) return false;
+    
+    resultsRevealed = true;
+    scanningContainer.style.display = 'none';
+    resultsContainer.style.display = 'block';
+    return true;
+}
+
+function showResults() {
+    // When streaming, stages render as they arrive instead
+    if (revealResults() && !analysisStream) {
         // Fetch real analysis data
         fetchAnalysisData();
     }
 }
 
+function streamAnalysis() {
+    const { username, repo } = window.repoData;
+    const source = new EventSource(`/api/analyze/${username}/${repo}/stream`);
+    const partial = {};
+    let finished = false;
+    analysisStream = source;
+    
+    const on = (event, handler) => {
+        source.addEventListener(event, (e) => handler(JSON.parse(e.data)));
+    };
+    
+    const stop = () => {
+        finished = true;
+        source.close();
+    };
+    
+    // First paint: repository metadata, a single GitHub round trip away
+    on('repository', (data) => {
+        partial.repository = data.repository;
+        revealResults();
+        populateProfile(null, data.repository, null);
+    });
+    
+    on('readme_beliefs', (data) => populateBeliefs(data.beliefs));
+    on('commit_beliefs', (data) => populateBeliefs(data.beliefs));
+    on('archetype', (data) => populateProfile(data.archetype, partial.repository, data.user));
+    on('score', (data) => populateScore(data.epistemic_score));
+    on('predictions', (data) => populatePredictions(data.predictions));
+    
+    on('complete', (data) => {
+        // Store data for sharing
+        window.analysisData = data;
+        stop();
+    });
+    
+    on('analysis_error', (data) => {
+        console.error('Error streaming analysis:', data.message);
+        stop();
+        revealResults();
+        // Fall back to mock data
+        populateBeliefs();
+        populateProfile();
+        populatePredictions();
+        populateScore();
+    });
+    
+    // Connection dropped before completion: retry once without streaming
+    source.onerror = () => {
+        if (finished) return;
+        stop();
+        analysisStream = null;
+        revealResults();
+        fetchAnalysisData();
+    };
+}
+
 async function fetchAnalysisData() {
     try {
         const { username, repo } = window.repoData;
@@ -91,10 +156,21 @@ async function fetchAnalysisData() {
     }
 }
 
+function startRender(container) {
+    // Clear a container and tag it so staggered renders from an earlier pass stop
+    const renderId = String(Number(container.dataset.renderId || 0) + 1);
+    container.dataset.renderId = renderId;
+    container.innerHTML = '';
+    return renderId;
+}
+
 function populateBeliefs(beliefsData = null) {
     const container = document.getElementById('beliefsContainer');
     if (!container) return;
     
+    // Streaming re-renders beliefs as more sources arrive
+    const renderId = startRender(container);
+    
     // Use real data if available, otherwise fallback to mock data
     const beliefs = beliefsData || [
         {
@@ -117,6 +193,7 @@ function populateBeliefs(beliefsData = null) {
     
     beliefs.forEach((belief, index) => {
         setTimeout(() => {
+            if (container.dataset.renderId !== renderId) return;
             const beliefElement = document.createElement('div');
             beliefElement.className = 'belief-item';
             
@@ -147,6 +224,8 @@ function populateProfile(archetypeData = null, repositoryData = null, userData =
     const container = document.getElementById('profileContainer');
     if (!container) return;
     
+    const renderId = startRender(container);
+    
     // Build profile from real data if available
     const archetype = archetypeData || { type: 'pragmatist', description: 'Balanced approach to software development' };
     const repo = repositoryData || {};
@@ -177,6 +256,7 @@ function populateProfile(archetypeData = null, repositoryData = null, userData =
     
     profile.forEach((item, index) => {
         setTimeout(() => {
+            if (container.dataset.renderId !== renderId) return;
             const profileElement = document.createElement('div');
             profileElement.className = 'profile-item';
             profileElement.innerHTML = `
@@ -311,5 +391,9 @@ function copyLink() {
 document.addEventListener('DOMContentLoaded', function() {
     if (document.getElementById('scanProgress')) {
         setTimeout(updateScanningProgress, 1000);
+        
+        if (window.EventSource) {
+            streamAnalysis();
+        }
     }
 });
\ No newline at end of file
@@ -0,0 +1,70 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fake_github import FakeGitHub
+from github_client import GitHubClient
+from github_graphql_client import GitHubGraphQLClient
+
+FIXTURES = ['small', 'typical', 'pathological']
+
+@pytest.fixture(scope='module', params=FIXTURES)
+def server(request):
+    """A local stub GitHub serving one fixture over REST and GraphQL"""
+    fake = FakeGitHub(request.param)
+    http_server = fake.serve()
+    yield fake, f'http://127.0.0.1:{http_server.server_address[1]}'
+    http_server.shutdown()
+    http_server.server_close()
+
+@pytest.fixture
+def fake_github(server, monkeypatch):
+    fake, url = server
+    monkeypatch.setenv('GITHUB_API_URL', url)
+    monkeypatch.setenv('GITHUB_HTTP_CACHE', 'False')
+    monkeypatch.delenv('GITHUB_GRAPHQL_URL', raising=False)
+    return fake
+
+def fetch(client_class, fake):
+    client = client_class(token='test-token')
+    data = client.get_repository_data(fake.fixture['owner'], fake.fixture['repo'])
+    data.pop('fetched_at')
+    return data, client
+
+def test_graphql_matches_rest(fake_github):
+    rest, _ = fetch(GitHubClient, fake_github)
+    graphql, _ = fetch(GitHubGraphQLClient, fake_github)
+    
+    assert graphql['repository'] == rest['repository']
+    assert graphql['readme'] == rest['readme']
+    assert graphql['commits'] == rest['commits']
+    assert graphql['issues'] == rest['issues']
+    assert graphql['user'] == rest['user']
+
+def test_graphql_is_one_round_trip(fake_github):
+    fake_github.stats.clear()
+    graphql, _ = fetch(GitHubGraphQLClient, fake_github)
+    
+    assert graphql['repository']['name'] == fake_github.fixture['repo']
+    assert sum(fake_github.stats.values()) == 1
+
+def test_graphql_query_answers_head_sha(fake_github):
+    _, client = fetch(GitHubGraphQLClient, fake_github)
+    fake_github.stats.clear()
+    
+    head = client.get_head_sha(fake_github.fixture['owner'], fake_github.fixture['repo'])
+    
+    assert sum(fake_github.stats.values()) == 0
+    assert head == GitHubClient(token='test-token').get_head_sha(fake_github.fixture['owner'], fake_github.fixture['repo'])
+
+def test_graphql_falls_back_to_rest_readme(fake_github, monkeypatch):
+    monkeypatch.setattr(fake_github, 'readme_path', 'README.markdown')
+    rest, _ = fetch(GitHubClient, fake_github)
+    graphql, _ = fetch(GitHubGraphQLClient, fake_github)
+    
+    assert graphql['readme'] == rest['readme']
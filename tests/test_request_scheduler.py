@@ -0,0 +1,32 @@
+import os
+import sys
+import time
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from request_scheduler import RequestScheduler, BACKGROUND
+
+def test_exhausted_resource_does_not_block_others():
+    scheduler = RequestScheduler(['token-a'], queue_timeout=5)
+    graphql = scheduler._quota('token-a', 'graphql')
+    graphql.remaining, graphql.limit, graphql.reset = 0, 5000, time.time() + 3
+    
+    # A GraphQL request waits out its reset at the head of its queue...
+    waiter = threading.Thread(target=scheduler._acquire, args=('graphql', BACKGROUND), daemon=True)
+    waiter.start()
+    time.sleep(0.1)
+    
+    # ...while core requests, which still have quota, go straight through
+    started = time.time()
+    assert scheduler._acquire('core', BACKGROUND) == 'token-a'
+    assert time.time() - started < 0.5
+    assert scheduler.snapshot()['queue_depth'] == 1
+
+def test_redacted_snapshot_has_no_token():
+    scheduler = RequestScheduler(['secret-token-1234'])
+    scheduler._quota('secret-token-1234', 'core').remaining = 10
+    
+    assert scheduler.snapshot()['quota'][0]['token'] == '...1234'
+    assert 'token' not in scheduler.snapshot(redact=True)['quota'][0]
@@ -0,0 +1,105 @@
+import os
+import sys
+import hmac
+import hashlib
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from belief_extractor import BeliefExtractor
+from webhooks import RepositoryState, WebhookProcessor, verify_signature
+
+SECRET = 'webhook-secret'
+BODY = b'{"zen": "Keep it logically awesome."}'
+HEAD = 'a' * 40
+
+def sign(body: bytes, secret: str = SECRET) -> str:
+    return 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+
+def test_signature_accepts_matching_hmac():
+    assert verify_signature(SECRET, BODY, sign(BODY))
+
+@pytest.mark.parametrize('signature', [
+    sign(BODY, 'other-secret'),
+    sign(BODY + b' '),
+    None,
+    '',
+    'sha1=' + hmac.new(SECRET.encode('utf-8'), BODY, hashlib.sha1).hexdigest(),
+    sign(BODY)[len('sha256='):],
+])
+def test_signature_rejects_wrong_missing_and_other_schemes(signature):
+    assert not verify_signature(SECRET, BODY, signature)
+
+def test_signature_rejects_everything_without_a_secret():
+    assert not verify_signature(None, BODY, sign(BODY))
+
+@pytest.fixture
+def processor(tmp_path):
+    state = RepositoryState(str(tmp_path / 'repository_state.db'))
+    extractor = BeliefExtractor()
+    github_data = {
+        'repository': {'name': 'repo', 'full_name': 'owner/repo'},
+        'readme': 'We write tests first and document everything.',
+        'commits': [{'sha': HEAD[:7], 'message': 'Add tests', 'author': 'a', 'date': '', 'url': ''}],
+        'issues': [
+            {'number': 1, 'title': 'Good first issue: typo', 'body': '', 'state': 'open'},
+            {'number': 2, 'title': 'Crash on start', 'body': '', 'state': 'open'}
+        ]
+    }
+    github_data['aggregates'] = extractor.aggregates(github_data)
+    state.save('owner', 'repo', HEAD, github_data)
+    # No delivery below needs GitHub; README-touching pushes are the only fetch
+    return WebhookProcessor(None, state, extractor=extractor)
+
+def repository_payload():
+    return {'name': 'repo', 'owner': {'login': 'owner'}, 'default_branch': 'main'}
+
+def push(before: str, after: str):
+    return {
+        'ref': 'refs/heads/main',
+        'before': before,
+        'after': after,
+        'commits': [{'id': after, 'message': 'Fix bug', 'timestamp': '', 'url': '', 'modified': ['app.py']}],
+        'repository': repository_payload()
+    }
+
+def test_push_following_head_is_applied(processor):
+    result = processor.handle('push', push(HEAD, 'b' * 40))
+    
+    stored = processor.state.load('owner', 'repo')
+    assert result['status'] == 'applied'
+    assert stored['head_sha'] == 'b' * 40
+    assert stored['github_data']['commits'][0]['message'] == 'Fix bug'
+
+def test_push_not_following_head_marks_resync(processor):
+    result = processor.handle('push', push('c' * 40, 'd' * 40))
+    
+    stored = processor.state.load('owner', 'repo')
+    assert result == {'status': 'resynced', 'username': 'owner', 'repo': 'repo', 'head_sha': 'd' * 40}
+    assert stored['head_sha'] is None
+    assert stored['github_data'] == {}
+    # Until an analysis resyncs it, every delivery leaves it marked
+    assert processor.handle('push', push('d' * 40, 'e' * 40))['status'] == 'resynced'
+
+def test_redelivered_push_is_ignored(processor):
+    payload = push(HEAD, 'b' * 40)
+    processor.handle('push', payload)
+    version = processor.state.load('owner', 'repo')['version']
+    
+    result = processor.handle('push', payload)
+    
+    assert result['status'] == 'ignored'
+    assert processor.state.load('owner', 'repo')['version'] == version
+
+def test_issue_delete_drops_issue_and_its_flag(processor):
+    issue = {'number': 1, 'title': 'Good first issue: typo', 'body': '', 'state': 'open',
+             'comments': 0, 'created_at': '', 'labels': []}
+    result = processor.handle('issues', {'action': 'deleted', 'issue': issue, 'repository': repository_payload()})
+    
+    github_data = processor.state.load('owner', 'repo')['github_data']
+    assert result['status'] == 'applied'
+    assert [stored['number'] for stored in github_data['issues']] == [2]
+    assert github_data['aggregates']['issues'] == {'2': False}
+    assert github_data['aggregates']['readme'] == BeliefExtractor().aggregates(github_data)['readme']
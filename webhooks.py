@@ -0,0 +1,305 @@
+import os
+import hmac
+import json
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Any
+
+from github_client import GitHubClient
+
+logger = logging.getLogger(__name__)
+
+SIGNATURE_HEADER = 'X-Hub-Signature-256'
+
+def verify_signature(secret: Optional[str], body: bytes, signature: Optional[str]) -> bool:
+    """Whether a delivery's X-Hub-Signature-256 is the HMAC of its body; always False without a secret"""
+    if not secret or not signature or not signature.startswith('sha256='):
+        return False
+    expected = 'sha256=' + hmac.new(secret.encode('utf-8'), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+class RepositoryState:
+    """Analysis inputs per repository (the get_repository_data dict), kept current by webhooks
+    
+    One row per repository in SQLite (WAL) under DATA_DIR, shared by all
+    gunicorn workers. Each row carries the HEAD sha its commits reflect and
+    a version number; writers pass the version they read, so two deliveries
+    racing on one repository can't overwrite each other's changes.
+    """
+    
+    def __init__(self, db_path: Optional[str] = None, max_age: Optional[float] = None):
+        data_dir = os.environ.get('DATA_DIR', 'data')
+        self.db_path = db_path or os.environ.get('WEBHOOK_STATE_PATH', os.path.join(data_dir, 'repository_state.db'))
+        # Past this, analyses fetch from GitHub again, in case the hook was removed
+        self.max_age = max_age or float(os.environ.get('WEBHOOK_STATE_MAX_AGE', 7 * 86400))
+        self._local = threading.local()
+        
+        directory = os.path.dirname(self.db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        with conn:
+            conn.execute('''CREATE TABLE IF NOT EXISTS repository_state (
+                                key TEXT PRIMARY KEY,
+                                head_sha TEXT,
+                                data TEXT NOT NULL,
+                                version INTEGER NOT NULL,
+                                updated_at REAL NOT NULL)''')
+    
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+    
+    @staticmethod
+    def _key(username: str, repo: str) -> str:
+        return f"{username.lower()}/{repo.lower()}"
+    
+    def load(self, username: str, repo: str) -> Optional[Dict[str, Any]]:
+        """The stored {'head_sha', 'github_data', 'version', 'updated_at'}, or None
+        
+        A head_sha of None marks a repository awaiting resync, whose
+        github_data is empty until the next analysis stores a full fetch.
+        """
+        row = self._connection().execute(
+            'SELECT head_sha, data, version, updated_at FROM repository_state WHERE key = ?',
+            (self._key(username, repo),)).fetchone()
+        if row is None:
+            return None
+        return {'head_sha': row[0], 'github_data': json.loads(row[1]), 'version': row[2], 'updated_at': row[3]}
+    
+    def head(self, username: str, repo: str) -> Optional[Dict[str, Any]]:
+        """The stored {'head_sha', 'version'} alone, without decoding the inputs"""
+        row = self._connection().execute(
+            'SELECT head_sha, version FROM repository_state WHERE key = ?',
+            (self._key(username, repo),)).fetchone()
+        return {'head_sha': row[0], 'version': row[1]} if row else None
+    
+    def is_current(self, stored: Dict[str, Any], head_sha: Optional[str]) -> bool:
+        """Whether a loaded row holds the inputs at head_sha and is within max_age"""
+        return (stored['head_sha'] is not None and stored['head_sha'] == head_sha
+                and stored['updated_at'] >= time.time() - self.max_age)
+    
+    def save(self, username: str, repo: str, head_sha: Optional[str], github_data: Dict[str, Any],
+             version: Optional[int] = None) -> bool:
+        """Store a repository's inputs; with version, only if the row is still at it"""
+        key = self._key(username, repo)
+        data = json.dumps(github_data)
+        conn = self._connection()
+        with conn:
+            if version is None:
+                conn.execute('INSERT OR REPLACE INTO repository_state (key, head_sha, data, version, updated_at) '
+                             'VALUES (?, ?, ?, COALESCE((SELECT version + 1 FROM repository_state WHERE key = ?), 0), ?)',
+                             (key, head_sha, data, key, time.time()))
+                return True
+            cursor = conn.execute('UPDATE repository_state SET head_sha = ?, data = ?, version = version + 1, '
+                                  'updated_at = ? WHERE key = ? AND version = ?',
+                                  (head_sha, data, time.time(), key, version))
+            return cursor.rowcount == 1
+    
+    def delete(self, username: str, repo: str):
+        conn = self._connection()
+        with conn:
+            conn.execute('DELETE FROM repository_state WHERE key = ?', (self._key(username, repo),))
+    
+    def count(self) -> int:
+        return self._connection().execute('SELECT COUNT(*) FROM repository_state').fetchone()[0]
+
+class WebhookProcessor:
+    """Apply GitHub push, issues and repository deliveries to stored analysis inputs
+    
+    A push to the default branch prepends its commits to the stored commit
+    sample (and, in deep-history mode, feeds their messages into the
+    repository's keyword checkpoint), refetching the README only if the
+    push touched it; an issues event replaces that one issue; every
+    delivery refreshes description, topics, stars and forks from the
+    repository object it carries. Keyword aggregates stored beside the
+    inputs (README counts, per-issue flags) are updated with the delta, so
+    the re-analysis reads them instead of rescanning the README. The work
+    is proportional to the delivery, not the repository.
+    
+    A repository seen for the first time, or a push whose `before` isn't
+    the stored HEAD (force push, missed delivery), is marked for resync:
+    the next analysis fetches it in full and stores the result. Nothing
+    here runs an analysis. Redeliveries are no-ops.
+    """
+    
+    EVENTS = ('push', 'issues', 'repository')
+    # Mirror the sample sizes GitHubClient fetches
+    COMMIT_SAMPLE = 50
+    ISSUE_SAMPLE = 20
+    # GitHub lists at most this many commits in a push payload
+    PUSH_COMMIT_LIMIT = 2048
+    
+    def __init__(self, github_client, state: RepositoryState, commit_history=None, extractor=None,
+                 retries: int = 3):
+        self.github_client = github_client
+        self.state = state
+        self.commit_history = commit_history
+        self.extractor = extractor
+        self.retries = retries
+        self.stats = {'applied': 0, 'resynced': 0, 'ignored': 0, 'conflicts': 0}
+        self._lock = threading.Lock()
+    
+    def _count(self, outcome: str):
+        with self._lock:
+            self.stats[outcome] += 1
+    
+    def handle(self, event: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply one delivery
+        
+        Returns {'status': 'ignored', 'reason'} when nothing changed, else
+        {'status': 'applied' | 'resynced', 'username', 'repo', 'head_sha'}
+        for the repository to re-analyse; head_sha is None when unknown.
+        """
+        repository = payload.get('repository') or {}
+        if event not in self.EVENTS or not repository.get('name'):
+            return self._ignored(f"unhandled event {event}")
+        username, repo = repository['owner']['login'], repository['name']
+        
+        if event == 'push':
+            ref = payload.get('ref', '')
+            if ref != f"refs/heads/{repository.get('default_branch')}" or payload.get('deleted'):
+                return self._ignored(f"push to {ref}")
+        if event == 'repository':
+            if payload.get('action') == 'deleted':
+                self.state.delete(username, repo)
+                return self._ignored('repository deleted')
+            previous = self._previous_name(payload)
+            if previous:
+                # Renamed or transferred: the old name's state would never update again
+                self.state.delete(*previous)
+        
+        for _ in range(self.retries):
+            stored = self.state.load(username, repo)
+            if stored is None or stored['head_sha'] is None:
+                return self._resync(username, repo, payload.get('after') if event == 'push' else None)
+            
+            github_data = stored['github_data']
+            head_sha = stored['head_sha']
+            readme = github_data.get('readme')
+            if event == 'push':
+                if head_sha == payload['after']:
+                    return self._ignored('push already applied')
+                if head_sha != payload['before'] or len(payload.get('commits', [])) >= self.PUSH_COMMIT_LIMIT:
+                    logger.info(f"Push to {username}/{repo} doesn't follow stored HEAD {head_sha}, resyncing")
+                    return self._resync(username, repo, payload['after'])
+                self._apply_push(username, repo, github_data, payload)
+                head_sha = payload['after']
+            elif event == 'issues':
+                self._apply_issue(github_data, payload)
+            github_data['repository'] = self._merge_repository(github_data.get('repository', {}), repository)
+            github_data['fetched_at'] = datetime.now().isoformat()
+            self._update_aggregates(github_data, github_data.get('readme') is not readme)
+            
+            if self.state.save(username, repo, head_sha, github_data, stored['version']):
+                self._count('applied')
+                return {'status': 'applied', 'username': username, 'repo': repo, 'head_sha': head_sha}
+            # Another delivery for this repository landed in between; redo on top of it
+            self._count('conflicts')
+        raise RuntimeError(f"Could not apply {event} to {username}/{repo}: concurrent updates")
+    
+    def _ignored(self, reason: str) -> Dict[str, Any]:
+        self._count('ignored')
+        return {'status': 'ignored', 'reason': reason}
+    
+    @staticmethod
+    def _previous_name(payload: Dict[str, Any]):
+        """(owner, name) a renamed or transferred repository had before, when the payload says"""
+        changes = payload.get('changes') or {}
+        repository = payload['repository']
+        name = changes.get('repository', {}).get('name', {}).get('from', repository['name'])
+        previous_owner = changes.get('owner', {}).get('from', {})
+        owner = (previous_owner.get('user') or previous_owner.get('organization') or {}).get(
+            'login', repository['owner']['login'])
+        if (owner, name) == (repository['owner']['login'], repository['name']):
+            return None
+        return owner, name
+    
+    def _resync(self, username: str, repo: str, head_sha: Optional[str]) -> Dict[str, Any]:
+        """Mark the stored state for resync; the next analysis's full fetch replaces it"""
+        self.state.save(username, repo, None, {})
+        self._count('resynced')
+        return {'status': 'resynced', 'username': username, 'repo': repo, 'head_sha': head_sha}
+    
+    def _update_aggregates(self, github_data: Dict[str, Any], readme_changed: bool):
+        """Bring the stored keyword aggregates in line with the updated inputs"""
+        if self.extractor is None:
+            return
+        aggregates = github_data.get('aggregates') or {}
+        if aggregates.get('version') != self.extractor.version:
+            # Never stored, or by another extractor: one full scan, then deltas again
+            github_data['aggregates'] = self.extractor.aggregates(github_data)
+            return
+        if readme_changed:
+            aggregates['readme'] = self.extractor.readme_counts(github_data.get('readme', ''))
+        # The sample holds at most ISSUE_SAMPLE issues; rechecking them is cheap
+        aggregates['issues'] = {str(issue['number']): self.extractor.welcomes_contributors(issue)
+                                for issue in github_data.get('issues', [])}
+    
+    def _apply_push(self, username: str, repo: str, github_data: Dict[str, Any], payload: Dict[str, Any]):
+        # Payload commits are oldest first; stored samples are newest first
+        pushed = [self._project_commit(commit) for commit in reversed(payload.get('commits', []))]
+        github_data['commits'] = (pushed + github_data.get('commits', []))[:self.COMMIT_SAMPLE]
+        if self.commit_history:
+            # If the checkpoint isn't at before, the next ingest walks the gap instead
+            self.commit_history.apply(username, repo, payload['before'], payload['after'],
+                                      [commit['message'] for commit in pushed])
+        if self._touches_readme(payload.get('commits', [])):
+            github_data['readme'] = self.github_client.get_readme(username, repo)
+    
+    @staticmethod
+    def _project_commit(commit: Dict[str, Any]) -> Dict[str, Any]:
+        """A push payload commit, shaped like GitHubClient's"""
+        return {
+            'sha': commit['id'][:7],
+            'message': commit['message'],
+            'author': commit.get('author', {}).get('name', ''),
+            'date': commit.get('timestamp', ''),
+            'url': commit.get('url', '')
+        }
+    
+    @staticmethod
+    def _touches_readme(commits: List[Dict[str, Any]]) -> bool:
+        # GitHub's /readme is the root README, whatever its extension
+        return any('/' not in path and path.lower().startswith('readme')
+                   for commit in commits
+                   for field in ('added', 'modified', 'removed')
+                   for path in commit.get(field, []))
+    
+    def _apply_issue(self, github_data: Dict[str, Any], payload: Dict[str, Any]):
+        issue = GitHubClient._project_issue(payload['issue'])
+        issues = list(github_data.get('issues', []))
+        position = next((i for i, stored in enumerate(issues) if stored['number'] == issue['number']), None)
+        if position is not None:
+            del issues[position]
+        if payload.get('action') not in ('deleted', 'transferred'):
+            if position is not None:
+                issues.insert(position, issue)
+            elif payload.get('action') == 'opened':
+                # Samples are newest first; older issues outside the sample stay out
+                issues.insert(0, issue)
+        github_data['issues'] = issues[:self.ISSUE_SAMPLE]
+    
+    @staticmethod
+    def _merge_repository(stored: Dict[str, Any], repository: Dict[str, Any]) -> Dict[str, Any]:
+        """Stored metadata updated with what the payload's repository object carries"""
+        merged = dict(stored)
+        merged.update({
+            'name': repository['name'],
+            'full_name': repository.get('full_name', stored.get('full_name')),
+            'description': repository.get('description', ''),
+            'language': repository.get('language', stored.get('language', '')),
+            'topics': repository.get('topics', stored.get('topics', [])),
+            'stars': repository.get('stargazers_count', stored.get('stars', 0)),
+            'forks': repository.get('forks_count', stored.get('forks', 0))
+        })
+        return merged